@@ -13,7 +13,7 @@ import { Accessibility, Camera, CameraOff } from 'lucide-react';
 const WS_URL = import.meta.env.VITE_WS_URL || 'wss://gesture-control-dashboard.onrender.com/ws';
 
 function App() {
-  const { state, lastHeadDirection, notifications, sendMessage, connect, removeNotification, calibrateNose } = useWebSocket(WS_URL);
+  const { state, lastHeadDirection, flowControl, notifications, sendMessage, connect, removeNotification, calibrateNose } = useWebSocket(WS_URL);
   const [showCamera, setShowCamera] = useState(true);
   const [faceDetectionData, setFaceDetectionData] = useState<any>(null);
 
@@ -168,6 +168,7 @@ function App() {
                   onFaceDetection={handleFaceDetection}
                   sendMessage={sendMessage}
                   connected={state.connected}
+                  flowControl={flowControl}
                 />
                 
                 {/* Face Detection Info */}
@@ -1,17 +1,25 @@
 import { useEffect, useRef, useState } from 'react';
+import type { FlowControlAdvice } from '../hooks/useWebSocket';
 
 interface CameraStreamProps {
   onFaceDetection?: (result: any) => void;
   sendMessage?: (message: any) => void;
   connected?: boolean;
+  flowControl?: FlowControlAdvice | null;
 }
 
-const CameraStream = ({ onFaceDetection, sendMessage, connected }: CameraStreamProps) => {
+// Used until the server sends its first FLOW_CONTROL advice
+const DEFAULT_CAPTURE: FlowControlAdvice = { fps: 5, width: 640, height: 480, quality: 0.8 };
+
+const CameraStream = ({ onFaceDetection, sendMessage, connected, flowControl }: CameraStreamProps) => {
   const videoRef = useRef<HTMLVideoElement>(null);
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const [isStreaming, setIsStreaming] = useState(false);
   const [faceDetected, setFaceDetected] = useState(false);
   const intervalRef = useRef<NodeJS.Timeout>();
+  const captureRef = useRef<FlowControlAdvice>(DEFAULT_CAPTURE);
+  captureRef.current = flowControl || DEFAULT_CAPTURE;
+  const captureFps = captureRef.current.fps;
 
   useEffect(() => {
     startCamera();
@@ -26,7 +34,7 @@ const CameraStream = ({ onFaceDetection, sendMessage, connected }: CameraStreamP
     } else {
       stopFrameCapture();
     }
-  }, [connected, isStreaming, sendMessage]);
+  }, [connected, isStreaming, sendMessage, captureFps]);
 
   const startCamera = async () => {
     try {
@@ -68,15 +76,17 @@ const CameraStream = ({ onFaceDetection, sendMessage, connected }: CameraStreamP
 
     if (!ctx) return;
 
-    // Set canvas size to match video
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
+    // Scale down to the server-advised resolution (never up)
+    const { width, quality } = captureRef.current;
+    const scale = Math.min(1, width / (video.videoWidth || width));
+    canvas.width = Math.round(video.videoWidth * scale);
+    canvas.height = Math.round(video.videoHeight * scale);
 
     // Draw current frame to canvas
-    ctx.drawImage(video, 0, 0);
+    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
     // Convert to base64
-    const imageData = canvas.toDataURL('image/jpeg', 0.8);
+    const imageData = canvas.toDataURL('image/jpeg', quality);
 
     // Send frame to backend for processing
     sendMessage({
@@ -88,8 +98,8 @@ const CameraStream = ({ onFaceDetection, sendMessage, connected }: CameraStreamP
 
   const startFrameCapture = () => {
     stopFrameCapture(); // Clear any existing interval
-    // Capture frames every 200ms (5 FPS to avoid overload)
-    intervalRef.current = setInterval(captureFrame, 200);
+    // Capture at the rate the server says it can sustain (5 FPS until it reports)
+    intervalRef.current = setInterval(captureFrame, 1000 / Math.max(captureFps, 0.5));
   };
 
   const stopFrameCapture = () => {
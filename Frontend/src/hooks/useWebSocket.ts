@@ -13,6 +13,8 @@ export interface WebSocketState {
   totalDistance: number;
   sessionTime: number;
   faceTracking: boolean;
+  leftWheel: number;
+  rightWheel: number;
 }
 
 export interface WebSocketMessage {
@@ -20,6 +22,14 @@ export interface WebSocketMessage {
   payload?: any;
 }
 
+// Capture settings advised by the server (FLOW_CONTROL) from its measured processing rate
+export interface FlowControlAdvice {
+  fps: number;
+  width: number;
+  height: number;
+  quality: number;
+}
+
 export const useWebSocket = (url: string) => {
   const ws = useRef<WebSocket | null>(null);
   const reconnectTimeout = useRef<NodeJS.Timeout | null>(null);
@@ -38,9 +48,12 @@ export const useWebSocket = (url: string) => {
     totalDistance: 0.0,
     sessionTime: 0,
     faceTracking: false,
+    leftWheel: 0.0,
+    rightWheel: 0.0,
   });
 
   const [lastHeadDirection, setLastHeadDirection] = useState<string>('STOP');
+  const [flowControl, setFlowControl] = useState<FlowControlAdvice | null>(null);
   const [notifications, setNotifications] = useState<Array<{ id: string; message: string; type: 'info' | 'error' | 'success' }>>([]);
 
   const addNotification = useCallback((message: string, type: 'info' | 'error' | 'success' = 'info') => {
@@ -129,6 +142,20 @@ export const useWebSocket = (url: string) => {
               }));
               break;
 
+            case 'DRIVE':
+              // Continuous steering: compact delta, only changed wheels are present
+              setState(prev => {
+                const leftWheel = message.payload?.l ?? prev.leftWheel;
+                const rightWheel = message.payload?.r ?? prev.rightWheel;
+                return {
+                  ...prev,
+                  leftWheel,
+                  rightWheel,
+                  motorSpeed: Math.max(Math.abs(leftWheel), Math.abs(rightWheel)),
+                };
+              });
+              break;
+
             case 'PLACE_HIGHLIGHT':
               const highlightedPlace = message.payload?.place || null;
               console.log('🏠 PLACE_HIGHLIGHT:', highlightedPlace, 'Current mode:', state.mode);
@@ -217,6 +244,16 @@ export const useWebSocket = (url: string) => {
               }
               break;
 
+            case 'FLOW_CONTROL':
+              // Server-advised capture rate / resolution / JPEG quality
+              setFlowControl(prev => (
+                prev && prev.fps === message.payload?.fps && prev.width === message.payload?.width
+                  && prev.quality === message.payload?.quality
+                  ? prev
+                  : message.payload
+              ));
+              break;
+
             case 'ERROR':
               addNotification(message.payload?.message || 'An error occurred', 'error');
               break;
@@ -306,6 +343,7 @@ export const useWebSocket = (url: string) => {
   return {
     state,
     lastHeadDirection,
+    flowControl,
     notifications,
     sendMessage,
     connect,
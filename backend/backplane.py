@@ -0,0 +1,401 @@
+# Pub/sub backplane between relay server processes
+# A relay process only knows its own WebSocket clients. When several worker
+# processes (SO_REUSEPORT) or replicas serve the same clients, every message a
+# process routes locally is also published on the backplane, and messages
+# from other processes are delivered to the local subscribers of their topic.
+#
+#   memory://                       single process (default); also links several
+#                                   relays created in one process
+#   unix:///tmp/gesture-bus.sock    workers on one host; the first process to
+#                                   bind the socket acts as the hub
+#   redis://host:6379/0             replicas across hosts (any server speaking
+#                                   the Redis PUBLISH/SUBSCRIBE protocol)
+#
+# Wire envelope: JSON {"o": origin, "t": topic, "m": message[, "b": 1 if
+# base64-encoded bytes]}; JSON escaping keeps it on a single line. Relayed
+# camera / video frames make lines large: the Unix-socket bus reads lines of
+# up to BACKPLANE_MAX_LINE bytes and drops (with a warning) anything longer.
+
+import asyncio
+import base64
+import fcntl
+import logging
+import os
+import uuid
+from urllib.parse import urlparse
+
+from json_codec import dumps, loads
+
+log = logging.getLogger("GestureControl")
+
+BACKPLANE_URL = os.environ.get('BACKPLANE_URL', 'memory://')
+CHANNEL_PREFIX = os.environ.get('BACKPLANE_CHANNEL', 'gesture-control')
+BACKPLANE_MAX_LINE = int(os.environ.get('BACKPLANE_MAX_LINE', 16 * 1024 * 1024))
+
+def encode_envelope(origin, topic, message):
+    if isinstance(message, bytes):
+        return dumps({"o": origin, "t": topic, "m": base64.b64encode(message).decode('ascii'), "b": 1})
+    return dumps({"o": origin, "t": topic, "m": message})
+
+def decode_envelope(line):
+    envelope = loads(line)
+    message = envelope["m"]
+    if envelope.get("b"):
+        message = base64.b64decode(message)
+    return envelope["o"], envelope["t"], message
+
+class Backplane:
+    """Base class: start(handler) then publish(); handler(topic, message) gets remote messages only"""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex[:12]
+        self.handler = None
+        self.published = 0
+        self.received = 0
+
+    async def start(self, handler):
+        self.handler = handler
+
+    async def publish(self, topic, message):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def _deliver(self, line):
+        try:
+            origin, topic, message = decode_envelope(line)
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning(f"⚠️ Dropping malformed backplane message: {e}")
+            return
+        if origin == self.origin or self.handler is None:
+            return
+        self.received += 1
+        try:
+            await self.handler(topic, message)
+        except Exception as e:
+            log.error(f"❌ Backplane handler error: {e}")
+
+class InMemoryBackplane(Backplane):
+    """In-process bus: all instances with the same name see each other's messages"""
+
+    _buses = {}
+
+    def __init__(self, name='default'):
+        super().__init__()
+        self.name = name
+
+    async def start(self, handler):
+        await super().start(handler)
+        self._buses.setdefault(self.name, set()).add(self)
+
+    async def publish(self, topic, message):
+        self.published += 1
+        peers = self._buses.get(self.name, ())
+        if len(peers) <= 1:
+            return
+        line = encode_envelope(self.origin, topic, message)
+        for peer in list(peers):
+            if peer is not self:
+                await peer._deliver(line)
+
+    async def close(self):
+        self._buses.get(self.name, set()).discard(self)
+
+class UnixSocketBackplane(Backplane):
+    """Local bus over a Unix socket; the first process to bind it is the hub
+
+    The hub forwards every line to all other connections and delivers it
+    locally. Election is an exclusive flock on `<path>.lock`, which the OS
+    releases when the hub exits; the remaining workers then re-elect.
+    """
+
+    def __init__(self, path, reconnect_delay=0.2, max_line=BACKPLANE_MAX_LINE):
+        super().__init__()
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.max_line = max_line
+        self._server = None
+        self._peers = set()        # hub: StreamWriters of connected workers
+        self._reader = None        # worker: connection to the hub
+        self._writer = None
+        self._task = None
+        self._lock_file = None
+        self._closing = False
+
+    @property
+    def is_hub(self):
+        return self._server is not None
+
+    async def start(self, handler):
+        await super().start(handler)
+        await self._join()
+        self._task = asyncio.create_task(self._maintain())
+
+    async def _join(self):
+        """Connect to the hub, or become it when nobody is listening"""
+        while not self._closing:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=self.max_line)
+                self._reader, self._writer = reader, writer
+                log.info(f"🔗 Joined backplane hub at {self.path}")
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                pass
+            if self._acquire_hub_lock():
+                if os.path.exists(self.path):
+                    os.unlink(self.path)  # stale socket of a dead hub
+                self._server = await asyncio.start_unix_server(self._serve_peer, self.path, limit=self.max_line)
+                log.info(f"🛰️ Backplane hub listening on {self.path}")
+                return
+            # Another worker holds the lock and is about to listen
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _acquire_hub_lock(self):
+        lock_file = open(self.path + '.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def _maintain(self):
+        """Worker: read hub lines; re-elect when the hub goes away"""
+        while not self._closing:
+            if self.is_hub:
+                return
+            try:
+                line = await self._reader.readline()
+            except ValueError as e:
+                # Longer than max_line: readline() discarded it, the stream stays usable
+                log.warning(f"⚠️ Dropping oversized backplane message: {e}")
+                continue
+            except (ConnectionError, asyncio.IncompleteReadError):
+                line = b''
+            if line:
+                await self._deliver(line)
+                continue
+            if self._closing:
+                return
+            log.warning("⚠️ Backplane hub lost - re-electing")
+            self._writer = None
+            await asyncio.sleep(self.reconnect_delay * (0.5 + (os.getpid() % 10) / 10))
+            await self._join()
+
+    async def _serve_peer(self, reader, writer):
+        self._peers.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError as e:
+                    log.warning(f"⚠️ Dropping oversized backplane message: {e}")
+                    continue
+                if not line:
+                    break
+                await self._forward(line, exclude=writer)
+                await self._deliver(line)
+        except ConnectionError:
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _forward(self, line, exclude=None):
+        dead = []
+        for peer in list(self._peers):
+            if peer is exclude:
+                continue
+            try:
+                peer.write(line)
+                await peer.drain()
+            except ConnectionError:
+                dead.append(peer)
+        for peer in dead:
+            self._peers.discard(peer)
+
+    async def publish(self, topic, message):
+        self.published += 1
+        line = (encode_envelope(self.origin, topic, message) + '\n').encode()
+        if self.is_hub:
+            await self._forward(line)
+            return
+        if self._writer is None:
+            return  # re-electing: drop rather than block the relay
+        try:
+            self._writer.write(line)
+            await self._writer.drain()
+        except ConnectionError:
+            self._writer = None
+
+    async def close(self):
+        self._closing = True
+        if self._task:
+            self._task.cancel()
+        if self._writer:
+            self._writer.close()
+        if self._server:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._lock_file:
+            self._lock_file.close()
+
+def _resp_command(*parts):
+    """Encode a command as a RESP array of bulk strings"""
+    out = [f"*{len(parts)}\r\n".encode()]
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        out.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(out)
+
+async def _resp_read(reader):
+    """Read one RESP value (simple/bulk strings, integers, errors, arrays)"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Redis connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b'+':
+        return body.decode()
+    if kind == b'-':
+        raise RuntimeError(body.decode())
+    if kind == b':':
+        return int(body)
+    if kind == b'$':
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b'*':
+        return [await _resp_read(reader) for _ in range(int(body))]
+    raise RuntimeError(f"Unexpected RESP reply: {line!r}")
+
+class RedisBackplane(Backplane):
+    """Redis PUBLISH/SUBSCRIBE over a minimal built-in RESP client (no redis package needed)
+
+    Publishes are pipelined: commands are written without waiting for their
+    replies, which a background task consumes. Both connections reconnect
+    after a Redis restart (messages published meanwhile are lost, as with
+    any Redis pub/sub).
+    """
+
+    def __init__(self, host='localhost', port=6379, password=None, channel_prefix=CHANNEL_PREFIX,
+                 reconnect_delay=0.5, max_reconnect_delay=5.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.password = password
+        self.channel = f"{channel_prefix}:relay"
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._pub = None               # publish connection writer (None until (re)connected)
+        self._pub_task = None
+        self._sub_writer = None
+        self._task = None
+        self._connect_lock = asyncio.Lock()
+        self._closing = False
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(_resp_command('AUTH', self.password))
+            await _resp_read(reader)
+        return reader, writer
+
+    async def _open_publisher(self):
+        reader, writer = await self._connect()
+        self._pub = writer
+        self._pub_task = asyncio.create_task(self._publish_replies(reader, writer))
+
+    async def _publish_replies(self, reader, writer):
+        """Consume PUBLISH replies so publishers never wait for a round trip"""
+        while True:
+            try:
+                await _resp_read(reader)  # number of receivers
+            except RuntimeError as e:
+                log.warning(f"⚠️ Redis backplane publish error: {e}")
+            except (ConnectionError, asyncio.IncompleteReadError):
+                break
+        if self._pub is writer:
+            self._pub = None  # reconnect on the next publish
+        writer.close()
+        if not self._closing:
+            log.warning("⚠️ Redis backplane publish connection lost")
+
+    async def _subscribe(self):
+        reader, writer = await self._connect()
+        writer.write(_resp_command('SUBSCRIBE', self.channel))
+        await writer.drain()
+        await _resp_read(reader)  # subscribe confirmation
+        self._sub_writer = writer
+        return reader
+
+    async def start(self, handler):
+        await super().start(handler)
+        await self._open_publisher()
+        sub_reader = await self._subscribe()
+        self._task = asyncio.create_task(self._listen(sub_reader))
+        log.info(f"🔗 Redis backplane on {self.host}:{self.port} channel {self.channel}")
+
+    async def _resubscribe(self):
+        """Reconnect the subscription with exponential backoff"""
+        delay = self.reconnect_delay
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                reader = await self._subscribe()
+                log.info(f"🔗 Redis backplane resubscribed to {self.channel}")
+                return reader
+            except (OSError, RuntimeError, asyncio.IncompleteReadError) as e:
+                log.warning(f"⚠️ Redis backplane reconnect failed: {e}")
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _listen(self, reader):
+        while True:
+            try:
+                reply = await _resp_read(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                log.error("❌ Redis backplane subscription lost - reconnecting")
+                self._sub_writer.close()
+                reader = await self._resubscribe()
+                continue
+            if isinstance(reply, list) and len(reply) == 3 and reply[0] == b'message':
+                await self._deliver(reply[2])
+
+    async def publish(self, topic, message):
+        self.published += 1
+        if self._pub is None:
+            async with self._connect_lock:
+                if self._pub is None:
+                    await self._open_publisher()
+        self._pub.write(_resp_command('PUBLISH', self.channel, encode_envelope(self.origin, topic, message)))
+        await self._pub.drain()
+
+    async def close(self):
+        self._closing = True
+        for task in (self._task, self._pub_task):
+            if task:
+                task.cancel()
+        for writer in (self._pub, self._sub_writer):
+            if writer:
+                writer.close()
+
+def create_backplane(url=None):
+    """Backplane for a BACKPLANE_URL (memory://, unix:///path.sock, redis://host:port/db)"""
+    url = url or BACKPLANE_URL
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return InMemoryBackplane(parsed.netloc or 'default')
+    if parsed.scheme == 'unix':
+        return UnixSocketBackplane(parsed.path)
+    if parsed.scheme == 'redis':
+        # Pub/sub channels are global to the server, so a /db suffix is irrelevant
+        return RedisBackplane(parsed.hostname or 'localhost', parsed.port or 6379, parsed.password)
+    raise ValueError(f"Unsupported backplane URL: {url}")
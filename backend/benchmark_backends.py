@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Detection Backend Benchmark
+Runs every registered detection backend (see detection_backends.py) on the same
+frames and reports per-frame latency and detection rate, to pick the fastest
+backend that still finds the face for a deployment.
+
+    # Recorded frames (image folder, video file or folder of videos)
+    python benchmark_backends.py --frames recordings/
+
+    # Only some backends, including base64 decode cost as seen by the server
+    python benchmark_backends.py --frames recordings/ --backends facemesh yolo --include-decode
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from detection_backends import available_backends, create_backend
+from quantize_face_detector import iter_recorded_frames
+
+def encode_frame(frame, quality=80):
+    """Base64 data URL, as CameraStream.tsx sends it"""
+    ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode('ascii')
+
+def benchmark_backend(name, frames, include_decode=False, warmup=5):
+    backend = create_backend(name)
+    if not backend.available:
+        return {"backend": name, "available": False, "error": "model not available"}
+    run = backend.detect_faces if include_decode else backend.detect
+    inputs = [encode_frame(f) for f in frames] if include_decode else frames
+
+    for item in inputs[:warmup]:
+        run(item)
+
+    latencies = []
+    detected = 0
+    for item in inputs:
+        start = time.perf_counter()
+        result = run(item)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        detected += bool(result.get('faces_detected'))
+    backend.close()
+
+    latencies = np.array(latencies)
+    return {
+        "backend": name,
+        "available": True,
+        "frames": len(inputs),
+        "mean_ms": round(float(latencies.mean()), 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "fps": round(1000.0 / float(latencies.mean()), 1) if latencies.mean() > 0 else None,
+        "detection_rate": round(detected / len(inputs), 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the registered face detection backends")
+    parser.add_argument('--frames', required=True, help="Folder of recorded frames/videos, or a video file")
+    parser.add_argument('--backends', nargs='+', default=None, help=f"Default: all ({', '.join(available_backends())})")
+    parser.add_argument('--max-frames', type=int, default=300)
+    parser.add_argument('--include-decode', action='store_true', help="Time base64 JPEG decode as well")
+    parser.add_argument('--report', default=None, help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    frames = list(iter_recorded_frames(args.frames, limit=args.max_frames))
+    if not frames:
+        print(f"❌ No frames found in {args.frames}")
+        return 1
+
+    report = []
+    for name in args.backends or available_backends():
+        try:
+            report.append(benchmark_backend(name, frames, args.include_decode))
+        except Exception as e:
+            # A backend whose dependencies are missing is reported, not fatal
+            report.append({"backend": name, "error": str(e)})
+
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    timed = [r for r in report if r.get('available') and 'mean_ms' in r]
+    if timed:
+        fastest = min(timed, key=lambda r: r['mean_ms'])
+        print(f"🏁 Fastest: {fastest['backend']} ({fastest['mean_ms']} ms/frame, detection rate {fastest['detection_rate']})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+WebSocket Compression Benchmark
+Replays a few seconds of the server's typical outgoing message mix (status and
+gaze events, detection results, metrics, preview frames) through
+permessage-deflate under several policies and reports server CPU per second
+of traffic against bytes on the wire, plus the link load on constrained
+cellular uplinks. Both server stacks are measured: the websockets extension
+(ws_server.py, per-message policy) and aiohttp's own frame writer
+(movements.py, ws_server_cloud.py) with its shared per-connection compressor.
+
+    python benchmark_compression.py
+    python benchmark_compression.py --thresholds 128 512 2048 --levels 1 6 --seconds 20
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sys
+import time
+
+import cv2
+import numpy as np
+from aiohttp import WSMsgType
+from aiohttp.http import WebSocketWriter
+from websockets.extensions.permessage_deflate import PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+from compression import CompressionPolicy, PolicyPerMessageDeflate
+from json_codec import event_message, face_status_message
+
+# Link profiles in bits per second
+LINKS = {'2G/EDGE': 200_000, '3G': 1_000_000, 'LTE (weak)': 4_000_000}
+
+def _preview_frame(rng, quality=50):
+    """Downscaled JPEG like the preview stream / camera frames send"""
+    image = np.full((240, 320, 3), 90, np.uint8)
+    cv2.circle(image, (160, 120), 70, (150, 170, 200), -1)
+    image = cv2.add(image, rng.integers(0, 25, image.shape, dtype=np.uint8))
+    ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode('ascii')
+
+def message_mix(seed=0):
+    """One second of outgoing messages: (count per second, message factory)"""
+    rng = np.random.default_rng(seed)
+    landmarks = lambda: [[round(float(x), 4), round(float(y), 4)] for x, y in rng.random((40, 2))]
+    return [
+        (5, lambda: face_status_message(True, 1)),
+        (5, lambda: event_message("NOSE_MOVE", {"direction": random.choice(["LEFT", "RIGHT", "UP"]),
+                                                "magnitude": round(random.random(), 3)})),
+        (10, lambda: event_message("GAZE", {"x": round(random.random(), 4), "y": round(random.random(), 4),
+                                            "screen": [random.randint(0, 1920), random.randint(0, 1080)],
+                                            "confidence": round(random.random(), 3)})),
+        (5, lambda: json.dumps({"type": "face_detection_result", "event": "FACE_DETECTED",
+                                "payload": {"faces_detected": True, "face_count": 1, "status": "active",
+                                            "faces": [{"bbox": [0.31, 0.22, 0.4, 0.5], "landmarks": landmarks()}]}})),
+        (1, lambda: event_message("METRICS", {f"stage_{i}_ms": round(random.random() * 20, 2) for i in range(24)})),
+        (0.2, lambda: event_message("SYSTEM_STATUS", {"mode": "WHEELCHAIR", "battery": 85, "signal": "excellent",
+                                                      "connected_clients": 2, "face_detection": True})),
+        (2, lambda: event_message("PREVIEW_FRAME", {"image": _preview_frame(rng), "ear": 0.27})),
+    ]
+
+def build_stream(seconds, seed=0):
+    random.seed(seed)
+    stream = []
+    for second in range(seconds):
+        for rate, factory in message_mix(seed + second):
+            count = int(rate) + (1 if random.random() < rate - int(rate) else 0)
+            stream.extend(factory().encode() for _ in range(count))
+    random.shuffle(stream)
+    return stream
+
+def _frame_header(length):
+    return 2 if length < 126 else 4 if length < 65536 else 10
+
+def run_policy(stream, extension):
+    """Wire bytes and CPU seconds to send the stream through an encoder (None = no deflate)"""
+    wire = 0
+    start = time.process_time()
+    for data in stream:
+        if extension is not None:
+            data = extension.encode(Frame(Opcode.TEXT, data)).data
+        wire += len(data) + _frame_header(len(data))
+    return wire, time.process_time() - start
+
+class _CountingTransport:
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+
+    def is_closing(self):
+        return False
+
+class _Protocol:
+    _paused = False
+
+    async def _drain_helper(self):
+        pass
+
+def run_aiohttp(stream, mode):
+    """Wire bytes and CPU seconds through aiohttp's WebSocketWriter
+
+    mode 'shared': deflate negotiated, every frame through the connection's
+    compressor (what the aiohttp servers do); 'per-message': compress=15
+    override for the messages the default policy selects, a fresh compressor
+    each time; 'off': no deflate.
+    """
+    transport = _CountingTransport()
+    writer = WebSocketWriter(_Protocol(), transport, limit=1 << 40, compress=15 if mode == 'shared' else 0)
+    policy = CompressionPolicy()
+    send = getattr(writer, 'send_frame', None)
+
+    async def replay():
+        for data in stream:
+            compress = 15 if mode == 'per-message' and policy.should_compress(data) else None
+            if send is not None:
+                await send(data, WSMsgType.TEXT, compress)
+            else:  # aiohttp < 3.11
+                await writer.send(data, compress=compress)
+
+    start = time.process_time()
+    asyncio.run(replay())
+    return transport.bytes, time.process_time() - start
+
+def make_extension(policy, level):
+    settings = {'memLevel': 5, 'level': level}
+    if policy is None:
+        return PerMessageDeflate(False, False, 15, 15, settings)
+    extension = PolicyPerMessageDeflate(False, False, 15, 15, settings)
+    extension.policy = policy
+    return extension
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket compression policies on the server message mix")
+    parser.add_argument('--seconds', type=int, default=10, help="Seconds of traffic to replay")
+    parser.add_argument('--thresholds', type=int, nargs='+', default=[128, 512, 1024])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6])
+    args = parser.parse_args(argv)
+
+    stream = build_stream(args.seconds)
+    raw = sum(len(m) for m in stream)
+    print(f"📦 {len(stream)} messages, {raw / args.seconds / 1024:.1f} KiB/s uncompressed")
+
+    variants = [("off", None, None)]
+    for level in args.levels:
+        variants.append((f"deflate all (level {level})", level, None))
+        for threshold in args.thresholds:
+            variants.append((f"policy >= {threshold} B (level {level})", level,
+                             CompressionPolicy(threshold=threshold, level=level)))
+        variants.append((f"policy >= {args.thresholds[0]} B + media (level {level})", level,
+                         CompressionPolicy(threshold=args.thresholds[0], level=level, compress_media=True)))
+
+    measurements = []
+    for name, level, policy in variants:
+        extension = None if level is None else make_extension(policy, level)
+        measurements.append((f"websockets: {name}", *run_policy(stream, extension)))
+    for mode in ('off', 'shared', 'per-message'):
+        measurements.append((f"aiohttp: {mode}", *run_aiohttp(stream, mode)))
+
+    report = []
+    for name, wire, cpu in measurements:
+        per_second = wire / args.seconds
+        row = {
+            "policy": name,
+            "wire_kib_per_s": round(per_second / 1024, 2),
+            "ratio": round(wire / raw, 3),
+            "cpu_ms_per_s": round(cpu / args.seconds * 1000, 3),
+        }
+        for link, bps in LINKS.items():
+            row[f"{link} load %"] = round(per_second * 8 / bps * 100, 1)
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+    for row in report:
+        if row["policy"].endswith(": off"):
+            baseline = row  # each stack against its own uncompressed run
+            continue
+        saved = baseline["wire_kib_per_s"] - row["wire_kib_per_s"]
+        cost = max(row["cpu_ms_per_s"] - baseline["cpu_ms_per_s"], 1e-6)
+        print(f"📉 {row['policy']}: saves {saved:.2f} KiB/s for {cost:.2f} ms CPU/s "
+              f"({saved / cost:.2f} KiB per CPU ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Session Recorder Benchmark
+Times SessionRecorder.record() on synthetic FaceMesh frames and reports the
+per-frame cost against the frame interval, to confirm recording stays well
+under 1% of the frame budget on the deployment hardware.
+
+    python benchmark_session_recorder.py
+    python benchmark_session_recorder.py --frames 20000 --fps 15 --fsync 5
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from face_landmarks import ArrayLandmarks
+from session_recorder import SessionRecorder
+
+def benchmark(frames, fps, fsync_interval, max_frames):
+    points = np.random.default_rng(0).random((478, 3))
+    face = ArrayLandmarks(points)
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = SessionRecorder(tmp, max_frames=max_frames, fsync_interval=fsync_interval)
+        times = np.empty(frames)
+        for i in range(frames):
+            start = time.perf_counter()
+            recorder.record(i / fps, face if i % 10 else None, ear=0.3, nose=(0.01, -0.02),
+                            mode='WHEELCHAIR', direction='LEFT', events=['NOSE_MOVE'] if i % 25 == 0 else [],
+                            process_seconds=0.012, latency_seconds=0.02)
+            times[i] = time.perf_counter() - start
+        start = time.perf_counter()
+        recorder.close()
+        close_seconds = time.perf_counter() - start
+
+    frame_budget = 1.0 / fps
+    return {
+        "frames": frames,
+        "mean_us": round(float(times.mean()) * 1e6, 2),
+        "p99_us": round(float(np.percentile(times, 99)) * 1e6, 2),
+        "max_us": round(float(times.max()) * 1e6, 2),
+        "close_ms": round(close_seconds * 1000, 2),
+        "budget_percent": round(float(times.mean()) / frame_budget * 100, 4),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-frame session recording cost")
+    parser.add_argument('--frames', type=int, default=5000)
+    parser.add_argument('--fps', type=float, default=5.0, help="Frame rate the budget is measured against")
+    parser.add_argument('--fsync', type=float, default=5.0, help="Seconds between flushes (0 = every frame)")
+    parser.add_argument('--max-frames', type=int, default=2000, help="Frames per file (rotation)")
+    args = parser.parse_args(argv)
+
+    report = benchmark(args.frames, args.fps, args.fsync, args.max_frames)
+    print(json.dumps(report, indent=2))
+    if report["budget_percent"] < 1.0:
+        print(f"✅ Recording costs {report['mean_us']} µs/frame ({report['budget_percent']}% of the frame budget)")
+        return 0
+    print(f"❌ Recording costs {report['budget_percent']}% of the frame budget")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# WebSocket permessage-deflate policy
+# JSON status/event traffic compresses 3-10x, which matters on cellular links,
+# but base64 JPEG frames and binary payloads are already entropy-coded and
+# tiny messages cost more CPU (and deflate framing) than they save.
+#
+#   WS_COMPRESSION=on|off        negotiate permessage-deflate at all (default on)
+#   WS_COMPRESS_THRESHOLD=512    only compress text messages of at least this many bytes
+#   WS_COMPRESS_LEVEL=1          zlib level (1 = fastest)
+#   WS_COMPRESS_MEDIA=off        also deflate base64 image messages (see below)
+#
+# websockets servers (ws_server.py) apply the full per-message policy through
+# a permessage-deflate extension. Skipping compression for a message is
+# allowed by RFC 7692: the frame is sent with RSV1 unset and the compressor
+# state is left untouched.
+#
+# aiohttp servers (movements.py, movements_camera.py, ws_server_cloud.py)
+# only use WS_COMPRESSION: aiohttp has no supported per-message opt-out of a
+# negotiated compressor, and its compress= override builds a fresh compressor
+# per message (no context takeover - ~2.4x instead of ~3.4x on METRICS JSON,
+# at twice the CPU). Every data frame goes through the connection's shared
+# compressor at aiohttp's fixed level 1; threshold, level and media settings
+# do not apply there.
+#
+# Raw JPEG does not shrink, but base64 text does by ~25% (Huffman coding
+# undoes the 6-bits-per-char expansion) at ~4x the CPU of the JSON traffic;
+# benchmark_compression.py shows the trade-off for the current message mix on
+# both server stacks.
+
+import os
+
+try:
+    from websockets.extensions.permessage_deflate import (PerMessageDeflate,
+                                                          ServerPerMessageDeflateFactory)
+    from websockets.frames import Opcode
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    # aiohttp-only deployments (movements.py) do not need the websockets package
+    PerMessageDeflate = ServerPerMessageDeflateFactory = object
+    WEBSOCKETS_AVAILABLE = False
+
+# Message kinds that carry images
+MEDIA_MARKERS = ('camera_frame', 'PREVIEW_FRAME', 'VIDEO_FRAME', 'base64,')
+_MEDIA_MARKERS_BYTES = tuple(m.encode() for m in MEDIA_MARKERS)
+# Event names and data-URL prefixes appear within the first bytes of a message
+MEDIA_SCAN_BYTES = 128
+
+class CompressionPolicy:
+    """Per-message compression decision: text, not media, at least `threshold` bytes"""
+
+    def __init__(self, enabled=True, threshold=512, level=1, compress_media=False, compress_binary=False):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.level = level
+        self.compress_media = compress_media
+        self.compress_binary = compress_binary
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.environ.get('WS_COMPRESSION', 'on').lower() not in ('off', '0', 'false', 'none'),
+            threshold=int(os.environ.get('WS_COMPRESS_THRESHOLD', 512)),
+            level=int(os.environ.get('WS_COMPRESS_LEVEL', 1)),
+            compress_media=os.environ.get('WS_COMPRESS_MEDIA', 'off').lower() in ('on', '1', 'true'),
+        )
+
+    def is_media(self, data):
+        head = data[:MEDIA_SCAN_BYTES]
+        markers = MEDIA_MARKERS if isinstance(head, str) else _MEDIA_MARKERS_BYTES
+        if isinstance(head, memoryview):
+            head = bytes(head)
+        return any(marker in head for marker in markers)
+
+    def should_compress(self, data, binary=False):
+        if not self.enabled or len(data) < self.threshold:
+            return False
+        if binary and not self.compress_binary:
+            return False
+        return self.compress_media or not self.is_media(data)
+
+COMPRESSION = CompressionPolicy.from_env()
+
+# --- websockets servers: PerMessageDeflate that leaves skipped frames alone
+
+class PolicyPerMessageDeflate(PerMessageDeflate):
+    """permessage-deflate extension that only compresses messages the policy selects"""
+
+    policy = COMPRESSION
+    _skipping = False  # current fragmented message was sent uncompressed
+
+    def encode(self, frame):
+        if frame.opcode is Opcode.CONT:
+            return frame if self._skipping else super().encode(frame)
+        if frame.opcode is Opcode.TEXT or frame.opcode is Opcode.BINARY:
+            self._skipping = not self.policy.should_compress(frame.data, binary=frame.opcode is Opcode.BINARY)
+            if self._skipping:
+                return frame
+        return super().encode(frame)
+
+class PolicyDeflateFactory(ServerPerMessageDeflateFactory):
+    """Negotiates permessage-deflate like the default factory, with the policy applied per message"""
+
+    def __init__(self, policy=COMPRESSION, **kwargs):
+        kwargs.setdefault('compress_settings', {'memLevel': 5, 'level': policy.level})
+        super().__init__(**kwargs)
+        self.policy = policy
+
+    def process_request_params(self, params, accepted_extensions):
+        response_params, negotiated = super().process_request_params(params, accepted_extensions)
+        extension = PolicyPerMessageDeflate(
+            negotiated.remote_no_context_takeover,
+            negotiated.local_no_context_takeover,
+            negotiated.remote_max_window_bits,
+            negotiated.local_max_window_bits,
+            self.compress_settings,
+        )
+        extension.policy = self.policy
+        return response_params, extension
+
+def server_extensions(policy=COMPRESSION):
+    """`extensions=` for websockets.serve (pass compression=None alongside)"""
+    return [PolicyDeflateFactory(policy)] if policy.enabled and WEBSOCKETS_AVAILABLE else []
+
+# --- aiohttp servers: negotiate deflate, shared per-connection compressor
+
+def aiohttp_compress(policy=COMPRESSION):
+    """`compress=` for web.WebSocketResponse"""
+    return policy.enabled
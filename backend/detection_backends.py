@@ -0,0 +1,361 @@
+# Pluggable face detection backends
+# movements.py (FaceMesh), movements_camera.py (FaceDetection) and the YOLO
+# eye tracker each decoded frames and shaped results their own way. Backends
+# register here under a name and share one interface: a decoded BGR frame in,
+# a result dict with compact NumPy arrays out. The server picks one with
+# DETECTION_BACKEND; benchmark_backends.py times them all on the same frames.
+#
+# Result contract (all backends):
+#   faces_detected, face_count, status  - as the WebSocket payloads always had
+#   image_size  - (width, height)
+#   bbox        - (4,) float array x1, y1, x2, y2 normalized to the frame, or None
+#   points      - (N, 3) float array of normalized landmarks / keypoints, or None
+#   landmarks   - FaceMesh-style landmark list for the blink / nose / gaze
+#                 estimators (empty for backends without a face mesh)
+#   faces       - per-face {"confidence", "bbox": {x, y, width, height}}
+#
+# mediapipe (and torch/ultralytics for 'yolo') are imported on first use, and
+# BackgroundBackend builds the chosen backend in a worker thread so the
+# servers can answer /health while models load. Before reporting ready it runs
+# a few frames of a bundled face photo (warmup_face.jpg, NASA portrait, public
+# domain) through the backend: the first inference calls pay for graph
+# initialization and would otherwise swallow the user's first blinks. The frame
+# must contain a face - FaceMesh only runs its landmark/iris model, the one
+# blink detection depends on, once its detector has found one.
+# detect_faces_async() runs inference on one dedicated thread, so the event
+# loop keeps receiving while a frame is processed and the (not thread-safe)
+# models only ever see one caller at a time.
+
+import asyncio
+import base64
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_buffers import frame_buffer_pool
+from face_landmarks import ArrayLandmarks, landmarks_to_array
+
+log = logging.getLogger("GestureControl")
+
+_mediapipe = None
+_mediapipe_checked = False
+
+def load_mediapipe():
+    """Import mediapipe on first use (several seconds on a Pi); None when not installed"""
+    global _mediapipe, _mediapipe_checked
+    if not _mediapipe_checked:
+        try:
+            import mediapipe
+            _mediapipe = mediapipe
+            log.info(" MediaPipe loaded successfully")
+        except Exception as e:
+            log.error(f" MediaPipe initialization error: {e}")
+        _mediapipe_checked = True
+    return _mediapipe
+
+DEFAULT_BACKEND = os.environ.get('DETECTION_BACKEND', 'facemesh')
+WARMUP_FRAMES = int(os.environ.get('WARMUP_FRAMES', 3))
+WARMUP_IMAGE = os.environ.get('WARMUP_IMAGE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'warmup_face.jpg'))
+
+_BACKENDS = {}
+
+def register_backend(name):
+    """Class decorator adding a DetectionBackend subclass to the registry"""
+    def decorator(cls):
+        cls.name = name
+        _BACKENDS[name] = cls
+        return cls
+    return decorator
+
+def available_backends():
+    return sorted(_BACKENDS)
+
+def create_backend(name=None, **kwargs):
+    """Instantiate a registered backend (default: DETECTION_BACKEND env, else 'facemesh')"""
+    name = name or DEFAULT_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown detection backend '{name}' (available: {', '.join(available_backends())})")
+    log.info(f"🔍 Detection backend: {name}")
+    return _BACKENDS[name](**kwargs)
+
+def decode_frame(image_data):
+    """Decode a base64 (optionally data-URL prefixed) JPEG/PNG into a BGR frame, or None"""
+    img_data = image_data.split(',')[1] if ',' in image_data else image_data
+    img_bytes = base64.b64decode(img_data)
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+def warmup_frames(count, height=480, width=640, path=WARMUP_IMAGE):
+    """The bundled face photo at camera resolution, `count` times, for warm-up runs"""
+    image = cv2.imread(path)
+    if image is None:
+        raise FileNotFoundError(f"Warm-up image not found: {path}")
+    frame = cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR)
+    for _ in range(count):
+        yield frame
+
+def _bbox_dict(bbox):
+    return {"x": float(bbox[0]), "y": float(bbox[1]),
+            "width": float(bbox[2] - bbox[0]), "height": float(bbox[3] - bbox[1])}
+
+class DetectionBackend:
+    """Base class: subclasses implement detect(frame) and set `available`"""
+
+    name = None
+    available = True
+
+    def detect(self, frame):
+        raise NotImplementedError
+
+    def detect_faces(self, image_data):
+        """Decode a base64 frame from the browser and run detect() on it"""
+        if not self.available:
+            return self.unavailable_result()
+        try:
+            image = decode_frame(image_data)
+            if image is None:
+                return {"faces_detected": False, "face_count": 0, "landmarks": [], "error": "Invalid image"}
+            return self.detect(image)
+        except Exception as e:
+            log.error(f"Face detection error: {e}")
+            return {"faces_detected": False, "face_count": 0, "landmarks": [], "error": str(e)}
+
+    def warmup(self, count=WARMUP_FRAMES):
+        """Run face frames through detect() so the first real frames run at steady-state speed
+
+        Returns the last result (None when the backend is unavailable).
+        """
+        if not self.available:
+            return None
+        result = None
+        for frame in warmup_frames(count):
+            result = self.detect(frame)
+        return result
+
+    def close(self):
+        pass
+
+    def unavailable_result(self):
+        """Result when the backend's model could not be loaded"""
+        return {"faces_detected": False, "face_count": 0, "landmarks": [], "status": "unavailable"}
+
+    @staticmethod
+    def _result(image, bbox=None, points=None, landmarks=None, confidence=None):
+        found = bbox is not None
+        return {
+            "faces_detected": found,
+            "face_count": 1 if found else 0,
+            "landmarks": landmarks or [],
+            "bbox": bbox,
+            "points": points,
+            "faces": [{"confidence": confidence, "bbox": _bbox_dict(bbox)}] if found else [],
+            "image_size": (image.shape[1], image.shape[0]),
+            "status": "success"
+        }
+
+    @staticmethod
+    def _simulated():
+        """No model available - keep the demo flow alive with a simulated face"""
+        return {
+            "faces_detected": True,
+            "face_count": 1,
+            "landmarks": [],
+            "bbox": None,
+            "points": None,
+            "faces": [],
+            "status": "simulated",
+            "message": "MediaPipe not available - simulated response"
+        }
+
+@register_backend('facemesh')
+class FaceMeshBackend(DetectionBackend):
+    """Full-frame MediaPipe FaceMesh with iris refinement (blink, nose and gaze control)"""
+
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        self.face_mesh = None
+        mp = load_mediapipe()
+        if mp:
+            try:
+                self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+                    static_image_mode=False,
+                    max_num_faces=1,
+                    refine_landmarks=True,
+                    min_detection_confidence=min_detection_confidence,
+                    min_tracking_confidence=min_tracking_confidence
+                )
+                log.info(" Face mesh model initialized for blink detection")
+            except Exception as e:
+                log.error(f" Failed to initialize face mesh: {e}")
+        else:
+            log.info(" Face mesh disabled - will simulate responses")
+        self.available = self.face_mesh is not None
+
+    def unavailable_result(self):
+        return self._simulated()
+
+    def detect(self, frame):
+        if not self.available:
+            return self._simulated()
+
+        # Convert BGR to RGB for MediaPipe (into a reused buffer, no per-frame allocation)
+        rgb_image = frame_buffer_pool.cvt_color(frame, cv2.COLOR_BGR2RGB)
+        results = self.face_mesh.process(rgb_image)
+        if not results.multi_face_landmarks:
+            return self._result(frame)
+
+        points = landmarks_to_array(results.multi_face_landmarks[0])
+        bbox = np.concatenate((points[:, :2].min(axis=0), points[:, :2].max(axis=0)))
+        return self._result(frame, bbox, points, results.multi_face_landmarks)
+
+    def close(self):
+        if self.face_mesh:
+            self.face_mesh.close()
+
+@register_backend('face_detection')
+class FaceDetectionBackend(DetectionBackend):
+    """MediaPipe short-range FaceDetection: bbox + 6 keypoints, cheapest, presence only"""
+
+    def __init__(self, min_detection_confidence=0.5):
+        self.face_detection = None
+        mp = load_mediapipe()
+        if mp:
+            self.face_detection = mp.solutions.face_detection.FaceDetection(
+                model_selection=0, min_detection_confidence=min_detection_confidence)
+        self.available = self.face_detection is not None
+
+    def detect(self, frame):
+        if not self.available:
+            return self.unavailable_result()
+
+        rgb_image = frame_buffer_pool.cvt_color(frame, cv2.COLOR_BGR2RGB)
+        results = self.face_detection.process(rgb_image)
+        if not results.detections:
+            return self._result(frame)
+
+        detection = max(results.detections, key=lambda d: d.score[0])
+        box = detection.location_data.relative_bounding_box
+        bbox = np.array([box.xmin, box.ymin, box.xmin + box.width, box.ymin + box.height])
+        points = np.array([(k.x, k.y, 0.0) for k in detection.location_data.relative_keypoints])
+        result = self._result(frame, bbox, points, confidence=float(detection.score[0]))
+        result["face_count"] = len(results.detections)
+        return result
+
+    def close(self):
+        if self.face_detection:
+            self.face_detection.close()
+
+@register_backend('yolo')
+class YOLOBackend(DetectionBackend):
+    """YOLOv8 face box, then FaceMesh on the aligned crop (YOLO_FACE_MODEL selects .pt / .onnx)"""
+
+    def __init__(self, model_path=None, face_confidence=0.7):
+        # Heavy dependencies (torch, ultralytics) are only needed when this backend is chosen
+        from yolov8_eye_tracker import YOLOEyeTracker, DEFAULT_FACE_MODEL
+        from model_cache import cached_model
+        # .pt weights run from a cached ONNX/OpenVINO export after the first boot
+        self.tracker = YOLOEyeTracker(cached_model(model_path or DEFAULT_FACE_MODEL), face_confidence)
+
+    def warmup(self, count=WARMUP_FRAMES):
+        # The warm-up photo is already a face crop: if YOLO misses it, still warm
+        # FaceMesh on the whole frame so the landmark model has run before readiness
+        result = None
+        for frame in warmup_frames(count):
+            result = self.detect(frame)
+            if not result["landmarks"]:
+                h, w = frame.shape[:2]
+                points = self.tracker.face_landmark_points(frame, (0, 0, w, h))
+                if points is not None:
+                    result["landmarks"] = [ArrayLandmarks(points)]
+        return result
+
+    def detect(self, frame):
+        faces = self.tracker.detect_faces_yolo(frame)
+        if not faces:
+            return self._result(frame)
+
+        best_face = max(faces, key=lambda face: face['confidence'])
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = best_face['bbox']
+        bbox = np.array([x1 / w, y1 / h, x2 / w, y2 / h])
+        points = self.tracker.face_landmark_points(frame, best_face['bbox'])
+        landmarks = [ArrayLandmarks(points)] if points is not None else []
+        result = self._result(frame, bbox, points, landmarks, float(best_face['confidence']))
+        result["face_count"] = len(faces)
+        return result
+
+class BackgroundBackend:
+    """Stands in for a backend while it is built and warmed up off the event loop
+
+    Until load() finishes, detect_faces() reports no face with status
+    'loading' and `ready` is False; afterwards calls go to the real backend.
+    """
+
+    def __init__(self, name=None, **kwargs):
+        self.name = name or DEFAULT_BACKEND
+        self.kwargs = kwargs
+        self.backend = None
+        self.ready = False
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detect")
+
+    @property
+    def available(self):
+        return self.ready and self.backend.available
+
+    async def load(self, warmup_frames=WARMUP_FRAMES):
+        """Construct and warm up the backend in the default executor; never raises"""
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            self.backend = await loop.run_in_executor(None, lambda: create_backend(self.name, **self.kwargs))
+            loaded = time.perf_counter()
+            self.load_seconds = loaded - start
+            warm = await loop.run_in_executor(None, self.backend.warmup, warmup_frames)
+            self.warmup_seconds = time.perf_counter() - loaded
+            if self.backend.available and not (warm or {}).get("landmarks"):
+                log.warning("⚠️ Warm-up found no face landmarks - the first real frames may still be slow")
+        except Exception as e:
+            self.error = str(e)
+            log.error(f"❌ Detection backend '{self.name}' failed to load: {e}")
+            return
+        self.ready = True
+        log.info(f"✅ Detection backend '{self.name}' ready in {self.load_seconds + self.warmup_seconds:.1f}s "
+                 f"(warm-up {self.warmup_seconds:.1f}s)")
+
+    def detect_faces(self, image_data):
+        if not self.ready:
+            return {"faces_detected": False, "face_count": 0, "landmarks": [], "status": "loading"}
+        return self.backend.detect_faces(image_data)
+
+    async def detect_faces_async(self, image_data):
+        """detect_faces() on the inference thread, leaving the event loop free"""
+        if not self.ready:
+            return self.detect_faces(image_data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.backend.detect_faces, image_data)
+
+    def detect(self, frame):
+        if not self.ready:
+            return {"faces_detected": False, "face_count": 0, "landmarks": [], "status": "loading"}
+        return self.backend.detect(frame)
+
+    def status(self):
+        return {
+            "detection_backend": self.name,
+            "ready": self.ready,
+            "inference_available": self.available,
+            "load_seconds": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 2) if self.warmup_seconds is not None else None,
+            "error": self.error,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self.backend:
+            self.backend.close()
@@ -0,0 +1,161 @@
+# Online per-session EAR threshold calibration
+# The fixed 0.21 / 0.25 thresholds only suit "average" eyes: a user whose resting
+# EAR sits near 0.21 produces phantom blinks, while narrow-eyed users may never
+# cross it. EARCalibrator learns the open and closed EAR levels from the stream
+# with an online two-cluster model and places hysteresis thresholds between them.
+
+import logging
+
+from signal_buffers import RingBuffer
+
+log = logging.getLogger("GestureControl")
+
+class EARCalibrator:
+    """Two-cluster (open / closed) online model of the EAR signal
+
+    Each sample is assigned to the nearer centroid, which then moves towards it
+    by an exponential learning rate, so the model keeps following slow changes
+    (lighting, posture) while a detected level shift triggers a fast re-converge.
+    """
+
+    def __init__(self,
+                 default_close_threshold=0.21,
+                 default_open_threshold=0.25,
+                 warmup_samples=30,
+                 learning_rate=0.02,
+                 closed_learning_rate=0.1,
+                 fast_learning_rate=0.2,
+                 window_size=45):
+        self.default_close_threshold = default_close_threshold
+        self.default_open_threshold = default_open_threshold
+        self.warmup_samples = warmup_samples
+        self.learning_rate = learning_rate
+        self.closed_learning_rate = closed_learning_rate
+        self.fast_learning_rate = fast_learning_rate
+
+        # Threshold placement as fractions of the closed→open gap
+        self.close_fraction = 0.4
+        self.open_fraction = 0.6
+        self.closed_prior_ratio = 0.45  # closed EAR ≈ 45% of open until a blink is observed
+        self.min_hysteresis = 0.01
+        self.noise_margin = 3.0         # close threshold stays this many std below the open level
+
+        # Drift detection on the open level
+        self.drift_sigma = 2.0
+        self.drift_frames = 15
+        self.reconverge_frames = 30
+        self.max_closed_fraction = 0.5  # eyes can't really be "closed" half the window
+
+        self.window = RingBuffer(window_size)
+        self.closed_flags = RingBuffer(window_size)
+        self.reset()
+
+    def reset(self):
+        """Forget the learned model (new session / user)"""
+        self.samples = 0
+        self.open_mean = None
+        self.open_var = 0.0
+        self.closed_mean = None
+        self.closed_samples = 0
+        self.fast_open_mean = None
+        self.drift_count = 0
+        self.reconverge_remaining = 0
+        self.reconverge_count = 0
+        self.window.clear()
+        self.closed_flags.clear()
+
+    @property
+    def is_calibrated(self):
+        return self.samples >= self.warmup_samples
+
+    def _open_rate(self):
+        return self.fast_learning_rate if self.reconverge_remaining > 0 else self.learning_rate
+
+    def _start_reconverge(self, open_level, reason):
+        """Re-seat the model on a new open level and learn fast for a while"""
+        scale = open_level / self.open_mean if self.open_mean else 1.0
+        self.open_mean = open_level
+        self.open_var = max(self.window.var() or 0.0, 1e-6) if self.window.full else self.open_var
+        self.closed_mean = self.closed_mean * scale
+        self.fast_open_mean = open_level
+        self.drift_count = 0
+        self.reconverge_remaining = self.reconverge_frames
+        self.reconverge_count += 1
+        self.closed_flags.clear()
+        log.info(f"👁️ EAR calibration re-converging ({reason}): open level {open_level:.3f}")
+
+    def update(self, ear):
+        """Feed one EAR sample"""
+        self.samples += 1
+        self.window.append(ear)
+
+        if self.open_mean is None:
+            self.open_mean = ear
+            self.fast_open_mean = ear
+            self.closed_mean = ear * self.closed_prior_ratio
+            return
+
+        # Assign to the nearer cluster
+        is_closed = abs(ear - self.closed_mean) < abs(ear - self.open_mean)
+        self.closed_flags.append(1.0 if is_closed else 0.0)
+
+        if is_closed:
+            self.closed_samples += 1
+            self.closed_mean += self.closed_learning_rate * (ear - self.closed_mean)
+        else:
+            rate = self._open_rate()
+            self.open_mean += rate * (ear - self.open_mean)
+            self.fast_open_mean += self.fast_learning_rate * (ear - self.fast_open_mean)
+            # Open-eye noise measured around the fast level, so a level shift
+            # shows up as drift rather than as inflated variance
+            residual = ear - self.fast_open_mean
+            self.open_var += rate * (residual * residual - self.open_var)
+
+            # Until a real closure is seen, keep the closed centroid tied to the open level
+            if self.closed_samples == 0:
+                self.closed_mean = self.open_mean * self.closed_prior_ratio
+
+        if self.reconverge_remaining > 0:
+            self.reconverge_remaining -= 1
+            return
+        if not self.is_calibrated:
+            return
+
+        # Level shift 1: the open level moved away from the slow model
+        open_std = max(self.open_var, 1e-6) ** 0.5
+        if abs(self.fast_open_mean - self.open_mean) > self.drift_sigma * open_std:
+            self.drift_count += 1
+            if self.drift_count >= self.drift_frames:
+                self._start_reconverge(self.fast_open_mean, "open level drift")
+        else:
+            self.drift_count = 0
+
+        # Level shift 2: EAR dropped so far that "closed" dominates the window
+        if self.closed_flags.full and self.closed_flags.mean() > self.max_closed_fraction:
+            self._start_reconverge(self.window.max(), "closed-dominated window")
+
+    def thresholds(self):
+        """(close_threshold, open_threshold) - eyes close below the first, reopen above the second"""
+        if not self.is_calibrated:
+            return self.default_close_threshold, self.default_open_threshold
+
+        gap = self.open_mean - self.closed_mean
+        close_threshold = self.closed_mean + self.close_fraction * gap
+        open_threshold = self.closed_mean + self.open_fraction * gap
+
+        # Keep the close threshold clear of the open-eye noise band
+        open_std = max(self.open_var, 0.0) ** 0.5
+        close_threshold = min(close_threshold, self.open_mean - self.noise_margin * open_std)
+        open_threshold = max(open_threshold, close_threshold + self.min_hysteresis)
+        return close_threshold, open_threshold
+
+    def state(self):
+        close_threshold, open_threshold = self.thresholds()
+        return {
+            "calibrated": self.is_calibrated,
+            "open_ear": self.open_mean,
+            "closed_ear": self.closed_mean,
+            "close_threshold": close_threshold,
+            "open_threshold": open_threshold,
+            "reconverging": self.reconverge_remaining > 0,
+        }
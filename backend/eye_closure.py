@@ -0,0 +1,102 @@
+# Debounced eye-closure state machine
+# A noisy EAR signal crossing a single threshold flips open/closed several times
+# during one real blink. The state machine below uses separate enter/exit
+# thresholds (hysteresis), requires a minimum number of frames in the new state
+# before committing (dwell), and enforces a short refractory period after each
+# reopening. Transition times come from frame capture timestamps.
+
+import logging
+
+log = logging.getLogger("GestureControl")
+
+OPEN = 'OPEN'
+CLOSING = 'CLOSING'   # below the enter threshold, waiting for the close dwell
+CLOSED = 'CLOSED'
+OPENING = 'OPENING'   # above the exit threshold, waiting for the open dwell
+
+class EyeClosureStateMachine:
+    """OPEN → CLOSING → CLOSED → OPENING → OPEN with hysteresis and dwell
+
+    update() returns None, or a transition event:
+        {"transition": "closed", "timestamp": t_closed}
+        {"transition": "opened", "timestamp": t_opened, "duration": t_opened - t_closed}
+    where the timestamps are the capture times of the first frame of each phase.
+    """
+
+    def __init__(self, enter_threshold=0.21, exit_threshold=0.25,
+                 min_close_frames=1, min_open_frames=2, refractory=0.1):
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_close_frames = min_close_frames
+        self.min_open_frames = min_open_frames
+        self.refractory = refractory
+        self.reset()
+
+    def reset(self):
+        self.state = OPEN
+        self.dwell_frames = 0
+        self.phase_start = None    # capture time of the first frame of a pending phase
+        self.closed_at = None
+        self.opened_at = None
+
+    @property
+    def is_closed(self):
+        return self.state in (CLOSED, OPENING)
+
+    def set_thresholds(self, enter_threshold, exit_threshold):
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = max(exit_threshold, enter_threshold)
+
+    def update(self, ear, timestamp):
+        """Feed one EAR sample with its capture timestamp (seconds)"""
+        if self.state == OPEN:
+            if ear < self.enter_threshold:
+                # Debounce: ignore closures starting right after a reopening
+                if self.opened_at is not None and timestamp - self.opened_at < self.refractory:
+                    return None
+                self.state = CLOSING
+                self.phase_start = timestamp
+                self.dwell_frames = 0
+                return self._closing(ear, timestamp)
+            return None
+
+        if self.state == CLOSING:
+            return self._closing(ear, timestamp)
+
+        if self.state == CLOSED:
+            if ear > self.exit_threshold:
+                self.state = OPENING
+                self.phase_start = timestamp
+                self.dwell_frames = 0
+                return self._opening(ear, timestamp)
+            return None
+
+        return self._opening(ear, timestamp)
+
+    def _closing(self, ear, timestamp):
+        if ear >= self.enter_threshold:
+            # Spurious dip - never committed to closed
+            self.state = OPEN
+            return None
+        self.dwell_frames += 1
+        if self.dwell_frames >= self.min_close_frames:
+            self.state = CLOSED
+            self.closed_at = self.phase_start
+            return {"transition": "closed", "timestamp": self.closed_at}
+        return None
+
+    def _opening(self, ear, timestamp):
+        if ear <= self.exit_threshold:
+            # Flicker while still closed - stay closed, keep the original close time
+            self.state = CLOSED
+            return None
+        self.dwell_frames += 1
+        if self.dwell_frames >= self.min_open_frames:
+            self.state = OPEN
+            self.opened_at = self.phase_start
+            return {
+                "transition": "opened",
+                "timestamp": self.opened_at,
+                "duration": self.opened_at - self.closed_at,
+            }
+        return None
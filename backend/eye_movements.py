@@ -0,0 +1,126 @@
+# Streaming fixation / saccade classification for gaze samples
+# Implements the two classic identification algorithms on the gaze ring
+# buffer: I-VT (velocity threshold between consecutive samples) and I-DT
+# (dispersion threshold over a sliding window). Both update in O(1) amortized
+# time per sample - the window centroid and extent come from RingBuffer's
+# running sums and monotonic min/max deques instead of rescanning the window.
+# Output is a stream of fixation events with a one-shot dwell event for
+# dwell-based selection. A gap in the sample stream longer than `max_gap`
+# (face lost, PLACE mode left) ends the fixation at its last sample, so time
+# without gaze samples never counts towards a dwell.
+
+import math
+
+from signal_buffers import RingBuffer
+
+class FixationDetector:
+    """Classify normalized gaze samples into fixations and saccades
+
+    `update(x, y, t)` returns a (possibly empty) list of events:
+      fixation_start  - the gaze has been stable for `min_duration`
+      dwell           - the same fixation reached `dwell_time` (emitted once)
+      fixation_end    - the fixation was broken by a saccade
+    Each event carries the fixation centroid (x, y), its start and duration.
+    """
+
+    def __init__(self, method='idt', velocity_threshold=1.0, dispersion_threshold=0.08,
+                 min_duration=0.1, dwell_time=0.8, window=64, max_gap=None):
+        if method not in ('ivt', 'idt'):
+            raise ValueError(f"Unknown fixation method: {method}")
+        self.method = method
+        self.velocity_threshold = velocity_threshold      # gaze units/s (I-VT)
+        self.dispersion_threshold = dispersion_threshold  # (max-min) x + y, gaze units (I-DT)
+        self.min_duration = min_duration                  # seconds before a fixation is reported
+        self.dwell_time = dwell_time                      # seconds for a dwell selection
+        # Sample gap treated as a break; never below 0.5 s, the frame interval at the slowest advised rate
+        self.max_gap = max_gap if max_gap is not None else max(2 * min_duration, 0.5)
+        self.samples = RingBuffer(window, dims=2)
+        self.times = RingBuffer(window)
+        self.reset()
+
+    def reset(self):
+        self.samples.clear()
+        self.times.clear()
+        self.in_fixation = False
+        self.is_saccade = False
+        self.velocity = 0.0
+        self.fixation_start = None
+        self._dwelled = False
+        self._last = None
+
+    @property
+    def centroid(self):
+        mean = self.samples.mean()
+        return None if mean is None else (float(mean[0]), float(mean[1]))
+
+    def _event(self, kind, timestamp):
+        x, y = self.centroid
+        return {
+            "type": kind,
+            "x": x,
+            "y": y,
+            "start": self.fixation_start,
+            "duration": timestamp - self.fixation_start,
+        }
+
+    def _dispersion_with(self, x, y):
+        """Window dispersion if (x, y) were added - O(1) from the running min/max"""
+        if len(self.samples) == 0:
+            return 0.0
+        low, high = self.samples.min(), self.samples.max()
+        return (max(high[0], x) - min(low[0], x)) + (max(high[1], y) - min(low[1], y))
+
+    def _break(self, timestamp, events):
+        """End the current candidate window (and fixation, if one was reported)"""
+        if self.in_fixation:
+            events.append(self._event("fixation_end", timestamp))
+        self.in_fixation = False
+        self._dwelled = False
+        self.samples.clear()
+        self.times.clear()
+
+    def update(self, x, y, timestamp):
+        events = []
+
+        if self._last is not None:
+            dt = timestamp - self._last[2]
+            if dt <= 0:
+                return events  # duplicate or out-of-order sample
+            if dt > self.max_gap:
+                # Tracking gap: end any fixation at its last sample and start afresh
+                self._break(self._last[2], events)
+                self.velocity = 0.0
+            else:
+                self.velocity = math.hypot(x - self._last[0], y - self._last[1]) / dt
+        self._last = (x, y, timestamp)
+
+        if self.method == 'ivt':
+            self.is_saccade = self.velocity > self.velocity_threshold
+            if self.is_saccade:
+                self._break(timestamp, events)
+                return events
+        else:
+            if self._dispersion_with(x, y) > self.dispersion_threshold:
+                if self.in_fixation:
+                    self._break(timestamp, events)
+                else:
+                    # Slide the candidate window forward until the new sample fits
+                    while len(self.samples) and self._dispersion_with(x, y) > self.dispersion_threshold:
+                        self.samples.popleft()
+                        self.times.popleft()
+            self.is_saccade = len(self.samples) == 0 and self.velocity > self.velocity_threshold
+
+        self.samples.append((x, y))
+        self.times.append(timestamp)
+        if not self.in_fixation:
+            # Candidate starts at its oldest sample (times are increasing, so that is the min)
+            self.fixation_start = self.times.min()
+
+        duration = timestamp - self.fixation_start
+        if not self.in_fixation and duration >= self.min_duration:
+            self.in_fixation = True
+            events.append(self._event("fixation_start", timestamp))
+        if self.in_fixation and not self._dwelled and duration >= self.dwell_time:
+            self._dwelled = True
+            events.append(self._event("dwell", timestamp))
+        return events
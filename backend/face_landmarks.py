@@ -0,0 +1,58 @@
+# MediaPipe FaceMesh landmark indices and compact array conversion
+# Downstream estimators work on small NumPy arrays of the landmarks they need
+# rather than on the 468/478-entry protobuf list.
+
+import numpy as np
+
+NOSE_TIP = 1
+CHIN = 152
+RIGHT_EYE_OUTER = 33     # subject's right eye, image left
+LEFT_EYE_OUTER = 263     # subject's left eye, image right
+RIGHT_MOUTH_CORNER = 61
+LEFT_MOUTH_CORNER = 291
+
+# Fixed subset used for solvePnP head pose
+HEAD_POSE_LANDMARKS = [NOSE_TIP, CHIN, LEFT_EYE_OUTER, RIGHT_EYE_OUTER, LEFT_MOUTH_CORNER, RIGHT_MOUTH_CORNER]
+
+def landmarks_to_array(face_landmarks, indices=None):
+    """(N, 3) float array of normalized x, y, z for the given landmark indices (all if None)"""
+    if isinstance(face_landmarks, ArrayLandmarks):
+        return face_landmarks.points.copy() if indices is None else face_landmarks.points[list(indices)]
+    points = face_landmarks.landmark
+    if indices is None:
+        indices = range(len(points))
+    return np.array([(points[i].x, points[i].y, points[i].z) for i in indices], dtype=np.float64)
+
+class LandmarkPoint:
+    """Single landmark with the FaceMesh attribute interface (x, y, z)"""
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x, y, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+class _PointView:
+    def __init__(self, points):
+        self._points = points
+
+    def __len__(self):
+        return len(self._points)
+
+    def __getitem__(self, index):
+        x, y, z = self._points[index]
+        return LandmarkPoint(float(x), float(y), float(z))
+
+class ArrayLandmarks:
+    """FaceMesh-compatible wrapper (`.landmark[i].x`) around an (N, 3) landmark array
+
+    Lets backends that produce landmarks as arrays (e.g. re-projected from a
+    face crop) feed the same estimators as the native FaceMesh output.
+    """
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float64)
+
+    @property
+    def landmark(self):
+        return _PointView(self.points)
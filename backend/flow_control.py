@@ -0,0 +1,142 @@
+# Camera frame flow control
+# The browser captured a frame every 200 ms whatever the server could handle.
+# On a slow Pi the WebSocket buffer then filled with stale frames and every
+# blink / nose event lagged further behind; on a fast server frames were left
+# on the table. Two parts:
+#
+#   FrameMailbox    single-slot, latest-frame-wins hand-off between the receive
+#                   loop and the frame worker - stale frames are dropped, and
+#                   control messages never wait behind a frame backlog
+#   FlowController  per-client advice (fps, resolution, JPEG quality) from the
+#                   measured processing time, mailbox latency and drops; sent
+#                   to the client as FLOW_CONTROL when it changes
+#
+#   FLOW_MIN_FPS=2  FLOW_MAX_FPS=15  FLOW_TARGET_LATENCY=0.25 (seconds, receive -> result)
+
+import asyncio
+import os
+import time
+
+FLOW_MIN_FPS = float(os.environ.get('FLOW_MIN_FPS', 2.0))
+FLOW_MAX_FPS = float(os.environ.get('FLOW_MAX_FPS', 15.0))
+FLOW_TARGET_LATENCY = float(os.environ.get('FLOW_TARGET_LATENCY', 0.25))
+FLOW_HEARTBEAT = 5.0
+
+# Capture settings from best to cheapest: (width, height, JPEG quality)
+CAPTURE_LADDER = ((640, 480, 0.8), (480, 360, 0.7), (320, 240, 0.6))
+
+class FrameMailbox:
+    """Single-slot mailbox: a newer frame replaces one that was not processed yet"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._frame = None
+        self._received_at = None
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._received_at = self.clock()
+        self.received += 1
+        self._ready.set()
+
+    async def get(self):
+        """(frame, seconds it waited in the mailbox)"""
+        await self._ready.wait()
+        self._ready.clear()
+        frame, self._frame = self._frame, None
+        return frame, self.clock() - self._received_at
+
+class _ClientFlow:
+    def __init__(self, fps):
+        self.fps = fps
+        self.level = 0                # index into CAPTURE_LADDER
+        self.process = None           # EWMA seconds per frame
+        self.latency = None           # EWMA seconds receive -> result
+        self.dropped = 0
+        self.level_changed = None     # time of last resolution/quality change
+        self.sent = None              # last advice sent
+        self.sent_time = None
+
+class FlowController:
+    """Per-client capture advice from processing time, queueing latency and drops"""
+
+    def __init__(self, min_fps=FLOW_MIN_FPS, max_fps=FLOW_MAX_FPS, target_latency=FLOW_TARGET_LATENCY,
+                 initial_fps=5.0, headroom=0.8, smoothing=0.3, level_cooldown=3.0,
+                 heartbeat=FLOW_HEARTBEAT, clock=time.monotonic):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.target_latency = target_latency
+        self.initial_fps = initial_fps
+        self.headroom = headroom          # plan for this fraction of the measured capacity
+        self.smoothing = smoothing
+        self.level_cooldown = level_cooldown
+        self.heartbeat = heartbeat
+        self.clock = clock
+        self._clients = {}
+
+    def _flow(self, client):
+        flow = self._clients.get(client)
+        if flow is None:
+            flow = self._clients[client] = _ClientFlow(self.initial_fps)
+        return flow
+
+    def record(self, client, process_seconds, latency_seconds, dropped=0):
+        """Update a client's advice after one processed frame"""
+        flow = self._flow(client)
+        a = self.smoothing
+        flow.process = process_seconds if flow.process is None else (1 - a) * flow.process + a * process_seconds
+        flow.latency = latency_seconds if flow.latency is None else (1 - a) * flow.latency + a * latency_seconds
+        new_drops = dropped - flow.dropped
+        flow.dropped = dropped
+
+        capacity = self.headroom / max(flow.process, 1e-3)
+        fps = min(capacity, self.max_fps)
+        if flow.latency > self.target_latency:
+            fps *= self.target_latency / flow.latency
+        if new_drops > 0:
+            fps = min(fps, flow.fps * 0.75)  # frames arriving faster than we finish them
+        flow.fps = max(self.min_fps, min(self.max_fps, fps))
+
+        # Cheaper frames when even the minimum rate is barely sustainable, better ones with room to spare
+        now = self.clock()
+        if flow.level_changed is None or now - flow.level_changed >= self.level_cooldown:
+            if capacity < self.min_fps * 1.5 and flow.level < len(CAPTURE_LADDER) - 1:
+                flow.level += 1
+                flow.level_changed = now
+            elif capacity > self.max_fps * 1.5 and flow.level > 0:
+                flow.level -= 1
+                flow.level_changed = now
+
+    def advice(self, client):
+        flow = self._flow(client)
+        width, height, quality = CAPTURE_LADDER[flow.level]
+        return {
+            "fps": round(flow.fps, 1),
+            "width": width,
+            "height": height,
+            "quality": quality,
+            "process_ms": round(flow.process * 1000, 1) if flow.process is not None else None,
+            "latency_ms": round(flow.latency * 1000, 1) if flow.latency is not None else None,
+            "dropped": flow.dropped,
+        }
+
+    def should_send(self, client):
+        """True when the advice changed noticeably since last sent, or on heartbeat"""
+        flow = self._flow(client)
+        now = self.clock()
+        last = flow.sent
+        changed = (last is None or flow.level != last[1]
+                   or abs(flow.fps - last[0]) >= max(1.0, 0.2 * last[0]))
+        if not changed and now - flow.sent_time < self.heartbeat:
+            return False
+        flow.sent = (flow.fps, flow.level)
+        flow.sent_time = now
+        return True
+
+    def forget(self, client):
+        self._clients.pop(client, None)
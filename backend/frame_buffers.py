@@ -0,0 +1,96 @@
+# Reusable frame buffers for the per-frame colour conversion hot path
+# Every processed frame used to allocate a fresh RGB image (full frame in
+# movements.FaceDetector, face crop in YOLOEyeTracker). At 30 fps that is a
+# steady stream of multi-hundred-KB allocations; the pool below hands out
+# preallocated destination arrays keyed by shape so cv2 writes in place.
+#
+# Buffers are per thread: inference (detection thread), preview rendering
+# (preview thread) and backend warm-up each get their own set, so a buffer is
+# only ever overwritten by the next conversion of the same shape on the same
+# thread.
+
+from collections import OrderedDict
+import threading
+
+import cv2
+import numpy as np
+
+class FrameBufferPool:
+    """Size-keyed pool of preallocated uint8 image buffers (LRU bounded, one set per thread)"""
+
+    def __init__(self, max_buffers=8):
+        self.max_buffers = max_buffers
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _buffers(self):
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = OrderedDict()
+        return buffers
+
+    def get(self, shape, dtype=np.uint8):
+        """Return this thread's preallocated buffer of exactly this shape (contents undefined)"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        buffers = self._buffers
+        buf = buffers.get(key)
+        if buf is not None:
+            buffers.move_to_end(key)
+            self.hits += 1
+            return buf
+
+        buf = np.empty(shape, dtype=dtype)
+        buffers[key] = buf
+        self.misses += 1
+        if len(buffers) > self.max_buffers:
+            buffers.popitem(last=False)
+        return buf
+
+    def cvt_color(self, src, code, channels=3):
+        """cv2.cvtColor into a pooled destination buffer (src may be an ROI view)
+
+        The result is reused by the next conversion of the same shape on this
+        thread, so use it (e.g. hand it to FaceMesh.process) before converting
+        another frame.
+        """
+        h, w = src.shape[:2]
+        dst = self.get((h, w, channels), src.dtype)
+        out = cv2.cvtColor(src, code, dst=dst)
+        return out
+
+    def stats(self):
+        """Hit/miss counts for all threads; buffer count for the calling thread"""
+        return {
+            "buffers": len(self._buffers),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self):
+        """Drop the buffers of every thread"""
+        self._local = threading.local()
+
+def align_roi(bbox, frame_shape, align=32):
+    """Clamp a (x1, y1, x2, y2) box to the frame and grow it to multiples of `align`
+
+    Face boxes change size by a few pixels every frame; snapping the crop to a
+    coarse grid keeps the number of distinct buffer shapes (pool keys) small.
+    """
+    frame_h, frame_w = frame_shape[:2]
+    x1, y1, x2, y2 = (int(v) for v in bbox)
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(frame_w, x2), min(frame_h, y2)
+
+    w = -(-(x2 - x1) // align) * align
+    h = -(-(y2 - y1) // align) * align
+    w, h = min(w, frame_w), min(h, frame_h)
+
+    # Grow symmetrically, then shift back inside the frame if we hit an edge
+    x1 = min(max(0, x1 - (w - (x2 - x1)) // 2), frame_w - w)
+    y1 = min(max(0, y1 - (h - (y2 - y1)) // 2), frame_h - h)
+    return x1, y1, x1 + w, y1 + h
+
+# Shared pool for the server process
+frame_buffer_pool = FrameBufferPool()
@@ -0,0 +1,63 @@
+# Iris-based gaze estimation from FaceMesh refine_landmarks output
+# With refine_landmarks=True FaceMesh adds iris landmarks 468-477. The iris
+# centre's position inside each eye opening (between the corners horizontally,
+# between the lids vertically) is a cheap, head-size independent gaze signal.
+# Both eyes are computed together with a handful of NumPy operations.
+
+import numpy as np
+
+RIGHT_IRIS_CENTER = 468   # subject's right eye (image left)
+LEFT_IRIS_CENTER = 473    # subject's left eye (image right)
+
+# Per eye: iris centre, image-left corner, image-right corner, upper lid, lower lid
+GAZE_LANDMARKS = np.array([
+    [RIGHT_IRIS_CENTER, 33, 133, 159, 145],
+    [LEFT_IRIS_CENTER, 362, 263, 386, 374],
+])
+
+class IrisGazeEstimator:
+    """Normalized gaze (x, y) in roughly [-1, 1]; (0, 0) = iris centred in both eyes
+
+    x > 0 when the irises sit towards image +x, y > 0 when they sit towards
+    the lower lid.
+    """
+
+    def __init__(self, vertical_gain=1.0):
+        self.vertical_gain = vertical_gain
+
+    def estimate(self, points):
+        """Gaze from a (2, 5, 2) array of GAZE_LANDMARKS pixel or normalized coords"""
+        iris = points[:, 0]
+        corner_a, corner_b = points[:, 1], points[:, 2]
+        lid_top, lid_bottom = points[:, 3], points[:, 4]
+
+        # Project the iris on the corner→corner and lid→lid axes of each eye
+        horizontal = corner_b - corner_a
+        vertical = lid_bottom - lid_top
+        h_len2 = np.einsum('ij,ij->i', horizontal, horizontal)
+        v_len2 = np.einsum('ij,ij->i', vertical, vertical)
+        if np.any(h_len2 <= 0):
+            return None
+
+        h_ratio = np.einsum('ij,ij->i', iris - corner_a, horizontal) / h_len2
+        # Closed eyes collapse the lid axis - keep the horizontal estimate only
+        v_ratio = np.where(v_len2 > 1e-12,
+                           np.einsum('ij,ij->i', iris - lid_top, vertical) / np.maximum(v_len2, 1e-12),
+                           0.5)
+
+        per_eye = np.stack((h_ratio * 2.0 - 1.0, (v_ratio * 2.0 - 1.0) * self.vertical_gain), axis=1)
+        gaze = per_eye.mean(axis=0)
+        return {
+            "x": float(gaze[0]),
+            "y": float(gaze[1]),
+            "right_eye": (float(per_eye[0, 0]), float(per_eye[0, 1])),
+            "left_eye": (float(per_eye[1, 0]), float(per_eye[1, 1])),
+        }
+
+    def estimate_from_landmarks(self, face_landmarks):
+        """Gaze straight from a FaceMesh landmark list entry (None without iris landmarks)"""
+        landmark = face_landmarks.landmark
+        if len(landmark) <= LEFT_IRIS_CENTER + 4:
+            return None
+        points = np.array([[(landmark[i].x, landmark[i].y) for i in eye] for eye in GAZE_LANDMARKS])
+        return self.estimate(points)
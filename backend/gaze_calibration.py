@@ -0,0 +1,180 @@
+# Gaze-to-screen calibration
+# Normalized iris gaze is not linear in screen position (eye rotation, camera
+# placement, screen distance all differ per user). A calibration shows a few
+# targets, collects the gaze while the user fixates each one, and fits a
+# second-order polynomial mapping with NumPy least squares. The fitted matrix
+# is cached per user on disk; applying it is one small matrix multiply.
+# The reported error is leave-one-out: with the default handful of targets a
+# quadratic fits them (almost) exactly, so the in-sample residual says nothing.
+
+import logging
+import os
+import re
+
+import numpy as np
+
+log = logging.getLogger("GestureControl")
+
+CALIBRATION_DIR = os.environ.get(
+    'GAZE_CALIBRATION_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'gesture-control', 'gaze')
+)
+
+def polynomial_features(gaze, degree=2):
+    """Design matrix rows for gaze points: [1, x, y] or [1, x, y, xy, x², y²]"""
+    gaze = np.atleast_2d(np.asarray(gaze, dtype=np.float64))
+    x, y = gaze[:, 0], gaze[:, 1]
+    columns = [np.ones_like(x), x, y]
+    if degree >= 2:
+        columns += [x * y, x * x, y * y]
+    return np.stack(columns, axis=1)
+
+def _degree_for(count):
+    """Quadratic needs its 6 coefficients determined; affine otherwise"""
+    return 2 if count >= 6 else 1
+
+def _user_path(user_id, directory=None):
+    safe_user = re.sub(r'[^A-Za-z0-9_.-]', '_', str(user_id)) or 'default'
+    return os.path.join(directory or CALIBRATION_DIR, f"{safe_user}.npz")
+
+class GazeMapping:
+    """Fitted gaze→screen polynomial; apply() is a single matrix multiply"""
+
+    def __init__(self, matrix, degree, error=None, screen=None):
+        self.matrix = matrix        # (n_features, 2)
+        self.degree = degree
+        self.error = error          # leave-one-out RMS error in screen pixels (None: too few points)
+        self.screen = screen        # (width, height) the targets were shown on
+
+    @classmethod
+    def fit(cls, gaze_points, screen_points, screen=None):
+        """Least-squares fit; drops to an affine map when there are too few targets"""
+        gaze_points = np.asarray(gaze_points, dtype=np.float64)
+        screen_points = np.asarray(screen_points, dtype=np.float64)
+        if len(gaze_points) < 3:
+            raise ValueError("At least 3 calibration points are needed")
+
+        degree = _degree_for(len(gaze_points))
+        matrix, _, _, _ = np.linalg.lstsq(polynomial_features(gaze_points, degree), screen_points, rcond=None)
+        return cls(matrix, degree, cls.held_out_error(gaze_points, screen_points, degree), screen)
+
+    @staticmethod
+    def held_out_error(gaze_points, screen_points, degree):
+        """Leave-one-out RMS error: each target predicted by a fit on the others"""
+        count = len(gaze_points)
+        if count - 1 < 3:
+            return None
+        # Never fit more coefficients than the remaining targets can determine
+        degree = min(degree, _degree_for(count - 1))
+        errors = []
+        for i in range(count):
+            keep = np.arange(count) != i
+            matrix, _, _, _ = np.linalg.lstsq(polynomial_features(gaze_points[keep], degree),
+                                              screen_points[keep], rcond=None)
+            predicted = polynomial_features(gaze_points[i], degree) @ matrix
+            errors.append(np.sum((predicted[0] - screen_points[i]) ** 2))
+        return float(np.sqrt(np.mean(errors)))
+
+    def apply(self, gaze):
+        """Screen (x, y) for one gaze point, or an (N, 2) array for N points"""
+        gaze = np.asarray(gaze, dtype=np.float64)
+        screen = polynomial_features(gaze, self.degree) @ self.matrix
+        return screen[0] if gaze.ndim == 1 else screen
+
+    def save(self, user_id, directory=None):
+        path = _user_path(user_id, directory)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, matrix=self.matrix, degree=self.degree,
+                 error=np.nan if self.error is None else self.error,
+                 screen=np.array(self.screen if self.screen else (0, 0)))
+        return path
+
+    @classmethod
+    def load(cls, user_id, directory=None):
+        """Cached mapping for a user, or None"""
+        path = _user_path(user_id, directory)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            screen = tuple(int(v) for v in data['screen'])
+            error = float(data['error'])
+            return cls(data['matrix'], int(data['degree']),
+                       None if np.isnan(error) else error,
+                       screen if any(screen) else None)
+
+class GazeCalibrationSession:
+    """Collects fixations on calibration targets streamed over the WebSocket
+
+    Flow: start(user) → set_target(x, y) per shown target → add_gaze() on each
+    frame → finish() fits, caches and returns the mapping.
+    """
+
+    def __init__(self, settle_time=0.3, min_samples=3):
+        self.settle_time = settle_time    # ignore gaze while the eyes move to a new target
+        self.min_samples = min_samples    # per target
+        self.active = False
+        self.user_id = None
+        self.screen = None
+        self.fixations = []
+        self._target = None
+        self.mapping = None               # current mapping (fitted or loaded from cache)
+
+    def load(self, user_id='default'):
+        """Use the cached mapping for a user, if any"""
+        mapping = GazeMapping.load(user_id)
+        if mapping is not None:
+            self.user_id = user_id
+            self.mapping = mapping
+        return mapping
+
+    def start(self, user_id='default', screen=None):
+        self.active = True
+        self.user_id = user_id
+        self.screen = screen
+        self.fixations = []
+        self._target = None
+        log.info(f"👁️ Gaze calibration started for user '{user_id}'")
+
+    def set_target(self, x, y, timestamp=None):
+        """A new target is on screen from `timestamp` (client capture-clock seconds)
+
+        Without a client timestamp the target time is the capture time of
+        the first gaze sample after it, so the settle window never compares
+        the server clock against client frame times.
+        """
+        self._close_target()
+        self._target = {"screen": (float(x), float(y)), "shown_at": timestamp, "samples": []}
+
+    def add_gaze(self, gaze_x, gaze_y, timestamp):
+        if not self.active or self._target is None:
+            return
+        if self._target["shown_at"] is None:
+            self._target["shown_at"] = timestamp
+        if timestamp - self._target["shown_at"] < self.settle_time:
+            return
+        self._target["samples"].append((gaze_x, gaze_y))
+
+    def _close_target(self):
+        target, self._target = self._target, None
+        if target is None:
+            return
+        if len(target["samples"]) < self.min_samples:
+            log.warning(f"👁️ Gaze target {target['screen']} skipped: only {len(target['samples'])} samples")
+            return
+        # Median of the fixation is robust to blinks and stray saccades
+        gaze = np.median(np.asarray(target["samples"]), axis=0)
+        self.fixations.append((gaze, target["screen"]))
+
+    def finish(self, save=True):
+        """Fit the mapping from the collected fixations (and cache it for the user)"""
+        self._close_target()
+        self.active = False
+        gaze_points = [g for g, _ in self.fixations]
+        screen_points = [s for _, s in self.fixations]
+        mapping = GazeMapping.fit(gaze_points, screen_points, self.screen)
+        self.mapping = mapping
+        if save:
+            path = mapping.save(self.user_id)
+            error = "n/a" if mapping.error is None else f"{mapping.error:.1f}px"
+            log.info(f"👁️ Gaze calibration saved to {path} (leave-one-out RMS error {error})")
+        return mapping
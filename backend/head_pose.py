@@ -0,0 +1,109 @@
+# 3-D head pose (yaw, pitch, roll) from FaceMesh landmarks via cv2.solvePnP
+# The normalized nose-tip position mixes rotation with translation: leaning or
+# moving towards the camera shifts it just like turning the head does. Fitting
+# a rigid 3-D face model to six landmarks separates the two. The camera model
+# is cached per frame size and each solve is warm-started from the previous
+# frame's extrinsics, so steady-state cost is a few LM iterations (~0.1 ms).
+
+import math
+
+import cv2
+import numpy as np
+
+from face_landmarks import HEAD_POSE_LANDMARKS, landmarks_to_array
+
+# Generic face model (mm) in camera-aligned axes when looking straight at the
+# camera: x right, y down, z away from the camera; origin at the nose tip.
+# Order matches face_landmarks.HEAD_POSE_LANDMARKS.
+FACE_MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),          # nose tip
+    (0.0, 330.0, 65.0),       # chin
+    (225.0, -170.0, 135.0),   # left eye outer corner (image right)
+    (-225.0, -170.0, 135.0),  # right eye outer corner (image left)
+    (150.0, 150.0, 125.0),    # left mouth corner
+    (-150.0, 150.0, 125.0),   # right mouth corner
+], dtype=np.float64)
+
+class HeadPoseEstimator:
+    """Per-frame yaw / pitch / roll in degrees
+
+    Sign convention follows the nose displacement used by HeadMovementDetector:
+    yaw > 0 when the nose turns towards image +x, pitch > 0 when it tilts
+    down (image +y), roll > 0 for a clockwise tilt in the image.
+    """
+
+    def __init__(self, max_jump_degrees=45.0):
+        self.max_jump_degrees = max_jump_degrees
+        self._camera_size = None
+        self._camera_matrix = None
+        self._dist_coeffs = np.zeros((4, 1))
+        self.reset()
+
+    def reset(self):
+        self._rvec = None
+        self._tvec = None
+        self.last_angles = None
+
+    def _camera(self, width, height):
+        """Pinhole camera approximation, cached per frame size"""
+        if self._camera_size != (width, height):
+            focal = float(width)
+            self._camera_matrix = np.array([
+                [focal, 0.0, width / 2.0],
+                [0.0, focal, height / 2.0],
+                [0.0, 0.0, 1.0],
+            ])
+            self._camera_size = (width, height)
+            self.reset()
+        return self._camera_matrix
+
+    def estimate(self, image_points, width, height):
+        """Head pose from the six HEAD_POSE_LANDMARKS in pixel coordinates"""
+        camera_matrix = self._camera(width, height)
+        image_points = np.ascontiguousarray(image_points, dtype=np.float64).reshape(-1, 1, 2)
+
+        if self._rvec is not None:
+            ok, rvec, tvec = cv2.solvePnP(
+                FACE_MODEL_POINTS, image_points, camera_matrix, self._dist_coeffs,
+                self._rvec, self._tvec, useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE)
+        else:
+            ok, rvec, tvec = cv2.solvePnP(
+                FACE_MODEL_POINTS, image_points, camera_matrix, self._dist_coeffs,
+                flags=cv2.SOLVEPNP_EPNP)
+            if ok:
+                # Refine the closed-form EPnP start with a few LM iterations
+                ok, rvec, tvec = cv2.solvePnP(
+                    FACE_MODEL_POINTS, image_points, camera_matrix, self._dist_coeffs,
+                    rvec, tvec, useExtrinsicGuess=True, flags=cv2.SOLVEPNP_ITERATIVE)
+
+        if not ok or tvec[2, 0] <= 0:
+            self.reset()
+            return None
+
+        angles = self._euler_degrees(rvec)
+
+        # A wild jump means the warm start converged to a bad minimum - cold start next frame
+        if self.last_angles is not None and max(abs(a - b) for a, b in zip(angles, self.last_angles)) > self.max_jump_degrees:
+            self.reset()
+            return None
+
+        self._rvec, self._tvec = rvec, tvec
+        self.last_angles = angles
+        return {"yaw": angles[0], "pitch": angles[1], "roll": angles[2], "distance": float(tvec[2, 0])}
+
+    def estimate_from_landmarks(self, face_landmarks, width, height):
+        """Head pose straight from a FaceMesh landmark list entry"""
+        points = landmarks_to_array(face_landmarks, HEAD_POSE_LANDMARKS)[:, :2]
+        points *= (width, height)
+        return self.estimate(points, width, height)
+
+    @staticmethod
+    def _euler_degrees(rvec):
+        rotation, _ = cv2.Rodrigues(rvec)
+        # R = Rz(roll) · Ry(yaw) · Rx(pitch)
+        yaw = math.asin(max(-1.0, min(1.0, -rotation[2, 0])))
+        pitch = math.atan2(rotation[2, 1], rotation[2, 2])
+        roll = math.atan2(rotation[1, 0], rotation[0, 0])
+        # Nose points along -z: turning it towards +x is a negative rotation about y,
+        # tilting it down (+y) is a positive rotation about x
+        return (-math.degrees(yaw), math.degrees(pitch), math.degrees(roll))
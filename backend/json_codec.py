@@ -0,0 +1,77 @@
+# Fast JSON encode/decode for the WebSocket hot path
+# orjson serializes roughly 5-10x faster than the stdlib and handles NumPy
+# scalars/arrays natively; the stdlib json module is the fallback so the
+# servers still run where orjson is not installed. Event messages are built as
+# a cached '{"event":"X","payload":' prefix plus the serialized payload, and
+# payloads that only take a few values (FACE_STATUS) are serialized once.
+
+import json
+from functools import lru_cache
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _default(obj):
+        # NumPy scalars not covered by OPT_SERIALIZE_NUMPY (e.g. float16)
+        if hasattr(obj, 'item'):
+            return obj.item()
+        raise TypeError
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+
+    loads = orjson.loads
+    CODEC = 'orjson'
+else:
+    def _default(obj):
+        if hasattr(obj, 'tolist'):
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    _encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+    dumps = _encoder.encode
+    loads = json.loads
+    CODEC = 'json'
+
+_event_prefixes = {}
+
+def event_message(event, payload):
+    """Serialized {"event": event, "payload": payload} without building the outer dict"""
+    prefix = _event_prefixes.get(event)
+    if prefix is None:
+        prefix = _event_prefixes[event] = '{"event":' + dumps(event) + ',"payload":'
+    return prefix + dumps(payload) + '}'
+
+@lru_cache(maxsize=32)
+def face_status_message(active, faces):
+    """FACE_STATUS only takes a handful of distinct values - serialize each once"""
+    return dumps({
+        "type": "face_detection_result",
+        "event": "FACE_STATUS",
+        "payload": {"active": active, "faces": faces}
+    })
+
+PONG_MESSAGE = dumps({"type": "pong", "payload": {"status": "ok"}})
+
+async def send_json(ws, message):
+    """ws.send_json with the fast codec (aiohttp and websockets connections)
+
+    Pre-serialized str (or relayed bytes) messages are sent as they are.
+    """
+    text = message if isinstance(message, (str, bytes)) else dumps(message)
+    if not hasattr(ws, 'send_str'):
+        await ws.send(text)
+    elif isinstance(text, bytes):
+        await ws.send_bytes(text)
+    else:
+        await ws.send_str(text)
+
+async def send_event(ws, event, payload):
+    await send_json(ws, event_message(event, payload))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Relay Server Load Test
+Opens many WebSocket connections to ws_server_cloud.py, publishes timestamped
+messages from one of them and measures connection rate, fan-out throughput
+and delivery latency. With --spawn-workers it starts the relay itself with
+each WORKERS count in turn, to check that capacity scales with workers.
+
+    # Against a running relay
+    python load_test_relay.py --url ws://127.0.0.1:5000 --connections 2000
+
+    # Scaling run: 1, 2 and 4 SO_REUSEPORT workers sharing the Unix-socket backplane
+    python load_test_relay.py --spawn-workers 1 2 4 --connections 4000 --client-procs 4
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+def _client_proc(url, connections, messages, rate, publisher, settle, result_queue):
+    """One load generator process: `connections` sockets, optionally the publisher"""
+    import websockets
+
+    async def run():
+        latencies = []
+        received = 0
+        last_receive = None
+        publish_start = None
+        start = time.perf_counter()
+        sockets = []
+        failed = 0
+        for _ in range(connections):
+            try:
+                sockets.append(await websockets.connect(url, ping_interval=None, max_queue=None))
+            except Exception:
+                failed += 1
+        connect_seconds = time.perf_counter() - start
+
+        async def reader(ws):
+            nonlocal received, last_receive
+            try:
+                async for text in ws:
+                    message = json.loads(text)
+                    if message.get('event') == 'LOAD_TEST':
+                        received += 1
+                        last_receive = time.time()
+                        latencies.append(last_receive - message['payload']['sent'])
+            except Exception:
+                pass
+
+        tasks = [asyncio.create_task(reader(ws)) for ws in sockets]
+        await asyncio.sleep(settle)  # let every process finish connecting
+
+        if publisher and sockets:
+            publish_start = time.time()
+            for i in range(messages):
+                await sockets[0].send(json.dumps({"event": "LOAD_TEST", "topic": "metrics",
+                                                  "payload": {"seq": i, "sent": time.time()}}))
+                await asyncio.sleep(1.0 / rate)
+        await asyncio.sleep(settle)
+
+        for ws in sockets:
+            await ws.close()
+        for task in tasks:
+            task.cancel()
+        return {"connected": len(sockets), "failed": failed, "connect_seconds": connect_seconds,
+                "received": received, "latencies": latencies,
+                "publish_start": publish_start, "last_receive": last_receive}
+
+    result_queue.put(asyncio.run(run()))
+
+def run_load(url, connections, messages, rate, client_procs, settle):
+    queue = multiprocessing.Queue()
+    per_proc = max(1, connections // client_procs)
+    procs = [multiprocessing.Process(target=_client_proc,
+                                     args=(url, per_proc, messages, rate, i == 0, settle, queue))
+             for i in range(client_procs)]
+    for proc in procs:
+        proc.start()
+    results = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    connected = sum(r["connected"] for r in results)
+    latencies = np.concatenate([r["latencies"] for r in results]) if any(r["latencies"] for r in results) else np.zeros(1)
+    expected = messages * max(connected - 1, 0)
+    received = sum(r["received"] for r in results)
+    publish_start = min((r["publish_start"] for r in results if r["publish_start"]), default=None)
+    last_receive = max((r["last_receive"] for r in results if r["last_receive"]), default=None)
+    window = (last_receive - publish_start) if publish_start and last_receive else None
+    return {
+        "connections": connected,
+        "failed": sum(r["failed"] for r in results),
+        "connect_rate": round(connected / max(max(r["connect_seconds"] for r in results), 1e-9), 1),
+        "delivered": received,
+        "delivery_ratio": round(received / expected, 4) if expected else None,
+        "deliveries_per_second": round(received / window, 1) if window else None,
+        "p50_latency_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p95_latency_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+def spawn_relay(workers):
+    env = dict(os.environ, WORKERS=str(workers))
+    relay = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__), 'ws_server_cloud.py')],
+                             env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0 + 0.3 * workers)
+    return relay
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the WebSocket relay")
+    parser.add_argument('--url', default='ws://127.0.0.1:5000')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=20.0, help="Published messages per second")
+    parser.add_argument('--client-procs', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--settle', type=float, default=2.0, help="Seconds to wait around the publish phase")
+    parser.add_argument('--spawn-workers', type=int, nargs='+', default=None,
+                        help="Start ws_server_cloud.py with each WORKERS count and load --url")
+    args = parser.parse_args(argv)
+
+    if not args.spawn_workers:
+        print(json.dumps(run_load(args.url, args.connections, args.messages, args.rate,
+                                  args.client_procs, args.settle), indent=2))
+        return 0
+
+    report = []
+    for workers in args.spawn_workers:
+        relay = spawn_relay(workers)
+        try:
+            result = run_load(args.url, args.connections, args.messages,
+                              args.rate, args.client_procs, args.settle)
+        finally:
+            relay.terminate()
+            relay.wait()
+        result["workers"] = workers
+        report.append(result)
+        print(json.dumps(result))
+    # Near-linear scaling: per-worker connection rate and fan-out throughput stay flat
+    base = report[0]
+    for result in report:
+        scale = result["workers"] / base["workers"]
+        connect = result["connect_rate"] / (base["connect_rate"] * scale)
+        fanout = (result["deliveries_per_second"] / (base["deliveries_per_second"] * scale)
+                  if result["deliveries_per_second"] and base["deliveries_per_second"] else float('nan'))
+        print(f"📈 {result['workers']} worker(s): connect efficiency {connect:.2f}, "
+              f"fan-out efficiency {fanout:.2f}, p95 latency {result['p95_latency_ms']} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Persistent cache for exported / optimized detector models
+# Exporting YOLOv8 weights to an inference graph (ONNX, OpenVINO) takes tens of
+# seconds on a Pi but only has to happen once per weights file. The export is
+# stored under MODEL_CACHE_DIR keyed by the weights' name, size and mtime, so
+# later boots load the optimized graph directly and a changed .pt re-exports.
+
+import hashlib
+import importlib.util
+import logging
+import os
+import shutil
+
+log = logging.getLogger("GestureControl")
+
+MODEL_CACHE_DIR = os.environ.get(
+    'MODEL_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'gesture-control', 'models')
+)
+
+# Exported graph suffix per format (OpenVINO exports a directory)
+EXPORT_SUFFIXES = {'onnx': '.onnx', 'openvino': '_openvino_model'}
+
+def default_export_format():
+    """YOLO_EXPORT_FORMAT, else ONNX when onnxruntime can run it, else no export"""
+    configured = os.environ.get('YOLO_EXPORT_FORMAT')
+    if configured:
+        return None if configured == 'none' else configured
+    return 'onnx' if importlib.util.find_spec('onnxruntime') else None
+
+def cache_key(weights, export_format, imgsz):
+    stat = os.stat(weights)
+    digest = hashlib.sha1(f"{os.path.abspath(weights)}:{stat.st_size}:{int(stat.st_mtime)}:{imgsz}".encode()).hexdigest()[:10]
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return f"{stem}-{digest}{EXPORT_SUFFIXES[export_format]}"
+
+def _export_yolo(weights, export_format, imgsz):
+    from ultralytics import YOLO
+    return YOLO(weights).export(format=export_format, imgsz=imgsz, dynamic=False)
+
+def cached_model(weights, export_format='auto', imgsz=640, cache_dir=None, exporter=None):
+    """Path of the optimized export of `weights`, exporting into the cache on first use
+
+    Falls back to the original weights when no export is configured, the weights
+    are not a local .pt file (already exported, or a hub name), or export fails.
+    """
+    if export_format == 'auto':
+        export_format = default_export_format()
+    if not export_format or not weights.endswith('.pt') or not os.path.isfile(weights):
+        return weights
+    if export_format not in EXPORT_SUFFIXES:
+        log.warning(f"⚠️ Unsupported YOLO export format '{export_format}' - using {weights}")
+        return weights
+
+    cache_dir = cache_dir or MODEL_CACHE_DIR
+    cached = os.path.join(cache_dir, cache_key(weights, export_format, imgsz))
+    if os.path.exists(cached):
+        log.info(f"📦 Using cached {export_format} model {cached}")
+        return cached
+
+    try:
+        log.info(f"📦 Exporting {weights} to {export_format} (first boot with these weights)...")
+        exported = (exporter or _export_yolo)(weights, export_format, imgsz)
+        os.makedirs(cache_dir, exist_ok=True)
+        shutil.move(str(exported), cached)
+    except Exception as e:
+        log.warning(f"⚠️ Model export failed ({e}) - using {weights}")
+        return weights
+    log.info(f"✅ Cached {export_format} model at {cached}")
+    return cached
@@ -1,12 +1,31 @@
 import asyncio
-import json
 import logging
-import base64
+import time
 import cv2
 import numpy as np
 from aiohttp import web, WSMsgType
 import os
 
+from signal_buffers import RingBuffer
+from ear_calibration import EARCalibrator
+from eye_closure import EyeClosureStateMachine
+from pose_filters import NosePoseEstimator
+from steering import DifferentialSteering
+from head_pose import HeadPoseEstimator
+from nose_calibration import NeutralPoseTracker
+from gaze import IrisGazeEstimator
+from gaze_calibration import GazeCalibrationSession
+from eye_movements import FixationDetector
+from detection_backends import BackgroundBackend, FaceMeshBackend
+from status_diff import StatusDiff
+from flow_control import FlowController, FrameMailbox
+from preview import PreviewRenderer
+from session_recorder import SessionRecorder
+from pubsub import TopicRouter, parse_topics, topic_for
+from compression import aiohttp_compress
+from json_codec import (PONG_MESSAGE, dumps as json_dumps, event_message, face_status_message,
+                        loads as json_loads, send_event, send_json)
+
 # Try to import RPi.GPIO for motor control
 try:
     import RPi.GPIO as GPIO
@@ -28,29 +47,9 @@ log = logging.getLogger("GestureControl")
 log.info(log_msg)
 print(log_msg)
 
-# Try to import MediaPipe for face detection with robust error handling
-try:
-    import mediapipe as mp
-    mp_face_mesh = mp.solutions.face_mesh
-    mp_face_detection = mp.solutions.face_detection
-    mp_drawing = mp.solutions.drawing_utils
-    mp_drawing_styles = mp.solutions.drawing_styles
-    MEDIAPIPE_AVAILABLE = True
-    print(" MediaPipe loaded successfully")
-    log.info(" MediaPipe loaded successfully")
-except Exception as e:
-    print(f" MediaPipe initialization error: {e}")
-    log.error(f" MediaPipe initialization error: {e}")
-    MEDIAPIPE_AVAILABLE = False
-    mp_face_mesh = None
-    mp_face_detection = None
-    mp_drawing = None
-    mp_drawing_styles = None
-
-if MEDIAPIPE_AVAILABLE:
-    log.info(" Face detection enabled")
-else:
-    log.info(" Running in cloud simulation mode without face detection")
+# MediaPipe / model loading is deferred: the detection backend is built in the
+# background after the server is listening (see load_runtime), so /health
+# answers immediately after a restart and reports "ready" once inference is.
 
 # Connected WebSocket clients
 connected_clients = set()
@@ -154,6 +153,25 @@ class MotorController:
 
     # --------------------------------------------------
 
+    def _drive_side(self, forward_pwm, reverse_pwm, speed):
+        duty = int(max(0, min(60, abs(speed) * 100)))
+        if speed >= 0:
+            forward_pwm.ChangeDutyCycle(duty)
+            reverse_pwm.ChangeDutyCycle(0)
+        else:
+            forward_pwm.ChangeDutyCycle(0)
+            reverse_pwm.ChangeDutyCycle(duty)
+
+    def set_wheel_speeds(self, left, right):
+        """Continuous differential drive: signed wheel speeds in [-1, 1]"""
+        if not self.use_gpio:
+            return
+
+        self._drive_side(self.L_rpwm, self.L_lpwm, left)
+        self._drive_side(self.R_rpwm, self.R_lpwm, right)
+
+    # --------------------------------------------------
+
     def stop(self):
         try:
             self.stop_all()
@@ -166,74 +184,6 @@ class MotorController:
         except:
             pass
 
-class FaceDetector:
-    def __init__(self):
-        self.face_mesh = None
-        if MEDIAPIPE_AVAILABLE and mp_face_mesh:
-            try:
-                self.face_mesh = mp_face_mesh.FaceMesh(
-                    static_image_mode=False,
-                    max_num_faces=1,
-                    refine_landmarks=True,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5
-                )
-                log.info(" Face mesh model initialized for blink detection")
-            except Exception as e:
-                log.error(f" Failed to initialize face mesh: {e}")
-                self.face_mesh = None
-        else:
-            log.info(" Face mesh disabled - will simulate responses")
-    
-    def detect_faces(self, image_data):
-        """Detect faces and extract landmarks for blink detection from base64 image data"""
-        if not MEDIAPIPE_AVAILABLE or not self.face_mesh:
-            # Return simulated response when MediaPipe not available
-            return {
-                "faces_detected": True,  # Simulate face detection for demo
-                "face_count": 1,
-                "landmarks": [],  # Return empty list instead of boolean
-                "status": "simulated",
-                "message": "MediaPipe not available - simulated response"
-            }
-        
-        try:
-            # Decode base64 image (remove data:image/jpeg;base64, prefix)
-            img_data = image_data.split(',')[1] if ',' in image_data else image_data
-            img_bytes = base64.b64decode(img_data)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                return {"faces_detected": False, "face_count": 0, "landmarks": [], "error": "Invalid image"}
-            
-            # Convert BGR to RGB for MediaPipe
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Process the image and find face landmarks
-            results = self.face_mesh.process(rgb_image)
-            
-            face_count = 0
-            landmarks_data = []
-            
-            if results.multi_face_landmarks:
-                face_count = len(results.multi_face_landmarks)
-                landmarks_data = results.multi_face_landmarks
-                
-                # Log successful processing for debugging
-                log.info(f" Processed frame: {face_count} face(s) detected with landmarks")
-            
-            return {
-                "faces_detected": face_count > 0,
-                "face_count": face_count,
-                "landmarks": landmarks_data,  # Return actual landmark data
-                "status": "success"
-            }
-            
-        except Exception as e:
-            log.error(f"Face detection error: {e}")
-            return {"faces_detected": False, "face_count": 0, "landmarks": [], "error": str(e)}
-
 # System state for mode management
 class SystemState:
     def __init__(self):
@@ -242,6 +192,8 @@ class SystemState:
         self.selected_place = None
         self.places = ["Kitchen", "Bedroom", "Living Room", "Restroom"]
         self.place_index = 0
+        # 'discrete' = LEFT/RIGHT/FORWARD/BACKWARD commands, 'continuous' = proportional wheel speeds
+        self.steering_mode = os.environ.get('STEERING_MODE', 'discrete')
         
     def handle_blink(self, blink_type):
         """Handle different blink types and return events to send"""
@@ -351,16 +303,26 @@ class SystemState:
 # Global system state
 system_state = SystemState()
 
-face_detector = FaceDetector()
+FaceDetector = FaceMeshBackend  # former in-module detector, now a registered backend
+face_detector = BackgroundBackend()  # DETECTION_BACKEND: facemesh (default), face_detection, yolo
 
-# Initialize Motor Controller for wheelchair/gesture control
+# Motor Controller for wheelchair/gesture control (initialized by load_runtime)
 motor_controller = None
-try:
-    motor_controller = MotorController()
-    log.info("✅ Motor Controller initialized successfully")
-except Exception as e:
-    log.warning(f"⚠️ Motor Controller initialization failed: {e}")
-    motor_controller = None
+
+def init_motor_controller():
+    global motor_controller
+    try:
+        motor_controller = MotorController()
+        log.info("✅ Motor Controller initialized successfully")
+    except Exception as e:
+        log.warning(f"⚠️ Motor Controller initialization failed: {e}")
+        motor_controller = None
+
+async def load_runtime():
+    """Bring up motors and the detection models after the server is already listening"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, init_motor_controller)
+    await face_detector.load()
 
 # Blink detection logic using eye landmarks
 class BlinkDetector:
@@ -368,20 +330,45 @@ class BlinkDetector:
         self.blink_threshold = 0.25
         self.long_blink_threshold = 2.0  # Increase to 2.0 seconds for long blink
         self.double_blink_window = 4.0   # Increase to 4 seconds between double blinks
+        self.place_blink_timeout = 1.0   # Faster single-blink timeout while navigating places
         
         self.last_blink_time = 0
-        self.blink_cooldown = 0.1  # Reduce cooldown to 0.1 seconds 
+        self.blink_cooldown = 0.1  # Refractory period after eyes reopen (debounce)
         self.pending_first_blink = False
         self.first_blink_time = 0
+        self.last_frame_time = 0  # Capture time of the latest processed frame
         
         # Long blink detection
         self.eyes_closed_start = 0
         self.eyes_currently_closed = False
         
-        # EAR tracking
-        self.ear_history = []
+        # EAR tracking (last 10 frames, with running window statistics)
+        self.ear_history = RingBuffer(10)
         self.ear_threshold = 0.21
         
+        # Per-session threshold learning: eyes close below ear_threshold and
+        # reopen above blink_threshold once the calibrator has warmed up
+        self.calibrator = EARCalibrator(
+            default_close_threshold=self.ear_threshold,
+            default_open_threshold=self.blink_threshold
+        )
+        
+        # Debounced open/closed state machine driven by frame capture timestamps
+        self.closure = EyeClosureStateMachine(
+            enter_threshold=self.ear_threshold,
+            exit_threshold=self.blink_threshold,
+            refractory=self.blink_cooldown
+        )
+        
+    def reset_calibration(self):
+        """Start learning EAR thresholds afresh (new session)"""
+        self.calibrator.reset()
+        self.ear_threshold, self.blink_threshold = self.calibrator.thresholds()
+        self.closure.reset()
+        self.eyes_currently_closed = False
+        self.pending_first_blink = False
+        self.last_frame_time = 0
+        
     def calculate_ear(self, landmarks):
         """Calculate Eye Aspect Ratio from face landmarks"""
         try:
@@ -428,36 +415,56 @@ class BlinkDetector:
             log.error(f"EAR calculation error: {e}")
             return 0.3
         
-    def detect_blink(self, landmarks):
-        """Detect single, double, and long blinks using real eye tracking"""
-        import time
-        current_time = time.time()
-        
+    def detect_blink(self, landmarks, timestamp=None, mode='STOP'):
+        """Detect single, double, and long blinks using real eye tracking
+
+        `timestamp` is the frame's capture time in seconds. All timing (blink
+        duration, double-blink window, PLACE-mode timeout) runs on capture
+        time, so queued-up or replayed frames classify the same as live ones.
+        """
         if not landmarks or len(landmarks) == 0:
             return None
             
         try:
             # Calculate current EAR
             current_ear = self.calculate_ear(landmarks)
+        except Exception as e:
+            log.error(f"Blink detection error: {e}")
+            return None
+            
+        return self.process_ear(current_ear, timestamp, mode)
+        
+    def process_ear(self, current_ear, timestamp=None, mode='STOP'):
+        """Blink state update for one EAR sample captured at `timestamp` (seconds)"""
+        current_time = timestamp if timestamp is not None else time.time()
+        # Never let time run backwards (client clock adjustments, reordered frames)
+        current_time = max(current_time, self.last_frame_time)
+        self.last_frame_time = current_time
             
+        try:
             # Keep a history of EAR values (last 10 frames)
             self.ear_history.append(current_ear)
-            if len(self.ear_history) > 10:
-                self.ear_history.pop(0)
+            
+            # Adapt thresholds to this user's open/closed EAR levels
+            self.calibrator.update(current_ear)
+            self.ear_threshold, self.blink_threshold = self.calibrator.thresholds()
                 
-            # Check if eyes are currently closed
-            eyes_closed = current_ear < self.ear_threshold
+            # Debounced closure state (hysteresis: close below ear_threshold,
+            # only count as reopened above blink_threshold, with min dwell)
+            self.closure.set_thresholds(self.ear_threshold, self.blink_threshold)
+            transition = self.closure.update(current_ear, current_time)
             
-            if eyes_closed and not self.eyes_currently_closed:
+            if transition and transition["transition"] == "closed":
                 # Eyes just closed
                 self.eyes_currently_closed = True
-                self.eyes_closed_start = current_time
+                self.eyes_closed_start = transition["timestamp"]
                 log.info(f" Eyes closed - EAR: {current_ear:.3f}")
                 
-            elif not eyes_closed and self.eyes_currently_closed:
+            elif transition and transition["transition"] == "opened":
                 # Eyes just opened - blink detected
                 self.eyes_currently_closed = False
-                blink_duration = current_time - self.eyes_closed_start
+                blink_duration = transition["duration"]
+                current_time = transition["timestamp"]  # blink ends when the eyes reopened
                 
                 log.info(f" Eyes opened - Blink duration: {blink_duration:.2f}s")
                 
@@ -495,18 +502,15 @@ class BlinkDetector:
                         
             # Check timeout - use shorter timeout in PLACES mode for faster navigation
             elif self.pending_first_blink:
-                # Import system_state to check current mode
-                from __main__ import system_state
-                
                 # Use shorter timeout in PLACES mode (1 second) vs other modes (4 seconds)
-                timeout_window = 1.0 if system_state.current_mode == 'PLACE' else self.double_blink_window
+                timeout_window = self.place_blink_timeout if mode == 'PLACE' else self.double_blink_window
                 
                 if current_time - self.first_blink_time > timeout_window:
                     # Timeout - treat as single blink
                     time_waited = current_time - self.first_blink_time
                     self.pending_first_blink = False
                     self.last_blink_time = current_time
-                    log.info(f"👁️ SINGLE BLINK detected (timeout after {time_waited:.2f}s in {system_state.current_mode} mode)!")
+                    log.info(f"👁️ SINGLE BLINK detected (timeout after {time_waited:.2f}s in {mode} mode)!")
                     return {"type": "single", "timestamp": self.first_blink_time}
                 
         except Exception as e:
@@ -514,38 +518,116 @@ class BlinkDetector:
             
         return None
 
+def client_timestamp(data):
+    """Client-clock time (seconds) of a message's `timestamp` field, or None"""
+    timestamp = data.get('timestamp')
+    if isinstance(timestamp, (int, float)):
+        return timestamp / 1000.0  # browser sends Date.now() in milliseconds
+    return None
+
+def frame_capture_time(data):
+    """Capture time (seconds) of a camera_frame message, falling back to arrival time"""
+    timestamp = client_timestamp(data)
+    return timestamp if timestamp is not None else time.time()
+
 # Head movement detection logic using head pose
 class HeadMovementDetector:
     def __init__(self):
         self.nose_center_x = None  # Dynamic nose center reference
         self.nose_center_y = None  # Dynamic nose center reference
         self.movement_threshold = 0.025  # Sensitivity for nose movement
+        self.release_ratio = 0.7  # Held direction releases below 70% of the threshold (hysteresis)
+        self.velocity_lead = 0.1  # Seconds of velocity look-ahead for faster onsets
         self.last_direction = 'STOP'
         self.last_movement_time = 0
-        self.movement_cooldown = 0.3  # 0.3 second cooldown between movements
+        self.movement_cooldown = 0.0  # Optional min interval; filtering replaces the old 0.3 s cooldown
         self.calibration_frames = 0
         self.calibration_needed = True
         
-    def detect_nose_movement(self, landmarks):
-        """Detect nose movement direction from center reference point"""
+        # One-Euro filtered nose position + velocity, updated on every frame
+        self.pose_estimator = NosePoseEstimator()
+        self.displacement = (0.0, 0.0)  # Latest filtered displacement from center (for continuous steering)
+        
+        # Control source: 'nose' = normalized nose-tip position, 'angles' = solvePnP yaw/pitch
+        # (robust to leaning / moving towards the camera)
+        self.control_source = os.environ.get('HEAD_CONTROL', 'nose')
+        self.head_pose = HeadPoseEstimator()
+        self.angle_threshold = 8.0  # Degrees of yaw/pitch equivalent to movement_threshold
+        self.last_head_pose = None
+        
+        # Background re-centering while the user is confidently at rest
+        self.neutral_tracker = NeutralPoseTracker(movement_threshold=self.movement_threshold)
+        self.calibration_event = None
+        
+    def calibration_state(self):
+        """Current nose-center calibration state for events"""
+        center = None if self.nose_center_x is None else (self.nose_center_x, self.nose_center_y)
+        return self.neutral_tracker.calibration_state(center)
+        
+    def pop_calibration_event(self):
+        """Calibration change since the last call (e.g. a background re-center), or None"""
+        event, self.calibration_event = self.calibration_event, None
+        return event
+        
+    def _classify_direction(self, pred_x, pred_y):
+        """Map predicted displacement to a direction with hysteresis on the held one"""
+        # Camera is mirrored - when user moves left, nose moves right in camera coordinates
+        strength = {
+            'LEFT': pred_x,        # nose appears to move right (positive x)
+            'RIGHT': -pred_x,      # nose appears to move left (negative x)
+            'FORWARD': -pred_y,    # nose moves up (negative y)
+            'BACKWARD': pred_y,    # nose moves down (positive y)
+        }
+        strongest = max(strength, key=strength.get)
+        
+        held = self.last_direction
+        if held in strength and strength[held] > self.movement_threshold * self.release_ratio:
+            # Keep the held direction unless another one is clearly stronger
+            if strongest != held and strength[strongest] > max(self.movement_threshold, strength[held]):
+                return strongest
+            return held
+        
+        if strength[strongest] > self.movement_threshold:
+            return strongest
+        return 'STOP'
+        
+    def _raw_position(self, face_landmarks, image_size):
+        """Per-frame control signal in nose-displacement units"""
+        if self.control_source == 'angles' and image_size:
+            width, height = image_size
+            pose = self.head_pose.estimate_from_landmarks(face_landmarks, width, height)
+            self.last_head_pose = pose
+            if pose is None:
+                return None
+            # Scale angles so angle_threshold degrees maps onto movement_threshold
+            scale = self.movement_threshold / self.angle_threshold
+            return pose['yaw'] * scale, pose['pitch'] * scale
+        
+        # Nose tip landmark (index 1 in MediaPipe Face Mesh)
+        nose_tip = face_landmarks.landmark[1]
+        return nose_tip.x, nose_tip.y
+        
+    def detect_nose_movement(self, landmarks, timestamp=None, image_size=None):
+        """Detect nose movement direction from center reference point
+
+        `timestamp` is the frame's capture time in seconds. The nose position is
+        filtered on every frame; a direction is emitted when the filtered
+        displacement (plus a short velocity look-ahead) changes direction.
+        With control_source 'angles', `image_size` (width, height) is needed
+        and head yaw/pitch replace the nose position.
+        """
         if not landmarks or len(landmarks) == 0:
             return None
             
-        import time
-        current_time = time.time()
-        
-        # Check cooldown
-        if current_time - self.last_movement_time < self.movement_cooldown:
-            return None
+        current_time = timestamp if timestamp is not None else time.time()
             
         try:
-            # Get first face landmarks
-            face_landmarks = landmarks[0].landmark
-            
-            # Nose tip landmark (index 1 in MediaPipe Face Mesh)
-            nose_tip = face_landmarks[1]
-            current_nose_x = nose_tip.x
-            current_nose_y = nose_tip.y
+            # Control position from the first face, One-Euro filtered
+            raw_position = self._raw_position(landmarks[0], image_size)
+            if raw_position is None:
+                return None
+            current_nose_x, current_nose_y = self.pose_estimator.update(raw_position[0], raw_position[1], current_time)
+            velocity_x, velocity_y = self.pose_estimator.velocity
             
             # Initialize or update calibration (auto-calibrate center position)
             if self.calibration_needed or self.nose_center_x is None:
@@ -561,68 +643,69 @@ class HeadMovementDetector:
                     return None  # Don't detect movement during calibration
                 else:
                     self.calibration_needed = False
+                    self.neutral_tracker.reset((self.nose_center_x, self.nose_center_y))
+                    self.calibration_event = self.calibration_state()
                     log.info(f"👃 Nose center calibrated: ({self.nose_center_x:.3f}, {self.nose_center_y:.3f})")
             
-            # Calculate nose displacement from center
+            # Calculate smoothed nose displacement from center
             nose_diff_x = current_nose_x - self.nose_center_x
             nose_diff_y = current_nose_y - self.nose_center_y
+            self.displacement = (nose_diff_x, nose_diff_y)
             
-            direction = None
-            motor_speed = 0.0
-            movement_intensity = 0.0
+            # Look slightly ahead along the filtered velocity so onsets/releases react sooner
+            pred_x = nose_diff_x + velocity_x * self.velocity_lead
+            pred_y = nose_diff_y + velocity_y * self.velocity_lead
             
-            # Detect movement based on nose displacement
-            # Camera is mirrored - when user moves left, nose moves right in camera coordinates
-            # Left movement: user moves left, nose appears to move right (positive x) -> LEFT
-            if nose_diff_x > self.movement_threshold:
-                direction = 'LEFT'
-                motor_speed = min(0.8, abs(nose_diff_x) * 15)  # Scale factor for sensitivity
-                movement_intensity = min(0.9, abs(nose_diff_x) * 20)
-                
-            # Right movement: user moves right, nose appears to move left (negative x) -> RIGHT  
-            elif nose_diff_x < -self.movement_threshold:
-                direction = 'RIGHT'
-                motor_speed = min(0.8, abs(nose_diff_x) * 15)
-                movement_intensity = min(0.9, abs(nose_diff_x) * 20)
-                
-            # Forward movement: nose moves up (negative y displacement)
-            elif nose_diff_y < -self.movement_threshold:
-                direction = 'FORWARD' 
-                motor_speed = min(0.8, abs(nose_diff_y) * 15)
-                movement_intensity = min(0.9, abs(nose_diff_y) * 20)
-                
-            # Backward movement: nose moves down (positive y displacement)
-            elif nose_diff_y > self.movement_threshold:
-                direction = 'BACKWARD'
-                motor_speed = min(0.8, abs(nose_diff_y) * 15) 
-                movement_intensity = min(0.9, abs(nose_diff_y) * 20)
-                
-            # If no significant movement, return STOP
+            direction = self._classify_direction(pred_x, pred_y)
+            
+            # Follow slow posture drift while resting and re-center when confirmed
+            new_center = self.neutral_tracker.update(
+                (current_nose_x, current_nose_y),
+                (velocity_x, velocity_y),
+                (self.nose_center_x, self.nose_center_y),
+                at_rest=(direction == 'STOP' and self.last_direction == 'STOP')
+            )
+            if new_center:
+                log.info(f"👃 Nose center drifted - re-centered to ({new_center[0]:.3f}, {new_center[1]:.3f})")
+                self.nose_center_x, self.nose_center_y = new_center
+                self.calibration_event = self.calibration_state()
+            
+            if direction == self.last_direction:
+                return None  # No change needed
+            
+            # Optional minimum interval between direction changes
+            if 0 <= current_time - self.last_movement_time < self.movement_cooldown:
+                return None
+            
+            if direction in ('LEFT', 'RIGHT'):
+                displacement = abs(nose_diff_x)
+            elif direction in ('FORWARD', 'BACKWARD'):
+                displacement = abs(nose_diff_y)
             else:
-                if self.last_direction != 'STOP':
-                    direction = 'STOP'
-                    motor_speed = 0.0
-                    movement_intensity = 0.0
-                else:
-                    return None  # No change needed
+                displacement = 0.0
+            motor_speed = min(0.8, displacement * 15)  # Scale factor for sensitivity
+            movement_intensity = min(0.9, displacement * 20)
             
-            # Only send if direction changed
-            if direction and direction != self.last_direction:
-                self.last_direction = direction
-                self.last_movement_time = current_time
-                
-                log.info(f" Nose movement: {direction} (Camera coords - dx: {nose_diff_x:.3f}, dy: {nose_diff_y:.3f})")
-                
-                return {
-                    'direction': direction,
-                    'motor_speed': motor_speed,
-                    'movement_intensity': movement_intensity,
-                    'battery_percentage': 85.0,  # Static for demo
-                    'total_distance': 25.5,     # Static for demo
-                    'session_time': int(current_time % 3600),
-                    'nose_center': {'x': self.nose_center_x, 'y': self.nose_center_y},
-                    'current_nose': {'x': current_nose_x, 'y': current_nose_y}
-                }
+            self.last_direction = direction
+            self.last_movement_time = current_time
+            
+            log.info(f" Nose movement: {direction} (Camera coords - dx: {nose_diff_x:.3f}, dy: {nose_diff_y:.3f}, vx: {velocity_x:.3f}, vy: {velocity_y:.3f})")
+            
+            return {
+                'direction': direction,
+                'motor_speed': motor_speed,
+                'movement_intensity': movement_intensity,
+                'battery_percentage': 85.0,  # Static for demo
+                'total_distance': 25.5,     # Static for demo
+                'session_time': int(current_time % 3600),
+                'nose_center': {'x': self.nose_center_x, 'y': self.nose_center_y},
+                'current_nose': {'x': current_nose_x, 'y': current_nose_y},
+                'displacement': {'x': nose_diff_x, 'y': nose_diff_y},
+                'velocity': {'x': velocity_x, 'y': velocity_y},
+                'control_source': self.control_source,
+                'head_pose': self.last_head_pose,
+                'calibration': self.calibration_state()
+            }
                     
         except Exception as e:
             log.error(f"Nose movement detection error: {e}")
@@ -635,97 +718,343 @@ class HeadMovementDetector:
         self.calibration_frames = 0
         self.nose_center_x = None
         self.nose_center_y = None
+        self.pose_estimator.reset()
+        self.head_pose.reset()
+        self.neutral_tracker.reset()
+        self.calibration_event = self.calibration_state()
+        self.displacement = (0.0, 0.0)
         log.info("👃 Nose center recalibration initiated")
 
 blink_detector = BlinkDetector()
 nose_movement_detector = HeadMovementDetector()  # Renamed for clarity but still using HeadMovementDetector class
+steering = DifferentialSteering()
+gaze_estimator = IrisGazeEstimator()  # FaceMesh runs with refine_landmarks=True, so iris points are present
+gaze_calibration = GazeCalibrationSession()
+fixation_detector = FixationDetector(method=os.environ.get('FIXATION_METHOD', 'idt'))
+topic_router = TopicRouter()     # broadcast fan-out by topic (control/status/metrics/video)
+face_status_diff = StatusDiff()  # FACE_STATUS on change or every FACE_STATUS_HEARTBEAT seconds
+flow_controller = FlowController()  # per-client FLOW_CONTROL capture advice (fps, resolution, quality)
+preview_renderer = PreviewRenderer()  # PREVIEW_FRAME for clients subscribed to 'preview'
+session_recorder = SessionRecorder.from_env()  # None unless SESSION_RECORD_DIR is set
+background_tasks = set()  # fire-and-forget tasks, referenced until done so they are not garbage-collected
+
+def spawn(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+def apply_drive():
+    """Push the current continuous-steering wheel speeds to the motors"""
+    if motor_controller:
+        try:
+            motor_controller.set_wheel_speeds(steering.left, steering.right)
+        except Exception as e:
+            log.error(f"Motor control error: {e}")
+    log.info(f"🛞 Drive: left={steering.left:.2f} right={steering.right:.2f}")
+
+def stop_steering():
+    """Bring continuous steering to rest; returns the DRIVE delta, or None if already stopped"""
+    delta = steering.stop()
+    if delta:
+        apply_drive()
+    return delta
+
+# ---------- WebSocket message handlers (dispatched by message type) ----------
+
+async def handle_camera_frame(ws, data):
+    """Process camera frame for face detection; returns (result, sent event names)"""
+    image_data = data.get('image')
+    if not image_data:
+        return None
+    log.info(" Received camera frame for processing")
+    # Inference off the event loop: the receive loop keeps filling the mailbox meanwhile
+    result = await face_detector.detect_faces_async(image_data)
+    emitted = []
+    await process_face_result(ws, data, result, emitted)
+
+    # Annotated debug preview for 'preview' subscribers (rate-limited, rendered off the event loop)
+    if topic_router.subscribers_for('preview') and preview_renderer.due():
+        spawn(publish_preview(image_data, result, preview_overlay()))
+    return result, emitted
+
+async def process_face_result(ws, data, result, emitted):
+    """FACE_STATUS, blink, gaze and nose handling for one detection result; sent event names go to `emitted`"""
+    async def emit(event, payload):
+        emitted.append(event)
+        await send_event(ws, event, payload)
+
+    # Send back face detection results on change / heartbeat (prebuilt - only a few distinct values)
+    face_status = (result['faces_detected'], result['face_count'])
+    if face_status_diff.should_send(ws, face_status):
+        emitted.append("FACE_STATUS")
+        await send_json(ws, face_status_message(*face_status))
+    
+    # Check for blinks if face is detected
+    if not (result['faces_detected'] and result.get('landmarks')):
+        # Face lost: never leave the wheels on the last proportional speed
+        delta = stop_steering()
+        if delta:
+            await emit("DRIVE", delta)
+        return
+    landmarks = result.get('landmarks', [])
+    capture_time = frame_capture_time(data)
+    blink_result = blink_detector.detect_blink(landmarks, capture_time, system_state.current_mode)
+    
+    if blink_result:
+        # Handle different blink types
+        blink_type = blink_result["type"]
+        previous_mode = system_state.current_mode
+        events = system_state.handle_blink(blink_type)
+        if (previous_mode == 'PLACE') != (system_state.current_mode == 'PLACE'):
+            fixation_detector.reset()  # gaze from before / outside PLACE must not count towards a dwell
+        
+        # Send all events
+        for event in events:
+            emitted.append(event['event'])
+            await send_json(ws, event)
+            log.info(f" Sent event: {event['event']} - {event['payload']}")
+    
+    # Iris gaze while choosing a place (complements blink navigation)
+    # or while a gaze calibration is collecting fixations
+    if system_state.current_mode == 'PLACE' or gaze_calibration.active:
+        gaze = gaze_estimator.estimate_from_landmarks(landmarks[0])
+        if gaze and gaze_calibration.active:
+            gaze_calibration.add_gaze(gaze['x'], gaze['y'], capture_time)
+        if gaze and system_state.current_mode == 'PLACE':
+            # Every frame has a gaze point: only stream it to clients that subscribed to 'gaze'
+            if ws in topic_router.subscribers_for('gaze'):
+                gaze_payload = {"x": gaze['x'], "y": gaze['y']}
+                if gaze_calibration.mapping:
+                    screen_x, screen_y = gaze_calibration.mapping.apply((gaze['x'], gaze['y']))
+                    gaze_payload["screen"] = {"x": float(screen_x), "y": float(screen_y)}
+                await emit("GAZE", gaze_payload)
+            # Fixation start / dwell / end for dwell-based selection
+            for fixation in fixation_detector.update(gaze['x'], gaze['y'], capture_time):
+                if gaze_calibration.mapping:
+                    screen_x, screen_y = gaze_calibration.mapping.apply((fixation['x'], fixation['y']))
+                    fixation["screen"] = {"x": float(screen_x), "y": float(screen_y)}
+                await emit("FIXATION", fixation)
+    
+    # Check for nose movements when in WHEELCHAIR mode
+    if system_state.current_mode == 'WHEELCHAIR':
+        nose_movement = nose_movement_detector.detect_nose_movement(landmarks, capture_time, result.get('image_size'))
+        continuous = system_state.steering_mode == 'continuous'
+        calibration_event = nose_movement_detector.pop_calibration_event()
+        if calibration_event:
+            await emit("NOSE_CALIBRATION", calibration_event)
+        if nose_movement:
+            await emit("NOSE_MOVE", nose_movement)
+            log.info(f"👃 Nose movement: {nose_movement['direction']} - Speed: {nose_movement['motor_speed']:.2f}")
+            
+            # Send command to motors (discrete mode)
+            if motor_controller and not continuous:
+                try:
+                    direction = nose_movement.get('direction', 'STOP')
+                    intensity = nose_movement.get('movement_intensity', 0.0)
+                    motor_controller.send_command(direction, intensity)
+                except Exception as e:
+                    log.error(f"Motor control error: {e}")
+        
+        # Continuous mode: proportional wheel speeds as compact deltas
+        if continuous and not nose_movement_detector.calibration_needed:
+            dx, dy = nose_movement_detector.displacement
+            delta = steering.update(dx, dy, capture_time)
+            if delta:
+                apply_drive()
+                await emit("DRIVE", delta)
+    
+    # Leaving WHEELCHAIR mode always brings the wheels to rest
+    else:
+        delta = stop_steering()
+        if delta:
+            await emit("DRIVE", delta)
+
+def preview_overlay():
+    """Snapshot of the values the preview annotates (taken on the event loop)"""
+    nose = nose_movement_detector
+    return {
+        "mode": system_state.current_mode,
+        "ear": blink_detector.ear_history.last(),
+        "ear_threshold": blink_detector.ear_threshold,
+        "nose_center": (nose.nose_center_x, nose.nose_center_y),
+        "control_source": nose.control_source,
+        "direction": nose.last_direction,
+    }
+
+async def publish_preview(image_data, result, overlay):
+    global connected_clients
+    try:
+        image = await preview_renderer.render(image_data, result, overlay)
+    except Exception as e:
+        log.error(f"❌ Preview render error: {e}")
+        return
+    if image:
+        message = event_message("PREVIEW_FRAME", {"image": image, "ear": overlay["ear"], "mode": overlay["mode"]})
+        connected_clients -= set(await topic_router.publish('preview', message))
+
+async def handle_set_steering_mode(ws, data):
+    mode = (data.get('payload') or {}).get('mode', data.get('mode'))
+    if mode in ('discrete', 'continuous'):
+        system_state.steering_mode = mode
+        delta = stop_steering()
+        if motor_controller:
+            motor_controller.send_command('STOP', 0.0)
+        if delta:
+            await send_event(ws, "DRIVE", delta)
+        log.info(f"🛞 Steering mode: {mode}")
+    await send_event(ws, "STEERING_MODE", {"mode": system_state.steering_mode})
+
+async def handle_gaze_calibration_start(ws, data):
+    """Multi-point gaze calibration: START → POINT (per target) → FINISH"""
+    payload = data.get('payload') or {}
+    screen = payload.get('screen') or {}
+    gaze_calibration.start(
+        payload.get('user', 'default'),
+        (screen.get('width'), screen.get('height')) if screen else None
+    )
+    await send_event(ws, "GAZE_CALIBRATION", {"status": "started", "user": gaze_calibration.user_id})
+
+async def handle_gaze_calibration_point(ws, data):
+    """Target shown at screen (x, y); fixation samples are collected from the next frames
+
+    The settle window starts at the client `timestamp` when sent, else at the
+    next frame's capture time - never at server time, which is on another clock.
+    """
+    payload = data.get('payload') or {}
+    gaze_calibration.set_target(payload.get('x', 0), payload.get('y', 0), client_timestamp(data))
+    await send_event(ws, "GAZE_CALIBRATION",
+                     {"status": "collecting", "target": {"x": payload.get('x', 0), "y": payload.get('y', 0)}})
+
+async def handle_gaze_calibration_finish(ws, data):
+    try:
+        mapping = gaze_calibration.finish()
+        await send_event(ws, "GAZE_CALIBRATED", {
+            "user": gaze_calibration.user_id,
+            "points": len(gaze_calibration.fixations),
+            "degree": mapping.degree,
+            "error_px": mapping.error
+        })
+    except ValueError as e:
+        await send_event(ws, "ERROR", {"message": f"Gaze calibration failed: {e}"})
+
+async def handle_gaze_calibration_load(ws, data):
+    user = (data.get('payload') or {}).get('user', 'default')
+    mapping = gaze_calibration.load(user)
+    if mapping:
+        await send_event(ws, "GAZE_CALIBRATED", {"user": user, "degree": mapping.degree, "error_px": mapping.error})
+    else:
+        await send_event(ws, "GAZE_CALIBRATION", {"status": "not_found", "user": user})
+
+async def handle_subscribe_face_status(ws, data):
+    """{"mode": "full"} streams FACE_STATUS for every frame (debugging), "changes" is the default"""
+    mode = (data.get('payload') or {}).get('mode', 'changes')
+    face_status_diff.set_full_rate(ws, mode == 'full')
+    await send_event(ws, "FACE_STATUS_SUBSCRIPTION", {
+        "mode": "full" if mode == 'full' else "changes",
+        "heartbeat": face_status_diff.heartbeat
+    })
+
+async def handle_subscribe(ws, data):
+    """Limit broadcasts to this client to the requested topics"""
+    topics = topic_router.subscribe(ws, parse_topics(data))
+    await send_event(ws, "SUBSCRIBED", {"topics": topics})
+
+async def handle_ping(ws, data):
+    # Keep connection alive
+    await send_json(ws, PONG_MESSAGE)
+
+async def handle_calibrate_nose(ws, data):
+    # Handle nose center calibration request
+    nose_movement_detector.recalibrate_center()
+    await send_event(ws, "CALIBRATED_NOSE", {
+        "message": "Nose center calibration started",
+        "status": "calibrating"
+    })
+    log.info(" Nose center calibration requested and initiated")
+    await send_event(ws, "CALIBRATED", {"status": "calibrated"})
+
+def record_frame(data, result, emitted, elapsed, latency, advised):
+    """Append the frame's compact state to the session log (SESSION_RECORD_DIR)"""
+    landmarks = result.get('landmarks') or []
+    face = landmarks[0] if result.get('faces_detected') and landmarks else None
+    try:
+        session_recorder.record(
+            frame_capture_time(data), face,
+            ear=blink_detector.ear_history.last() if face is not None else None,
+            nose=nose_movement_detector.displacement,
+            mode=system_state.current_mode,
+            direction=nose_movement_detector.last_direction,
+            events=(emitted + ["FLOW_CONTROL"]) if advised else emitted,
+            process_seconds=elapsed, latency_seconds=latency)
+    except Exception as e:
+        log.error(f"❌ Session recording error: {e}")
+
+async def frame_worker(ws, mailbox):
+    """Process a client's camera frames, latest first, and advise it on the sustainable rate"""
+    while True:
+        data, waited = await mailbox.get()
+        start = time.perf_counter()
+        outcome = None
+        try:
+            outcome = await handle_camera_frame(ws, data)
+        except Exception as e:
+            log.error(f"❌ Frame processing error: {e}")
+        elapsed = time.perf_counter() - start
+        flow_controller.record(ws, elapsed, waited + elapsed, mailbox.dropped)
+        advise = flow_controller.should_send(ws)
+        if advise:
+            await send_event(ws, "FLOW_CONTROL", flow_controller.advice(ws))
+        if session_recorder and outcome:
+            record_frame(data, *outcome, elapsed, waited + elapsed, advise)
+
+# Message type → handler; anything else is broadcast to the other clients
+# (camera_frame goes through the client's FrameMailbox to frame_worker instead)
+MESSAGE_HANDLERS = {
+    'SET_STEERING_MODE': handle_set_steering_mode,
+    'GAZE_CALIBRATION_START': handle_gaze_calibration_start,
+    'GAZE_CALIBRATION_POINT': handle_gaze_calibration_point,
+    'GAZE_CALIBRATION_FINISH': handle_gaze_calibration_finish,
+    'GAZE_CALIBRATION_LOAD': handle_gaze_calibration_load,
+    'SUBSCRIBE': handle_subscribe,
+    'SUBSCRIBE_FACE_STATUS': handle_subscribe_face_status,
+    'ping': handle_ping,
+    'CALIBRATE': handle_calibrate_nose,
+    'CALIBRATE_NOSE': handle_calibrate_nose,
+}
 
 async def websocket_handler(request):
-    ws = web.WebSocketResponse()
+    ws = web.WebSocketResponse(compress=aiohttp_compress())
     await ws.prepare(request)
     
+    # First client of a new session: relearn this user's EAR thresholds and drop
+    # stale dwell progress (a dashboard joining mid-session must not reset either)
+    if not connected_clients:
+        blink_detector.reset_calibration()
+        fixation_detector.reset()
+    
     connected_clients.add(ws)
+    topic_router.add(ws)  # every topic until the client sends SUBSCRIBE
     log.info(f"✅ WebSocket client connected. Total clients: {len(connected_clients)}")
 
+    # Frames go through a latest-frame-wins mailbox so a backlog never delays control messages
+    mailbox = FrameMailbox()
+    worker = asyncio.create_task(frame_worker(ws, mailbox))
+    flow_controller.should_send(ws)
+    await send_event(ws, "FLOW_CONTROL", flow_controller.advice(ws))
+
     try:
         async for msg in ws:
             if msg.type == WSMsgType.TEXT:
-                data = json.loads(msg.data)
-                msg_type = data.get('type', data.get('event'))
+                data = json_loads(msg.data)
+                msg_type = data.get('type') or data.get('event')
                 
                 if msg_type == 'camera_frame':
-                    # Process camera frame for face detection
-                    image_data = data.get('image')
-                    if image_data:
-                        log.info(" Received camera frame for processing")
-                        result = face_detector.detect_faces(image_data)
-                        
-                        # Send back face detection results
-                        await ws.send_json({
-                            "type": "face_detection_result",
-                            "event": "FACE_STATUS",
-                            "payload": {
-                                "active": result['faces_detected'],
-                                "faces": result['face_count']
-                            }
-                        })
-                        
-                        # Check for blinks if face is detected
-                        if result['faces_detected'] and result.get('landmarks'):
-                            landmarks = result.get('landmarks', [])
-                            blink_result = blink_detector.detect_blink(landmarks)
-                            
-                            if blink_result:
-                                # Handle different blink types
-                                blink_type = blink_result["type"]
-                                events = system_state.handle_blink(blink_type)
-                                
-                                # Send all events
-                                for event in events:
-                                    await ws.send_json(event)
-                                    log.info(f" Sent event: {event['event']} - {event['payload']}")
-                            
-                            # Check for nose movements when in WHEELCHAIR mode
-                            if system_state.current_mode == 'WHEELCHAIR':
-                                nose_movement = nose_movement_detector.detect_nose_movement(landmarks)
-                                if nose_movement:
-                                    await ws.send_json({
-                                        "event": "NOSE_MOVE",
-                                        "payload": nose_movement
-                                    })
-                                    log.info(f"👃 Nose movement: {nose_movement['direction']} - Speed: {nose_movement['motor_speed']:.2f}")
-                                    
-                                    # Send command to motors
-                                    if motor_controller:
-                                        try:
-                                            direction = nose_movement.get('direction', 'STOP')
-                                            intensity = nose_movement.get('movement_intensity', 0.0)
-                                            motor_controller.send_command(direction, intensity)
-                                        except Exception as e:
-                                            log.error(f"Motor control error: {e}")
-                
-                elif msg_type == 'ping':
-                    # Keep connection alive
-                    await ws.send_json({
-                        "type": "pong",
-                        "payload": {"status": "ok"}
-                    })
-                
-                elif msg_type == 'CALIBRATE' or msg_type == 'CALIBRATE_NOSE':
-                    # Handle nose center calibration request
-                    nose_movement_detector.recalibrate_center()
-                    await ws.send_json({
-                        "event": "CALIBRATED_NOSE",
-                        "payload": {
-                            "message": "Nose center calibration started",
-                            "status": "calibrating"
-                        }
-                    })
-                    log.info(" Nose center calibration requested and initiated")
-                    await ws.send_json({
-                        "event": "CALIBRATED",
-                        "payload": {"status": "calibrated"}
-                    })
+                    mailbox.put(data)
+                    continue
+                handler = MESSAGE_HANDLERS.get(msg_type)
+                if handler:
+                    await handler(ws, data)
                 
                 # Broadcast other messages to all clients
                 else:
@@ -740,6 +1069,7 @@ async def websocket_handler(request):
 
     finally:
         # Stop motors when client disconnects
+        steering.reset()
         if motor_controller:
             try:
                 motor_controller.send_command('STOP', 0.0)
@@ -748,36 +1078,34 @@ async def websocket_handler(request):
                 log.error(f"Error stopping motors: {e}")
         
         connected_clients.discard(ws)
+        topic_router.remove(ws)
+        face_status_diff.forget(ws)
+        worker.cancel()
+        flow_controller.forget(ws)
         log.info(f"🔌 WebSocket client disconnected. Remaining: {len(connected_clients)}")
 
     return ws
 
 async def broadcast_message(data, exclude=None):
-    """Broadcast message to all connected clients except the sender"""
+    """Send a message to the other clients subscribed to its topic"""
     global connected_clients
     if not connected_clients:
         return
     
-    dead_clients = set()
-    for client in connected_clients:
-        if client == exclude:
-            continue
-        try:
-            await client.send_json(data)
-        except Exception:
-            dead_clients.add(client)
+    dead_clients = await topic_router.publish(topic_for(data), data, exclude=exclude)
     
     # Remove dead clients
-    connected_clients -= dead_clients
+    connected_clients -= set(dead_clients)
 
 async def health_check(request):
     return web.json_response({
         "status": "healthy",
         "service": "gesture-control-backend-camera",
         "clients": len(connected_clients),
-        "mediapipe_available": MEDIAPIPE_AVAILABLE,
+        "mediapipe_available": face_detector.available,
+        **face_detector.status(),
         "features": ["face_detection", "websocket_communication", "camera_processing"]
-    })
+    }, dumps=json_dumps)
 
 # Background status broadcaster
 async def status_broadcaster():
@@ -792,16 +1120,23 @@ async def status_broadcaster():
                     "battery": 85,
                     "signal": "excellent",
                     "connected_clients": len(connected_clients),
-                    "face_detection": MEDIAPIPE_AVAILABLE
+                    "face_detection": face_detector.available
                 }
             }
-            dead_clients = set()
-            for ws in connected_clients:
-                try:
-                    await ws.send_json(message)
-                except:
-                    dead_clients.add(ws)
-            connected_clients -= dead_clients
+            dead_clients = await topic_router.publish('status', message)
+            connected_clients -= set(dead_clients)
+
+# Continuous-steering watchdog: frames stalled without a disconnect
+async def steering_watchdog(poll=0.1):
+    global connected_clients
+    while True:
+        await asyncio.sleep(poll)
+        if steering.expired():
+            log.warning(f"🛑 No steering update for {steering.watchdog_timeout:.2f}s - stopping wheels")
+            delta = stop_steering()
+            if delta and connected_clients:
+                dead_clients = await topic_router.publish('control', event_message("DRIVE", delta))
+                connected_clients -= set(dead_clients)
 
 # Create the web application
 app = web.Application()
@@ -818,10 +1153,14 @@ async def main():
     log.info(f" Gesture Control Server started on http://{HOST}:{PORT}")
     log.info(f" WebSocket endpoint: ws://{HOST}:{PORT}/ws")
     log.info(f"  Health check: http://{HOST}:{PORT}/health")
-    log.info(f" Camera processing: {' Enabled' if MEDIAPIPE_AVAILABLE else ' Disabled'}")
+    log.info(f" Camera processing: loading '{face_detector.name}' backend in the background")
+    
+    # Models and motors load while /health already answers (ready=false until done)
+    spawn(load_runtime())
     
     # Start background status broadcaster
-    asyncio.create_task(status_broadcaster())
+    spawn(status_broadcaster())
+    spawn(steering_watchdog())
     
     # Keep server running
     try:
@@ -836,6 +1175,9 @@ async def main():
                 log.info("✅ Motor controller cleaned up")
             except Exception as e:
                 log.error(f"Error cleaning up motor controller: {e}")
+        # Shrink the session log to the frames written (a crash leaves rows load_session() skips)
+        if session_recorder:
+            session_recorder.close()
         
         await runner.cleanup()
 
@@ -1,12 +1,15 @@
 import asyncio
 import json
 import logging
-import base64
 import cv2
 import numpy as np
 from aiohttp import web, WSMsgType
 import os
 
+from detection_backends import BackgroundBackend
+from compression import aiohttp_compress
+from json_codec import send_json
+
 # Cloud configuration
 PORT = int(os.environ.get('PORT', 10000))
 HOST = '0.0.0.0'
@@ -14,82 +17,14 @@ HOST = '0.0.0.0'
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("GestureControl")
 
-# Try to import MediaPipe for face detection
-try:
-    import mediapipe as mp
-    mp_face_detection = mp.solutions.face_detection
-    mp_drawing = mp.solutions.drawing_utils
-    MEDIAPIPE_AVAILABLE = True
-    log.info("✅ MediaPipe loaded for face detection")
-except ImportError:
-    MEDIAPIPE_AVAILABLE = False
-    log.warning("❌ MediaPipe not available - running without face detection")
-
 # Connected WebSocket clients
 connected_clients = set()
 
-class FaceDetector:
-    def __init__(self):
-        if MEDIAPIPE_AVAILABLE:
-            self.face_detection = mp_face_detection.FaceDetection(
-                model_selection=0, min_detection_confidence=0.5)
-        else:
-            self.face_detection = None
-    
-    def detect_faces(self, image_data):
-        """Detect faces in base64 image data from browser"""
-        if not MEDIAPIPE_AVAILABLE or not self.face_detection:
-            return {"faces_detected": False, "face_count": 0}
-        
-        try:
-            # Decode base64 image (remove data:image/jpeg;base64, prefix)
-            img_data = image_data.split(',')[1] if ',' in image_data else image_data
-            img_bytes = base64.b64decode(img_data)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                return {"faces_detected": False, "face_count": 0, "error": "Invalid image"}
-            
-            # Convert BGR to RGB for MediaPipe
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Process the image and find faces
-            results = self.face_detection.process(rgb_image)
-            
-            face_count = 0
-            faces_info = []
-            
-            if results.detections:
-                face_count = len(results.detections)
-                for detection in results.detections:
-                    # Get bounding box
-                    bbox = detection.location_data.relative_bounding_box
-                    faces_info.append({
-                        "confidence": detection.score[0],
-                        "bbox": {
-                            "x": bbox.xmin,
-                            "y": bbox.ymin, 
-                            "width": bbox.width,
-                            "height": bbox.height
-                        }
-                    })
-            
-            return {
-                "faces_detected": face_count > 0,
-                "face_count": face_count,
-                "faces": faces_info,
-                "status": "success"
-            }
-            
-        except Exception as e:
-            log.error(f"Face detection error: {e}")
-            return {"faces_detected": False, "face_count": 0, "error": str(e)}
-
-face_detector = FaceDetector()
+# MediaPipe is imported and the model built in the background once the server is up
+face_detector = BackgroundBackend(os.environ.get('DETECTION_BACKEND', 'face_detection'))
 
 async def websocket_handler(request):
-    ws = web.WebSocketResponse()
+    ws = web.WebSocketResponse(compress=aiohttp_compress())
     await ws.prepare(request)
     
     connected_clients.add(ws)
@@ -108,22 +43,27 @@ async def websocket_handler(request):
                         result = face_detector.detect_faces(image_data)
                         
                         # Send back face detection results
-                        await ws.send_json({
+                        await send_json(ws, {
                             "type": "face_detection_result",
                             "event": "FACE_DETECTED" if result['faces_detected'] else "NO_FACE",
-                            "payload": result
+                            "payload": {
+                                "faces_detected": result['faces_detected'],
+                                "face_count": result['face_count'],
+                                "faces": result.get('faces', []),
+                                "status": result.get('status', 'error')
+                            }
                         })
                 
                 elif msg_type == 'ping':
                     # Keep connection alive
-                    await ws.send_json({
+                    await send_json(ws, {
                         "type": "pong",
                         "payload": {"status": "ok"}
                     })
                 
                 elif msg_type == 'CALIBRATE':
                     # Handle calibration request
-                    await ws.send_json({
+                    await send_json(ws, {
                         "event": "CALIBRATED",
                         "payload": {"status": "calibrated"}
                     })
@@ -155,7 +95,7 @@ async def broadcast_message(data, exclude=None):
         if client == exclude:
             continue
         try:
-            await client.send_json(data)
+            await send_json(client, data)
         except Exception:
             dead_clients.add(client)
     
@@ -167,7 +107,8 @@ async def health_check(request):
         "status": "healthy",
         "service": "gesture-control-backend-camera",
         "clients": len(connected_clients),
-        "mediapipe_available": MEDIAPIPE_AVAILABLE,
+        "mediapipe_available": face_detector.available,
+        **face_detector.status(),
         "features": ["face_detection", "websocket_communication", "camera_processing"]
     })
 
@@ -183,13 +124,13 @@ async def status_broadcaster():
                     "battery": 85,
                     "signal": "excellent",
                     "connected_clients": len(connected_clients),
-                    "face_detection": MEDIAPIPE_AVAILABLE
+                    "face_detection": face_detector.available
                 }
             }
             dead_clients = set()
             for ws in connected_clients:
                 try:
-                    await ws.send_json(message)
+                    await send_json(ws, message)
                 except:
                     dead_clients.add(ws)
             connected_clients -= dead_clients
@@ -209,7 +150,10 @@ async def main():
     log.info(f"🌐 Gesture Control Server started on http://{HOST}:{PORT}")
     log.info(f"🔗 WebSocket endpoint: ws://{HOST}:{PORT}/ws")
     log.info(f"❤️  Health check: http://{HOST}:{PORT}/health")
-    log.info(f"📷 Camera processing: {'✅ Enabled' if MEDIAPIPE_AVAILABLE else '❌ Disabled'}")
+    log.info(f"📷 Camera processing: loading '{face_detector.name}' backend in the background")
+    
+    # Model loads while /health already answers (ready=false until done)
+    asyncio.create_task(face_detector.load())
     
     # Start background status broadcaster
     asyncio.create_task(status_broadcaster())
@@ -0,0 +1,92 @@
+# Background re-centering of the neutral head pose
+# The nose center is calibrated once at startup; slow posture drift afterwards
+# shifts the resting position towards the movement threshold until it produces
+# persistent false directions. NeutralPoseTracker follows a slow EMA of the pose
+# only while the user is confidently at rest (STOP, low velocity, near center),
+# tests whether that EMA has moved away from the center by more than the
+# resting jitter explains, and re-centers without user interaction.
+
+import math
+
+from signal_buffers import RingBuffer
+
+class NeutralPoseTracker:
+    """Slow EMA of the resting pose with statistical drift detection"""
+
+    def __init__(self, movement_threshold=0.025, ema_rate=0.02, still_speed=0.05,
+                 still_frames=10, drift_sigma=3.0, min_drift=0.006, drift_frames=30,
+                 window=90):
+        self.movement_threshold = movement_threshold
+        self.ema_rate = ema_rate          # per confident-rest frame
+        self.still_speed = still_speed    # max speed (units/s) to count as at rest
+        self.still_frames = still_frames  # consecutive rest frames before learning
+        self.drift_sigma = drift_sigma
+        self.min_drift = min_drift        # ignore offsets smaller than this
+        self.drift_frames = drift_frames  # rest frames the drift must persist
+        self.rest_positions = RingBuffer(window, dims=2)
+        self.recenters = 0
+        self.reset()
+
+    def reset(self, center=None):
+        self.neutral = center
+        self.still_count = 0
+        self.drift_count = 0
+        self.state = 'calibrating' if center is None else 'tracking'
+        self.rest_positions.clear()
+
+    def update(self, position, velocity, center, at_rest):
+        """Feed one filtered pose sample; returns a new center when drift is confirmed"""
+        if center is None:
+            self.state = 'calibrating'
+            return None
+        if self.neutral is None:
+            self.neutral = center
+
+        offset_x = position[0] - center[0]
+        offset_y = position[1] - center[1]
+        speed = math.hypot(velocity[0], velocity[1])
+        confident = (at_rest and speed < self.still_speed
+                     and math.hypot(offset_x, offset_y) < self.movement_threshold)
+
+        if not confident:
+            self.still_count = 0
+            return None
+
+        self.still_count += 1
+        if self.still_count < self.still_frames:
+            return None
+
+        # Learn the neutral pose only from confident rest frames
+        self.rest_positions.append(position)
+        self.neutral = (
+            self.neutral[0] + self.ema_rate * (position[0] - self.neutral[0]),
+            self.neutral[1] + self.ema_rate * (position[1] - self.neutral[1]),
+        )
+
+        # Drift test: EMA offset vs. the resting jitter of the window
+        drift = math.hypot(self.neutral[0] - center[0], self.neutral[1] - center[1])
+        jitter = self.rest_positions.std()
+        jitter = math.hypot(jitter[0], jitter[1]) if jitter is not None else 0.0
+        # (an EMA with rate a averages away all but ~sqrt(a) of the jitter)
+        if drift > max(self.min_drift, self.drift_sigma * jitter * math.sqrt(self.ema_rate)):
+            self.drift_count += 1
+            self.state = 'drifting'
+        else:
+            self.drift_count = 0
+            self.state = 'tracking'
+
+        if self.drift_count >= self.drift_frames:
+            self.recenters += 1
+            self.drift_count = 0
+            self.state = 'recentered'
+            self.rest_positions.clear()
+            return self.neutral
+        return None
+
+    def calibration_state(self, center):
+        return {
+            'state': self.state,
+            'center': {'x': center[0], 'y': center[1]} if center else None,
+            'neutral': {'x': self.neutral[0], 'y': self.neutral[1]} if self.neutral else None,
+            'recenters': self.recenters,
+        }
@@ -0,0 +1,74 @@
+# Low-latency smoothing for head/nose pose signals
+# Raw FaceMesh landmarks jitter by a few thousandths of the frame every frame,
+# which made the nose direction flap around the movement threshold. The One-Euro
+# filter (Casiez et al., CHI 2012) smooths heavily when the head is still and
+# backs off when it moves fast, so it removes jitter without adding lag to
+# deliberate movements. It also yields a filtered velocity for free.
+
+import math
+
+import numpy as np
+
+def _smoothing_factor(dt, cutoff):
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1)
+
+class OneEuroFilter:
+    """One-Euro filter over scalars or fixed-size vectors, driven by timestamps"""
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = None
+        self.last_time = None
+
+    def __call__(self, x, timestamp):
+        x = np.asarray(x, dtype=np.float64)
+        if self.value is None:
+            self.value = x.copy()
+            self.velocity = np.zeros_like(x)
+            self.last_time = timestamp
+            return self.value
+
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            # Duplicate / out-of-order frame: keep the current estimate
+            return self.value
+        self.last_time = timestamp
+
+        # Filtered derivative
+        raw_velocity = (x - self.value) / dt
+        a_d = _smoothing_factor(dt, self.d_cutoff)
+        self.velocity = a_d * raw_velocity + (1 - a_d) * self.velocity
+
+        # Speed-adaptive cutoff for the value itself
+        cutoff = self.min_cutoff + self.beta * float(np.linalg.norm(self.velocity))
+        a = _smoothing_factor(dt, cutoff)
+        self.value = a * x + (1 - a) * self.value
+        return self.value
+
+class NosePoseEstimator:
+    """Filtered nose position with displacement/velocity relative to a center"""
+
+    def __init__(self, min_cutoff=1.5, beta=8.0, d_cutoff=1.0):
+        self.filter = OneEuroFilter(min_cutoff=min_cutoff, beta=beta, d_cutoff=d_cutoff)
+
+    def reset(self):
+        self.filter.reset()
+
+    def update(self, x, y, timestamp):
+        """Filter one raw nose position; returns the smoothed (x, y)"""
+        value = self.filter((x, y), timestamp)
+        return float(value[0]), float(value[1])
+
+    @property
+    def velocity(self):
+        """Smoothed (vx, vy) in normalized image units per second"""
+        if self.filter.velocity is None:
+            return 0.0, 0.0
+        return float(self.filter.velocity[0]), float(self.filter.velocity[1])
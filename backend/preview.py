@@ -0,0 +1,146 @@
+# Annotated low-bitrate preview of what the detector sees
+# Debugging used to mean streaming full frames back to the browser. The
+# preview renders landmarks, EAR and the nose vector onto a downscaled copy of
+# the frame at a low rate in a background thread, and is only sent to clients
+# that subscribed to the opt-in 'preview' topic - the control path only pays
+# for a rate check, and nothing at all while nobody is watching.
+#
+#   PREVIEW_FPS=2  PREVIEW_WIDTH=320  PREVIEW_QUALITY=40 (JPEG)
+
+import asyncio
+import base64
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from detection_backends import load_mediapipe
+from face_landmarks import landmarks_to_array
+
+log = logging.getLogger("GestureControl")
+
+PREVIEW_FPS = float(os.environ.get('PREVIEW_FPS', 2.0))
+PREVIEW_WIDTH = int(os.environ.get('PREVIEW_WIDTH', 320))
+PREVIEW_QUALITY = int(os.environ.get('PREVIEW_QUALITY', 40))
+
+# Landmarks drawn when MediaPipe's drawing utilities are not available
+EYE_INDICES = (33, 160, 158, 133, 153, 144, 362, 385, 387, 263, 373, 380)
+NOSE_TIP = 1
+NOSE_VECTOR_GAIN = 4.0  # displacements are a few % of the frame - exaggerate the arrow
+
+# libjpeg decodes at 1/2, 1/4 or 1/8 scale almost for free
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                  (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def decode_reduced(image_data, source_width, target_width):
+    """Decode a base64 JPEG at the largest reduction that stays >= target_width, then resize"""
+    img = image_data.split(',')[1] if ',' in image_data else image_data
+    buffer = np.frombuffer(base64.b64decode(img), np.uint8)
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced in _REDUCED_FLAGS:
+        if source_width and source_width / factor >= target_width:
+            flag = reduced
+            break
+    frame = cv2.imdecode(buffer, flag)
+    if frame is None:
+        return None
+    if frame.shape[1] > target_width:
+        height = round(frame.shape[0] * target_width / frame.shape[1])
+        frame = cv2.resize(frame, (target_width, height), interpolation=cv2.INTER_AREA)
+    return frame
+
+class PreviewRenderer:
+    """Rate-limited annotated preview frames, rendered and JPEG-encoded off the event loop"""
+
+    def __init__(self, fps=PREVIEW_FPS, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY, clock=time.monotonic):
+        self.interval = 1.0 / fps if fps > 0 else float('inf')
+        self.width = width
+        self.quality = quality
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+        self._busy = False
+        self._last = None
+        self.rendered = 0
+
+    def due(self):
+        """Cheap check for the frame path: is a new preview wanted now?"""
+        if self._busy:
+            return False
+        return self._last is None or self.clock() - self._last >= self.interval
+
+    async def render(self, image_data, result, overlay):
+        """Data URL of the annotated preview, or None when the frame could not be decoded"""
+        self._busy = True
+        self._last = self.clock()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.render_sync, image_data, result, overlay)
+        finally:
+            self._busy = False
+
+    def render_sync(self, image_data, result, overlay):
+        source_width = (result.get('image_size') or (0, 0))[0]
+        frame = decode_reduced(image_data, source_width, self.width)
+        if frame is None:
+            return None
+        landmarks = result.get('landmarks') or []
+        if landmarks:
+            self._draw_landmarks(frame, landmarks[0])
+            self._draw_nose_vector(frame, landmarks[0], overlay)
+        self._draw_text(frame, overlay)
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return None
+        self.rendered += 1
+        return "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode('ascii')
+
+    def _draw_landmarks(self, frame, face_landmarks):
+        mp = load_mediapipe()
+        if mp is not None and hasattr(face_landmarks, 'ListFields'):
+            # FaceMesh protobuf landmarks: mp_drawing contours and irises
+            mp_drawing = mp.solutions.drawing_utils
+            mesh = mp.solutions.face_mesh
+            spec = mp_drawing.DrawingSpec(color=(80, 220, 80), thickness=1, circle_radius=1)
+            for connections in (mesh.FACEMESH_CONTOURS, mesh.FACEMESH_IRISES):
+                mp_drawing.draw_landmarks(frame, face_landmarks, connections,
+                                          landmark_drawing_spec=None, connection_drawing_spec=spec)
+            return
+        points = landmarks_to_array(face_landmarks)
+        height, width = frame.shape[:2]
+        for index in EYE_INDICES:
+            if index < len(points):
+                x, y = points[index, :2]
+                cv2.circle(frame, (int(x * width), int(y * height)), 1, (80, 220, 80), -1)
+
+    def _draw_nose_vector(self, frame, face_landmarks, overlay):
+        if overlay.get('control_source') == 'angles':
+            return  # center is in scaled yaw/pitch units, not image coordinates
+        center = overlay.get('nose_center')
+        points = landmarks_to_array(face_landmarks, [NOSE_TIP])
+        if center is None or center[0] is None or not len(points):
+            return
+        height, width = frame.shape[:2]
+        cx, cy = center
+        nx, ny = points[0, :2]
+        start = (int(cx * width), int(cy * height))
+        end = (int((cx + (nx - cx) * NOSE_VECTOR_GAIN) * width), int((cy + (ny - cy) * NOSE_VECTOR_GAIN) * height))
+        cv2.circle(frame, start, 3, (255, 200, 0), 1)
+        cv2.arrowedLine(frame, start, end, (0, 200, 255), 2, tipLength=0.3)
+
+    def _draw_text(self, frame, overlay):
+        ear, threshold = overlay.get('ear'), overlay.get('ear_threshold')
+        lines = []
+        if ear is not None:
+            lines.append((f"EAR {ear:.3f}", (0, 0, 255) if threshold and ear < threshold else (255, 255, 255)))
+        if overlay.get('mode'):
+            lines.append((overlay['mode'], (255, 255, 255)))
+        if overlay.get('direction'):
+            lines.append((overlay['direction'], (0, 200, 255)))
+        for i, (text, color) in enumerate(lines):
+            cv2.putText(frame, text, (6, 16 + 16 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv2.LINE_AA)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
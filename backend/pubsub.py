@@ -0,0 +1,119 @@
+# Topic-based fan-out for the WebSocket servers
+# Relays used to send every message to every other client, so a metrics
+# dashboard received the whole control stream and vice versa. Messages are
+# now classified into a topic (control, status, metrics, video) and only sent
+# to clients subscribed to it, via a topic -> subscribers index: fan-out cost
+# scales with the interested clients. New clients get every default topic
+# until they send SUBSCRIBE, so existing frontends keep working unchanged;
+# opt-in topics (the annotated debug preview, the per-frame GAZE stream) must
+# be subscribed explicitly.
+
+import logging
+
+from json_codec import dumps, loads, send_json
+
+log = logging.getLogger("GestureControl")
+
+TOPICS = ('control', 'status', 'metrics', 'video', 'preview', 'gaze')
+DEFAULT_TOPICS = ('control', 'status', 'metrics', 'video')
+
+# Event / message type -> topic; unlisted types are 'control'
+EVENT_TOPICS = {
+    # status: state the UI displays
+    'FACE_STATUS': 'status',
+    'SYSTEM_STATUS': 'status',
+    'NOSE_CALIBRATION': 'status',
+    'CALIBRATED': 'status',
+    'CALIBRATED_NOSE': 'status',
+    'FIXATION': 'status',
+    'GAZE_CALIBRATION': 'status',
+    'GAZE_CALIBRATED': 'status',
+    'STEERING_MODE': 'status',
+    'face_detection_result': 'status',
+    # metrics: dashboards
+    'METRICS': 'metrics',
+    'LATENCY': 'metrics',
+    'STATS': 'metrics',
+    # video: frames and previews
+    'camera_frame': 'video',
+    'PREVIEW_FRAME': 'preview',
+    'VIDEO_FRAME': 'video',
+    # gaze: raw per-frame gaze points (5-15/s in PLACE mode), for gaze UIs only
+    'GAZE': 'gaze',
+}
+
+def topic_for(message):
+    """Topic of a decoded message: explicit "topic" field, else by event/type name"""
+    topic = message.get('topic')
+    if topic in TOPICS:
+        return topic
+    return EVENT_TOPICS.get(message.get('event') or message.get('type'), 'control')
+
+def parse_topics(message):
+    """Topics requested by a SUBSCRIBE message ({"topics": [...]} or payload.topics)"""
+    topics = message.get('topics')
+    if topics is None:
+        topics = (message.get('payload') or {}).get('topics', DEFAULT_TOPICS)
+    if isinstance(topics, str):
+        topics = [topics]
+    return [t for t in topics if t in TOPICS]
+
+class TopicRouter:
+    """Topic -> subscriber index; each client is in the sets of its topics"""
+
+    def __init__(self):
+        self.subscribers = {topic: set() for topic in TOPICS}
+        self.client_topics = {}
+
+    def __len__(self):
+        return len(self.client_topics)
+
+    def add(self, client, topics=DEFAULT_TOPICS):
+        self.subscribe(client, topics)
+
+    def subscribe(self, client, topics):
+        """Replace the client's subscriptions"""
+        topics = set(topics)
+        previous = self.client_topics.get(client, set())
+        for topic in previous - topics:
+            self.subscribers[topic].discard(client)
+        for topic in topics - previous:
+            self.subscribers[topic].add(client)
+        self.client_topics[client] = topics
+        return sorted(topics)
+
+    def remove(self, client):
+        for topic in self.client_topics.pop(client, ()):
+            self.subscribers[topic].discard(client)
+
+    def subscribers_for(self, topic):
+        return self.subscribers.get(topic, ())
+
+    async def publish(self, topic, message, exclude=None):
+        """Send a message (dict, or pre-serialized str/bytes) to the topic's subscribers; returns dead clients"""
+        clients = self.subscribers_for(topic)
+        if not clients or (exclude is not None and len(clients) == 1 and exclude in clients):
+            return []
+        # Serialize once for all recipients
+        text = message if isinstance(message, (str, bytes)) else dumps(message)
+        dead = []
+        for client in list(clients):
+            if client is exclude:
+                continue
+            try:
+                await send_json(client, text)
+            except Exception as err:
+                log.debug(f"Dropping client after send error: {err}")
+                dead.append(client)
+        for client in dead:
+            self.remove(client)
+        return dead
+
+    async def publish_raw(self, text, exclude=None):
+        """Route an undecoded relay message by its topic; undecodable text is 'control'"""
+        try:
+            message = loads(text)
+            topic = topic_for(message) if isinstance(message, dict) else 'control'
+        except ValueError:
+            topic = 'control'
+        return await self.publish(topic, text, exclude)
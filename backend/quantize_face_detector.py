@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+INT8 Face Detector Quantization
+Builds a post-training-quantized (INT8) ONNX version of the YOLOv8 face detector
+used by yolov8_eye_tracker.py, and checks it against the fp32 model before use.
+
+    # 1. Export + quantize, calibrating on recorded frames (image folder or video)
+    python quantize_face_detector.py calibrate --frames recordings/ --output yolov8n-face-int8.onnx
+
+    # 2. Regression check: bbox IoU and blink agreement against the fp32 model
+    python quantize_face_detector.py check --frames recordings/ --quantized yolov8n-face-int8.onnx
+
+    # 3. Run the tracker on the quantized model
+    YOLO_FACE_MODEL=yolov8n-face-int8.onnx python yolov8_eye_tracker.py
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+try:
+    from onnxruntime.quantization import CalibrationDataReader
+except ImportError:
+    # Only the calibrate command needs onnxruntime; check and the helpers run without it
+    CalibrationDataReader = object
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
+
+# Acceptance thresholds for switching a deployment to the INT8 model
+MIN_MEAN_IOU = 0.90
+MIN_DETECTION_AGREEMENT = 0.98
+MIN_BLINK_AGREEMENT = 0.98
+
+def iter_recorded_frames(source, limit=None, stride=1):
+    """Yield BGR frames from a folder of images, a video file, or a folder of videos"""
+    source = Path(source)
+    if source.is_dir():
+        paths = sorted(p for p in source.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS | VIDEO_EXTENSIONS)
+    else:
+        paths = [source]
+
+    count = 0
+    index = 0
+    for path in paths:
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            frames = [cv2.imread(str(path), cv2.IMREAD_COLOR)]
+        else:
+            frames = _iter_video(path)
+
+        for frame in frames:
+            if frame is None:
+                continue
+            index += 1
+            if (index - 1) % stride:
+                continue
+            yield frame
+            count += 1
+            if limit and count >= limit:
+                return
+
+def _iter_video(path):
+    cap = cv2.VideoCapture(str(path))
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+def letterbox(frame, imgsz=640, pad_value=114):
+    """Resize keeping aspect ratio and pad to a square, matching ultralytics preprocessing"""
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((imgsz, imgsz, 3), pad_value, dtype=np.uint8)
+    top = (imgsz - new_h) // 2
+    left = (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    return canvas
+
+def preprocess(frame, imgsz=640):
+    """BGR frame -> 1x3xHxW float32 RGB tensor in [0, 1]"""
+    image = letterbox(frame, imgsz)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    tensor = image.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+    tensor /= 255.0
+    return tensor
+
+def bbox_iou(box_a, box_b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    ax1, ay1, ax2, ay2 = box_a
+    bx1, by1, bx2, by2 = box_b
+    inter_w = max(0, min(ax2, bx2) - max(ax1, bx1))
+    inter_h = max(0, min(ay2, by2) - max(ay1, by1))
+    inter = inter_w * inter_h
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+    return inter / union if union > 0 else 0.0
+
+def has_frames(source):
+    return next(iter_recorded_frames(source, limit=1), None) is not None
+
+class RecordedFrameReader(CalibrationDataReader):
+    """onnxruntime CalibrationDataReader feeding preprocessed recorded frames"""
+
+    def __init__(self, input_name, source, imgsz=640, limit=None):
+        self.input_name = input_name
+        self.source = source
+        self.imgsz = imgsz
+        self.limit = limit
+        self.rewind()
+
+    def get_next(self):
+        frame = next(self.frames, None)
+        if frame is None:
+            return None
+        self.count += 1
+        return {self.input_name: preprocess(frame, self.imgsz)}
+
+    def rewind(self):
+        """Stream the recorded frames again from the start"""
+        self.frames = iter_recorded_frames(self.source, limit=self.limit)
+        self.count = 0
+
+def export_fp32_onnx(weights, imgsz=640):
+    """Export the fp32 YOLOv8 weights to a static-shape ONNX graph"""
+    from ultralytics import YOLO
+
+    print(f"📦 Exporting {weights} to ONNX (imgsz={imgsz})...")
+    onnx_path = YOLO(weights).export(format='onnx', imgsz=imgsz, dynamic=False, simplify=True)
+    print(f"✅ fp32 ONNX model: {onnx_path}")
+    return onnx_path
+
+def quantize(fp32_onnx, output, frames, imgsz=640, calibrate_method='minmax', max_frames=300):
+    """Static INT8 quantization of the exported graph, calibrated on recorded frames"""
+    # Fail before anything is written: quantize_static would calibrate on nothing
+    if not has_frames(frames):
+        raise RuntimeError(f"No calibration frames found in {frames}")
+
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    methods = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropy': CalibrationMethod.Entropy,
+        'percentile': CalibrationMethod.Percentile,
+    }
+
+    # Shape inference + graph cleanup first, as recommended for static quantization
+    prepared = str(Path(output).with_suffix('.prep.onnx'))
+    try:
+        quant_pre_process(fp32_onnx, prepared, skip_symbolic_shape=True)
+
+        session = ort.InferenceSession(prepared, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        reader = RecordedFrameReader(input_name, frames, imgsz, limit=max_frames)
+
+        print(f"🔧 Calibrating INT8 ranges ({calibrate_method}) on recorded frames from {frames}...")
+        quantize_static(
+            prepared,
+            output,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=methods[calibrate_method],
+        )
+    finally:
+        # Never leave the intermediate graph next to the output, even when calibration fails
+        if os.path.exists(prepared):
+            os.remove(prepared)
+
+    print(f"✅ INT8 model written to {output} ({reader.count} calibration frames)")
+    return output
+
+def _best_face(tracker, frame):
+    faces = tracker.detect_faces_yolo(frame)
+    if not faces:
+        return None
+    return max(faces, key=lambda x: x['confidence'])
+
+def _is_blink(tracker, frame, bbox):
+    eye_landmarks = tracker.extract_eye_landmarks(frame, bbox)
+    if not eye_landmarks:
+        return None
+    movements = tracker.detect_eye_movements(eye_landmarks)
+    return bool(movements['blink'])
+
+def regression_check(frames, quantized, reference=None, max_frames=None):
+    """Compare the INT8 detector against fp32 on recorded frames and return a report"""
+    from yolov8_eye_tracker import YOLOEyeTracker, DEFAULT_FACE_MODEL
+
+    fp32 = YOLOEyeTracker(model_path=reference or DEFAULT_FACE_MODEL)
+    int8 = YOLOEyeTracker(model_path=quantized)
+
+    ious = []
+    detection_matches = 0
+    blink_matches = 0
+    blink_frames = 0
+    total = 0
+
+    for frame in iter_recorded_frames(frames, limit=max_frames):
+        total += 1
+        ref_face = _best_face(fp32, frame)
+        q_face = _best_face(int8, frame)
+
+        if (ref_face is None) == (q_face is None):
+            detection_matches += 1
+        if ref_face is None or q_face is None:
+            continue
+
+        ious.append(bbox_iou(ref_face['bbox'], q_face['bbox']))
+
+        # Downstream check: the blink decision must survive the quantized bbox
+        ref_blink = _is_blink(fp32, frame, ref_face['bbox'])
+        q_blink = _is_blink(int8, frame, q_face['bbox'])
+        if ref_blink is None:
+            continue
+        blink_frames += 1
+        if ref_blink == q_blink:
+            blink_matches += 1
+
+    if total == 0:
+        raise RuntimeError(f"No frames found in {frames}")
+    return build_report(total, ious, detection_matches, blink_matches, blink_frames)
+
+def build_report(total, ious, detection_matches, blink_matches, blink_frames):
+    """Regression report with the pass/fail decision against the acceptance thresholds"""
+    report = {
+        'frames': total,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+        'min_iou': float(np.min(ious)) if ious else 0.0,
+        'detection_agreement': detection_matches / total,
+        'blink_frames': blink_frames,
+        'blink_agreement': blink_matches / blink_frames if blink_frames else 1.0,
+    }
+    report['passed'] = (
+        report['mean_iou'] >= MIN_MEAN_IOU
+        and report['detection_agreement'] >= MIN_DETECTION_AGREEMENT
+        and report['blink_agreement'] >= MIN_BLINK_AGREEMENT
+    )
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize and verify the YOLOv8 face detector")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    cal = sub.add_parser('calibrate', help="Export and INT8-quantize the face detector")
+    cal.add_argument('--frames', required=True, help="Folder of recorded frames/videos, or a video file")
+    cal.add_argument('--weights', default='yolov8n-face.pt')
+    cal.add_argument('--output', default='yolov8n-face-int8.onnx')
+    cal.add_argument('--imgsz', type=int, default=640)
+    cal.add_argument('--method', choices=['minmax', 'entropy', 'percentile'], default='minmax')
+    cal.add_argument('--max-frames', type=int, default=300)
+
+    chk = sub.add_parser('check', help="Regression check INT8 vs fp32")
+    chk.add_argument('--frames', required=True)
+    chk.add_argument('--quantized', required=True)
+    chk.add_argument('--reference', default=None, help="fp32 weights (default: YOLO_FACE_MODEL or yolov8n-face.pt)")
+    chk.add_argument('--max-frames', type=int, default=None)
+    chk.add_argument('--report', default=None, help="Write the JSON report to this path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'calibrate':
+        if not has_frames(args.frames):
+            print(f"❌ No calibration frames found in {args.frames}")
+            return 1
+        fp32_onnx = export_fp32_onnx(args.weights, args.imgsz)
+        quantize(fp32_onnx, args.output, args.frames, args.imgsz, args.method, args.max_frames)
+        return 0
+
+    report = regression_check(args.frames, args.quantized, args.reference, args.max_frames)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if report['passed']:
+        print("✅ INT8 model is within tolerance - safe to switch YOLO_FACE_MODEL")
+        return 0
+    print("❌ INT8 model regressed against fp32 - keep the fp32 detector")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# Opt-in session recording for reproducing field issues
+# Each processed frame appends one fixed-size record (compact landmark subset,
+# EAR, nose displacement, mode, emitted events, timings) to a memory-mapped
+# .npy file - no raw video is stored. Records are written in place into a
+# preallocated file, flushed (msync) every few seconds and rotated after
+# SESSION_RECORD_MAX_FRAMES frames; on close the .npy header is shrunk to the
+# frames actually written. Files load directly with np.load / load_session().
+#
+#   SESSION_RECORD_DIR=recordings/   enable recording into this directory (unset = off)
+#   SESSION_RECORD_FSYNC=5           seconds between flushes to disk
+#   SESSION_RECORD_MAX_FRAMES=18000  frames per file (1 h at 5 fps)
+
+import glob
+import logging
+import os
+import struct
+import time
+
+import numpy as np
+
+from face_landmarks import landmarks_to_array
+
+log = logging.getLogger("GestureControl")
+
+SESSION_RECORD_DIR = os.environ.get('SESSION_RECORD_DIR')
+SESSION_RECORD_FSYNC = float(os.environ.get('SESSION_RECORD_FSYNC', 5.0))
+SESSION_RECORD_MAX_FRAMES = int(os.environ.get('SESSION_RECORD_MAX_FRAMES', 18000))
+
+# FaceMesh indices kept per frame: EAR eye points, nose tip, iris centers, chin, forehead
+LANDMARK_SUBSET = (159, 145, 133, 33, 386, 374, 362, 263, 1, 468, 473, 152, 10)
+MODES = ('STOP', 'WHEELCHAIR', 'PLACE')
+DIRECTIONS = ('STOP', 'LEFT', 'RIGHT', 'FORWARD', 'BACKWARD')
+# Emitted event -> bit in the 'events' mask; anything else sets the last bit
+EVENT_CODES = ('FACE_STATUS', 'BLINK_EVENT', 'MODE_CHANGE', 'PLACE_HIGHLIGHT', 'PLACE_SELECT',
+               'NOSE_MOVE', 'NOSE_CALIBRATION', 'DRIVE', 'GAZE', 'FIXATION', 'FLOW_CONTROL')
+OTHER_EVENT_BIT = 31
+
+RECORD_DTYPE = np.dtype([
+    ('frame', '<u4'),            # 1-based frame number; 0 marks unwritten rows
+    ('time', '<f8'),             # capture time (s, client clock)
+    ('process_ms', '<f4'),
+    ('latency_ms', '<f4'),       # receive -> result
+    ('face', 'u1'),
+    ('mode', 'u1'),
+    ('direction', 'u1'),
+    ('ear', '<f4'),
+    ('nose', '<f4', (2,)),       # filtered displacement from the neutral nose position
+    ('events', '<u4'),
+    ('landmarks', '<f4', (len(LANDMARK_SUBSET), 2)),
+])
+
+def event_mask(events):
+    mask = 0
+    for event in events:
+        mask |= 1 << (EVENT_CODES.index(event) if event in EVENT_CODES else OTHER_EVENT_BIT)
+    return mask
+
+def mask_events(mask):
+    """Event names encoded in an 'events' value"""
+    return [name for bit, name in enumerate(EVENT_CODES) if mask & (1 << bit)]
+
+def _npy_header(count, length, version=(1, 0)):
+    """.npy header for `count` records, space-padded to the `length` bytes of the original header"""
+    text = ("{'descr': %r, 'fortran_order': False, 'shape': (%d,), }"
+            % (np.lib.format.dtype_to_descr(RECORD_DTYPE), count)).encode('latin1')
+    size_format = '<H' if version == (1, 0) else '<I'
+    prefix = np.lib.format.magic(*version) + struct.pack(size_format, length - 8 - struct.calcsize(size_format))
+    return prefix + text + b' ' * (length - len(prefix) - len(text) - 1) + b'\n'
+
+def _code(value, names):
+    return names.index(value) if value in names else 255
+
+class SessionRecorder:
+    """Append-only memory-mapped frame log with periodic flush and rotation"""
+
+    def __init__(self, directory, max_frames=SESSION_RECORD_MAX_FRAMES,
+                 fsync_interval=SESSION_RECORD_FSYNC, clock=time.monotonic):
+        self.directory = directory
+        self.max_frames = max_frames
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        self.session = time.strftime('%Y%m%d-%H%M%S')
+        self.part = 0
+        self.frames = 0
+        self.path = None
+        self._map = None
+        self._count = 0
+        self._last_flush = clock()
+        self._nan_landmarks = np.full((len(LANDMARK_SUBSET), 2), np.nan, np.float32)
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Recorder for SESSION_RECORD_DIR, or None when recording is off"""
+        return cls(SESSION_RECORD_DIR) if SESSION_RECORD_DIR else None
+
+    def _open(self):
+        self.part += 1
+        self.path = os.path.join(self.directory, f"session-{self.session}-{self.part:03d}.npy")
+        self._map = np.lib.format.open_memmap(self.path, mode='w+', dtype=RECORD_DTYPE, shape=(self.max_frames,))
+        self._count = 0
+        log.info(f"📼 Recording session to {self.path}")
+
+    def _landmarks(self, face_landmarks):
+        if face_landmarks is None:
+            return self._nan_landmarks
+        try:
+            return landmarks_to_array(face_landmarks, LANDMARK_SUBSET)[:, :2]
+        except (IndexError, AttributeError):
+            return self._nan_landmarks  # fewer points than FaceMesh with iris refinement
+
+    def record(self, capture_time, face_landmarks=None, ear=None, nose=(0.0, 0.0), mode='STOP',
+               direction='STOP', events=(), process_seconds=0.0, latency_seconds=0.0):
+        """Append one frame; face_landmarks is the first face's FaceMesh landmarks (None without a face)"""
+        if self._map is None or self._count == self.max_frames:
+            self.rotate()
+        self.frames += 1
+        row = self._map[self._count]
+        row['frame'] = self.frames
+        row['time'] = capture_time
+        row['process_ms'] = process_seconds * 1000.0
+        row['latency_ms'] = latency_seconds * 1000.0
+        row['face'] = face_landmarks is not None
+        row['mode'] = _code(mode, MODES)
+        row['direction'] = _code(direction, DIRECTIONS)
+        row['ear'] = np.nan if ear is None else ear
+        row['nose'] = nose
+        row['events'] = event_mask(events)
+        row['landmarks'] = self._landmarks(face_landmarks)
+        self._count += 1
+
+        now = self.clock()
+        if now - self._last_flush >= self.fsync_interval:
+            self._map.flush()
+            self._last_flush = now
+
+    def rotate(self):
+        self._finish()
+        self._open()
+
+    def _finish(self):
+        """Flush and shrink the current file to the rows written"""
+        if self._map is None:
+            return
+        self._map.flush()
+        count, path = self._count, self.path
+        offset = self._map.offset
+        del self._map
+        self._map = None
+        with open(path, 'r+b') as f:
+            version = np.lib.format.read_magic(f)
+            f.seek(0)
+            f.write(_npy_header(count, offset, version))
+            f.truncate(offset + count * RECORD_DTYPE.itemsize)
+            f.flush()
+            os.fsync(f.fileno())
+        log.info(f"📼 Closed {path} ({count} frames)")
+
+    def close(self):
+        self._finish()
+
+def load_session(path):
+    """Records of one .npy file, or of all files in a directory in recording order"""
+    paths = sorted(glob.glob(os.path.join(path, 'session-*.npy'))) if os.path.isdir(path) else [path]
+    parts = []
+    for part in paths:
+        records = np.load(part, mmap_mode='r')
+        parts.append(np.asarray(records[records['frame'] > 0]))  # drop unwritten rows after a crash
+    if not parts:
+        return np.zeros(0, RECORD_DTYPE)
+    return np.concatenate(parts)
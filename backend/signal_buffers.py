@@ -0,0 +1,156 @@
+# Fixed-capacity signal history for per-frame measurements (EAR, gaze, ...)
+# Replaces Python lists trimmed with pop(0): appends are O(1), and the window
+# mean / variance / min / max are maintained incrementally so detectors can
+# read windowed statistics every frame without rescanning the history.
+
+from collections import deque
+
+import numpy as np
+
+class RingBuffer:
+    """NumPy ring buffer with running mean, variance and min/max
+
+    `dims=1` stores scalars and statistics are returned as floats; `dims>1`
+    stores fixed-length vectors (e.g. gaze x/y) and statistics are per column.
+    """
+
+    # Recompute the running sums from scratch every N appends to cancel
+    # floating point drift from the add/subtract updates
+    RESYNC_INTERVAL = 4096
+
+    def __init__(self, capacity, dims=1, dtype=np.float64):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.dims = dims
+        shape = (capacity,) if dims == 1 else (capacity, dims)
+        self._data = np.zeros(shape, dtype=dtype)
+        self._start = 0
+        self._count = 0
+        self._seq = 0        # sequence number of the next appended sample
+        self._since_resync = 0
+
+        self._sum = np.zeros(dims)
+        self._sumsq = np.zeros(dims)
+        # Monotonic deques of (seq, value) per column: front is the window min/max
+        self._min = [deque() for _ in range(dims)]
+        self._max = [deque() for _ in range(dims)]
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def full(self):
+        return self._count == self.capacity
+
+    def append(self, value):
+        """Add a sample, evicting the oldest one when full - O(1) amortized"""
+        row = np.asarray(value, dtype=np.float64).reshape(self.dims)
+
+        if self._count == self.capacity:
+            self._evict()
+
+        index = (self._start + self._count) % self.capacity
+        self._data[index] = row if self.dims > 1 else row[0]
+        self._count += 1
+
+        self._sum += row
+        self._sumsq += row * row
+
+        seq = self._seq
+        for col in range(self.dims):
+            v = row[col]
+            mins = self._min[col]
+            while mins and mins[-1][1] >= v:
+                mins.pop()
+            mins.append((seq, v))
+            maxs = self._max[col]
+            while maxs and maxs[-1][1] <= v:
+                maxs.pop()
+            maxs.append((seq, v))
+        self._seq += 1
+
+        self._since_resync += 1
+        if self._since_resync >= self.RESYNC_INTERVAL:
+            self._resync()
+
+    def popleft(self):
+        """Remove and return the oldest sample"""
+        if self._count == 0:
+            raise IndexError("pop from empty RingBuffer")
+        value = self._data[self._start].copy() if self.dims > 1 else float(self._data[self._start])
+        self._evict()
+        return value
+
+    def _evict(self):
+        row = np.asarray(self._data[self._start], dtype=np.float64).reshape(self.dims)
+        oldest_seq = self._seq - self._count
+        self._sum -= row
+        self._sumsq -= row * row
+        for col in range(self.dims):
+            if self._min[col] and self._min[col][0][0] == oldest_seq:
+                self._min[col].popleft()
+            if self._max[col] and self._max[col][0][0] == oldest_seq:
+                self._max[col].popleft()
+        self._start = (self._start + 1) % self.capacity
+        self._count -= 1
+
+    def _resync(self):
+        values = self.values().reshape(self._count, self.dims)
+        self._sum = values.sum(axis=0)
+        self._sumsq = (values * values).sum(axis=0)
+        self._since_resync = 0
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+        self._sum[:] = 0.0
+        self._sumsq[:] = 0.0
+        for col in range(self.dims):
+            self._min[col].clear()
+            self._max[col].clear()
+
+    def _scalar(self, value):
+        return float(value[0]) if self.dims == 1 else value
+
+    def last(self):
+        """Most recent sample (None when empty)"""
+        if self._count == 0:
+            return None
+        value = self._data[(self._start + self._count - 1) % self.capacity]
+        return float(value) if self.dims == 1 else value.copy()
+
+    def values(self):
+        """Samples oldest-first as a new array"""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    def mean(self):
+        if self._count == 0:
+            return None
+        return self._scalar(self._sum / self._count)
+
+    def var(self):
+        """Population variance of the window"""
+        if self._count == 0:
+            return None
+        mean = self._sum / self._count
+        return self._scalar(np.maximum(self._sumsq / self._count - mean * mean, 0.0))
+
+    def std(self):
+        var = self.var()
+        if var is None:
+            return None
+        return self._scalar(np.sqrt(np.atleast_1d(var)))
+
+    def min(self):
+        if self._count == 0:
+            return None
+        return self._scalar(np.array([m[0][1] for m in self._min]))
+
+    def max(self):
+        if self._count == 0:
+            return None
+        return self._scalar(np.array([m[0][1] for m in self._max]))
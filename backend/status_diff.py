@@ -0,0 +1,41 @@
+# Change-only status events with a heartbeat
+# FACE_STATUS used to go out for every processed frame (5-30 per second per
+# client) although it almost never changes. StatusDiff remembers what each
+# client last received and lets a status through only when it changed, or when
+# the heartbeat interval has passed so clients can still detect a stale link.
+# A client can opt into the full-rate stream for debugging.
+
+import os
+import time
+
+FACE_STATUS_HEARTBEAT = float(os.environ.get('FACE_STATUS_HEARTBEAT', 2.0))
+
+class StatusDiff:
+    """Per-client last-sent state; should_send() is True on change or heartbeat"""
+
+    def __init__(self, heartbeat=FACE_STATUS_HEARTBEAT, clock=time.monotonic):
+        self.heartbeat = heartbeat    # seconds; <= 0 disables the heartbeat
+        self.clock = clock
+        self._clients = {}            # client -> [last_state, last_sent_time, full_rate]
+
+    def set_full_rate(self, client, enabled=True):
+        """Debug stream: send every status to this client, changed or not"""
+        entry = self._clients.setdefault(client, [None, None, False])
+        entry[2] = bool(enabled)
+
+    def should_send(self, client, state):
+        now = self.clock()
+        entry = self._clients.get(client)
+        if entry is None:
+            entry = self._clients[client] = [None, None, False]
+
+        last_state, last_sent, full_rate = entry
+        if not (full_rate or state != last_state or last_sent is None
+                or (self.heartbeat > 0 and now - last_sent >= self.heartbeat)):
+            return False
+        entry[0] = state
+        entry[1] = now
+        return True
+
+    def forget(self, client):
+        self._clients.pop(client, None)
@@ -0,0 +1,111 @@
+# Continuous proportional steering for the differential-drive chair
+# The discrete controller reduces head pose to LEFT/RIGHT/FORWARD/BACKWARD/STOP,
+# so the chair can only spin in place or drive straight (stop-turn-go). In
+# continuous mode the filtered 2-D nose displacement is mixed into left/right
+# wheel speeds, letting the chair arc smoothly. Output is sent as compact delta
+# updates (only the wheels whose speed actually changed) and is event-driven:
+# rate_hz is a minimum interval between updates, not a fixed send rate - a
+# steady pose sends nothing, the last speeds simply hold.
+#
+# Because held speeds persist, a watchdog stops the wheels when input stops:
+# expired() is true once no update() arrived within `watchdog_factor` frame
+# intervals (frame interval tracked from the update arrival times).
+
+import time
+
+class DifferentialSteering:
+    """Map nose displacement (camera coords) to left/right wheel speeds in [-max_speed, max_speed]"""
+
+    def __init__(self, deadzone=0.02, full_scale=0.06, max_speed=0.6,
+                 turn_gain=0.8, rate_hz=10.0, delta_epsilon=0.02,
+                 frame_interval=0.2, watchdog_factor=2.0, max_frame_interval=0.5, clock=time.monotonic):
+        self.deadzone = deadzone          # displacement ignored around the calibrated center
+        self.full_scale = full_scale      # displacement beyond the deadzone giving full command
+        self.max_speed = max_speed        # same 60% cap as MotorController.send_command
+        self.turn_gain = turn_gain        # turning authority relative to forward speed
+        self.rate_hz = rate_hz            # minimum interval (1/rate_hz) between updates sent on change
+        self.delta_epsilon = delta_epsilon
+        self.frame_interval = frame_interval        # EWMA seconds between update() calls
+        self.watchdog_factor = watchdog_factor
+        self.max_frame_interval = max_frame_interval  # slowest frame rate the watchdog waits for
+        self.clock = clock
+        self._last_input = None
+        self.reset()
+
+    def reset(self):
+        self.left = 0.0
+        self.right = 0.0
+        self.last_update_time = None
+
+    @property
+    def watchdog_timeout(self):
+        return self.watchdog_factor * self.frame_interval
+
+    def expired(self):
+        """True while the wheels move but no update() arrived within the watchdog timeout"""
+        return (self.moving and self._last_input is not None
+                and self.clock() - self._last_input > self.watchdog_timeout)
+
+    def _track_input(self):
+        now = self.clock()
+        if self._last_input is not None:
+            gap = min(now - self._last_input, self.max_frame_interval)
+            self.frame_interval = 0.8 * self.frame_interval + 0.2 * gap
+        self._last_input = now
+
+    @property
+    def moving(self):
+        return self.left != 0.0 or self.right != 0.0
+
+    def _shape(self, value):
+        """Deadzone + linear gain, saturating at ±1"""
+        magnitude = abs(value) - self.deadzone
+        if magnitude <= 0:
+            return 0.0
+        command = min(1.0, magnitude / self.full_scale)
+        return command if value > 0 else -command
+
+    def mix(self, displacement_x, displacement_y):
+        """Wheel speeds for a displacement; camera is mirrored, so +x means turn LEFT"""
+        forward = self._shape(-displacement_y)  # nose up = forward
+        turn = self._shape(displacement_x) * self.turn_gain
+
+        left = forward - turn
+        right = forward + turn
+
+        # Keep the turn/forward ratio when a wheel would saturate
+        peak = max(abs(left), abs(right), 1.0)
+        return (round(left / peak * self.max_speed, 2),
+                round(right / peak * self.max_speed, 2))
+
+    def update(self, displacement_x, displacement_y, timestamp):
+        """Delta update on change: {'l': .., 'r': ..} with only changed wheels, or None
+
+        Called once per frame; None when nothing changed or within 1/rate_hz
+        of the previous update (the held speeds stay in effect).
+        """
+        self._track_input()
+        if self.last_update_time is not None and timestamp - self.last_update_time < 1.0 / self.rate_hz:
+            return None
+
+        left, right = self.mix(displacement_x, displacement_y)
+        delta = {}
+        # Always forward an exact stop, otherwise only changes larger than epsilon
+        if abs(left - self.left) >= self.delta_epsilon or (left == 0.0 and self.left != 0.0):
+            delta['l'] = left
+        if abs(right - self.right) >= self.delta_epsilon or (right == 0.0 and self.right != 0.0):
+            delta['r'] = right
+        if not delta:
+            return None
+
+        self.left = delta.get('l', self.left)
+        self.right = delta.get('r', self.right)
+        self.last_update_time = timestamp
+        return delta
+
+    def stop(self):
+        """Delta bringing both wheels to zero (None if already stopped)"""
+        if not self.moving:
+            return None
+        self.reset()
+        return {'l': 0.0, 'r': 0.0}
@@ -2,6 +2,10 @@ import asyncio
 import websockets
 import logging
 
+from json_codec import event_message, loads
+from pubsub import TopicRouter, parse_topics, topic_for
+from compression import server_extensions
+
 WS_PORT = 5000
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
@@ -10,9 +14,28 @@ log = logging.getLogger("WSServer")
 class WSServer:
     def __init__(self):
         self.clients = set()
+        self.router = TopicRouter()  # new clients receive every topic until they SUBSCRIBE
+
+    async def route(self, websocket, message):
+        try:
+            data = loads(message)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+
+        if (data.get('type') or data.get('event')) == 'SUBSCRIBE':
+            topics = self.router.subscribe(websocket, parse_topics(data))
+            log.info(f"📬 Subscribed {getattr(websocket, 'remote_address', None)} to {topics}")
+            await websocket.send(event_message("SUBSCRIBED", {"topics": topics}))
+            return
+
+        for d in await self.router.publish(topic_for(data), message, exclude=websocket):
+            self.clients.discard(d)
 
     async def handle_client(self, websocket, path=None):   # <- path optional for compatibility
         self.clients.add(websocket)
+        self.router.add(websocket)
         peer = getattr(websocket, "remote_address", None)
         log.info(f"✅ Client connected: {peer}")
 
@@ -20,20 +43,8 @@ class WSServer:
             async for message in websocket:
                 log.info(f"📩 Received: {message}")
 
-                # Broadcast to everyone else
-                dead = []
-                for client in list(self.clients):
-                    if client is websocket:
-                        continue
-                    try:
-                        await client.send(message)
-                    except websockets.exceptions.ConnectionClosed:
-                        dead.append(client)
-                    except Exception as err:
-                        log.error(f"❌ Error sending to client: {err}")
-                        dead.append(client)
-                for d in dead:
-                    self.clients.discard(d)
+                # Forward to the other clients subscribed to the message's topic
+                await self.route(websocket, message)
 
         except websockets.exceptions.ConnectionClosed as e:
             log.info(f"🔌 Client closed: code={e.code} reason={e.reason}")
@@ -41,6 +52,7 @@ class WSServer:
             log.error(f"❌ Handler error: {err}")
         finally:
             self.clients.discard(websocket)
+            self.router.remove(websocket)
             log.info("❌ Client disconnected")
 
 async def main():
@@ -54,7 +66,10 @@ async def main():
         port=WS_PORT,
         ping_interval=20,
         ping_timeout=20,
-        max_size=2**20
+        max_size=2**20,
+        # permessage-deflate for JSON above WS_COMPRESS_THRESHOLD only (see compression.py)
+        compression=None,
+        extensions=server_extensions()
     ):
         log.info(f"🚀 WebSocket server started on ws://127.0.0.1:{WS_PORT}")
         await asyncio.Future()  # run forever
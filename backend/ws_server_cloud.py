@@ -1,53 +1,96 @@
 import asyncio
-import websockets
 import logging
 import os
-from aiohttp import web
+import signal
+import sys
+from aiohttp import web, WSMsgType
 from aiohttp.web import Response
 import json
 
+from json_codec import event_message, loads, send_json
+from compression import aiohttp_compress
+from pubsub import TopicRouter, parse_topics, topic_for
+from backplane import BACKPLANE_URL, create_backplane
+
 # Cloud deployment configuration
 WS_PORT = int(os.environ.get('PORT', 5000))
 WS_HOST = os.environ.get('WS_HOST', '0.0.0.0')
+# HTTP and WebSocket share this one listener: ws://host:PORT/ (or /ws)
+# WORKERS > 1 runs that many processes on the same port (SO_REUSEPORT); they
+# exchange broadcasts through the backplane (BACKPLANE_URL, see backplane.py)
+WORKERS = int(os.environ.get('WORKERS', 1))
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 log = logging.getLogger("WSServer")
 
 class WSServer:
-    def __init__(self):
+    def __init__(self, backplane=None):
         self.clients = set()
+        self.router = TopicRouter()  # new clients receive every topic until they SUBSCRIBE
+        self.backplane = backplane
+
+    async def start_backplane(self):
+        if self.backplane:
+            await self.backplane.start(self.deliver_remote)
+
+    async def deliver_remote(self, topic, message):
+        """A message routed by another worker / replica: deliver to local subscribers"""
+        for d in await self.router.publish(topic, message):
+            self.clients.discard(d)
+
+    async def route(self, websocket, message):
+        try:
+            data = loads(message)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+
+        if (data.get('type') or data.get('event')) == 'SUBSCRIBE':
+            topics = self.router.subscribe(websocket, parse_topics(data))
+            log.info(f"📬 Subscribed {getattr(websocket, 'remote_address', None)} to {topics}")
+            await send_json(websocket, event_message("SUBSCRIBED", {"topics": topics}))
+            return
+
+        topic = topic_for(data)
+        for d in await self.router.publish(topic, message, exclude=websocket):
+            self.clients.discard(d)
+        if self.backplane:
+            # A backplane outage must not end the sender's connection
+            try:
+                await self.backplane.publish(topic, message)
+            except Exception as e:
+                log.error(f"❌ Backplane publish failed: {e}")
+
+    async def handle_client(self, request):
+        """WebSocket upgrade on the HTTP listener; plain GETs of / get the banner"""
+        websocket = web.WebSocketResponse(heartbeat=20, compress=aiohttp_compress())
+        if not websocket.can_prepare(request).ok:
+            return Response(text="Gesture Control WebSocket Server")
+        await websocket.prepare(request)
+        websocket.remote_address = request.remote
 
-    async def handle_client(self, websocket, path=None):
         self.clients.add(websocket)
-        peer = getattr(websocket, "remote_address", None)
-        log.info(f"✅ Client connected: {peer}")
+        self.router.add(websocket)
+        log.info(f"✅ Client connected: {request.remote}")
 
         try:
-            async for message in websocket:
-                log.info(f"📩 Received: {message}")
-
-                # Broadcast to everyone else
-                dead = []
-                for client in list(self.clients):
-                    if client is websocket:
-                        continue
-                    try:
-                        await client.send(message)
-                    except websockets.exceptions.ConnectionClosed:
-                        dead.append(client)
-                    except Exception as err:
-                        log.error(f"❌ Error sending to client: {err}")
-                        dead.append(client)
-                for d in dead:
-                    self.clients.discard(d)
-
-        except websockets.exceptions.ConnectionClosed as e:
-            log.info(f"🔌 Client closed: code={e.code} reason={e.reason}")
+            async for msg in websocket:
+                if msg.type == WSMsgType.TEXT:
+                    log.debug(f"📩 Received: {msg.data}")
+                    # Forward to the other clients subscribed to the message's topic
+                    await self.route(websocket, msg.data)
+                elif msg.type == WSMsgType.BINARY:
+                    await self.route(websocket, msg.data)
+                elif msg.type == WSMsgType.ERROR:
+                    log.info(f"🔌 Client closed with error: {websocket.exception()}")
         except Exception as err:
             log.error(f"❌ Handler error: {err}")
         finally:
             self.clients.discard(websocket)
-            log.info("❌ Client disconnected")
+            self.router.remove(websocket)
+            log.info(f"❌ Client disconnected (code={websocket.close_code})")
+        return websocket
 
     # Health check endpoint for cloud platforms
     async def health_check(self, request):
@@ -55,48 +98,75 @@ class WSServer:
             text=json.dumps({
                 "status": "healthy",
                 "clients": len(self.clients),
+                "worker": os.getpid(),
+                "backplane": type(self.backplane).__name__ if self.backplane else None,
                 "service": "gesture-control-ws"
             }),
             content_type="application/json"
         )
 
-async def main():
-    server = WSServer()
-    
-    # Create HTTP server for health checks
+def create_app(server):
     app = web.Application()
     app.router.add_get('/health', server.health_check)
-    app.router.add_get('/', lambda r: Response(text="Gesture Control WebSocket Server"))
-    
-    # Start HTTP server
-    runner = web.AppRunner(app)
+    app.router.add_get('/', server.handle_client)
+    app.router.add_get('/ws', server.handle_client)
+    return app
+
+async def serve(backplane_url=BACKPLANE_URL, reuse_port=False):
+    server = WSServer(create_backplane(backplane_url))
+    await server.start_backplane()
+
+    # One aiohttp listener serves /health and the WebSocket relay
+    runner = web.AppRunner(create_app(server), access_log=None)
     await runner.setup()
-    site = web.TCPSite(runner, WS_HOST, WS_PORT)
+    site = web.TCPSite(runner, WS_HOST, WS_PORT, reuse_port=reuse_port or None)
     await site.start()
-    
-    # Start WebSocket server on different port for development
-    # In production, use same port with path routing
-    ws_port = WS_PORT if os.environ.get('PORT') else 5001
-    
-    log.info(f"🚀 Starting WebSocket server on {WS_HOST}:{ws_port}")
+
+    log.info(f"🚀 WebSocket server on ws://{WS_HOST}:{WS_PORT}/")
     log.info(f"🌐 Health check available at http://{WS_HOST}:{WS_PORT}/health")
-    
-    async with websockets.serve(
-        server.handle_client, 
-        WS_HOST, 
-        ws_port,
-        ping_interval=20,
-        ping_timeout=10,
-        compression=None
-    ):
-        log.info("✅ WebSocket server started successfully")
-        # Keep the server running
-        try:
-            await asyncio.Future()  # Run forever
-        except KeyboardInterrupt:
-            log.info("🛑 Server shutdown requested")
-        finally:
-            await runner.cleanup()
+    log.info("✅ WebSocket server started successfully")
+    try:
+        await asyncio.Future()  # Run forever
+    except KeyboardInterrupt:
+        log.info("🛑 Server shutdown requested")
+    finally:
+        await server.backplane.close()
+        await runner.cleanup()
+
+def run_worker(backplane_url, reuse_port):
+    try:
+        asyncio.run(serve(backplane_url, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+def main(workers=WORKERS):
+    if workers <= 1:
+        run_worker(BACKPLANE_URL, False)
+        return
+
+    import multiprocessing
+    # Workers on one host share a Unix-socket bus unless a backplane is configured
+    backplane_url = BACKPLANE_URL
+    if backplane_url.startswith('memory'):
+        backplane_url = f"unix:///tmp/gesture-control-{WS_PORT}.sock"
+    log.info(f"🚀 Starting {workers} workers on port {WS_PORT} (backplane {backplane_url})")
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(backplane_url, True), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Daemon workers are not reaped when the parent is SIGTERMed - stop them explicitly
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for process in processes:
+            process.join()
+    except (KeyboardInterrupt, SystemExit):
+        log.info("🛑 Stopping workers")
+    finally:
+        for process in processes:
+            process.terminate()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -2,20 +2,36 @@
 # This would be an enhanced version using YOLO for object detection + specialized eye tracking
 
 import cv2
-import torch
-from ultralytics import YOLO
 import numpy as np
-import mediapipe as mp
-from scipy.spatial.distance import euclidean
+import math
 import time
 import asyncio
 import websockets
 import json
+import os
+
+from frame_buffers import FrameBufferPool, align_roi
+from signal_buffers import RingBuffer
+from gaze import IrisGazeEstimator
+from gaze_calibration import GazeMapping
+from eye_movements import FixationDetector
+from face_landmarks import landmarks_to_array
+
+# Face detector weights. Point YOLO_FACE_MODEL at an INT8 ONNX export produced by
+# quantize_face_detector.py to run the quantized detector on CPU-only boards.
+DEFAULT_FACE_MODEL = os.environ.get('YOLO_FACE_MODEL', 'yolov8n-face.pt')
 
 class YOLOEyeTracker:
-    def __init__(self):
-        # Load YOLOv8 model for face detection
-        self.yolo_model = YOLO('yolov8n-face.pt')  # Face detection model
+    def __init__(self, model_path=None, face_confidence=0.7):
+        # ultralytics (which pulls in torch) and mediapipe take seconds to import -
+        # only pay for them when a tracker is actually built
+        from ultralytics import YOLO
+        import mediapipe as mp
+        
+        # Load YOLOv8 model for face detection (.pt fp32 or exported .onnx / INT8 .onnx)
+        self.model_path = model_path or DEFAULT_FACE_MODEL
+        self.yolo_model = YOLO(self.model_path, task='detect')  # Face detection model
+        self.face_confidence = face_confidence
         
         # MediaPipe for detailed eye landmarks
         self.mp_face_mesh = mp.solutions.face_mesh.FaceMesh(
@@ -29,18 +45,28 @@ class YOLOEyeTracker:
         self.LEFT_EYE_LANDMARKS = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
         self.RIGHT_EYE_LANDMARKS = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
         
-        # Gaze estimation parameters
-        self.gaze_history = []
+        # Gaze estimation parameters (iris position within each eye, refine_landmarks output)
+        self.gaze_estimator = IrisGazeEstimator()
         self.gaze_smoothing_window = 5
+        self.gaze_history = RingBuffer(self.gaze_smoothing_window, dims=2)
         
-        # Eye movement thresholds
-        self.SACCADE_THRESHOLD = 0.02  # Minimum movement to detect saccade
+        # Eye movement thresholds (saccade/fixation in normalized gaze units, see eye_movements.py)
+        self.SACCADE_THRESHOLD = 1.0   # Gaze velocity (units/s) separating saccades from fixations
         self.FIXATION_DURATION = 0.3   # Time to confirm fixation
         self.BLINK_THRESHOLD = 0.2     # Eye aspect ratio threshold
+        self.fixation_detector = FixationDetector(
+            method=os.environ.get('FIXATION_METHOD', 'idt'),
+            velocity_threshold=self.SACCADE_THRESHOLD,
+            min_duration=self.FIXATION_DURATION
+        )
         
         # Calibration data
         self.calibration_points = {}
         self.is_calibrated = False
+        self.gaze_mapping = None
+
+        # Preallocated RGB buffers for the face crop (keyed by aligned ROI size)
+        self.buffer_pool = FrameBufferPool()
         
     def detect_faces_yolo(self, frame):
         """Use YOLOv8 to detect faces in the frame"""
@@ -55,7 +81,7 @@ class YOLOEyeTracker:
                     x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
                     confidence = box.conf[0].cpu().numpy()
                     
-                    if confidence > 0.7:  # Face confidence threshold
+                    if confidence > self.face_confidence:  # Face confidence threshold
                         faces.append({
                             'bbox': (int(x1), int(y1), int(x2), int(y2)),
                             'confidence': confidence
@@ -65,11 +91,13 @@ class YOLOEyeTracker:
     
     def extract_eye_landmarks(self, frame, face_bbox):
         """Extract detailed eye landmarks using MediaPipe"""
-        x1, y1, x2, y2 = face_bbox
+        # Snap the crop to a coarse grid so only a few buffer sizes are ever needed
+        x1, y1, x2, y2 = align_roi(face_bbox, frame.shape)
         
-        # Crop face region for better landmark detection
+        # Crop face region for better landmark detection (a view - no copy),
+        # converting only the ROI into a pooled RGB buffer
         face_roi = frame[y1:y2, x1:x2]
-        face_rgb = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
+        face_rgb = self.buffer_pool.cvt_color(face_roi, cv2.COLOR_BGR2RGB)
         
         # Get face landmarks
         results = self.mp_face_mesh.process(face_rgb)
@@ -98,56 +126,66 @@ class YOLOEyeTracker:
             eye_landmarks['left_eye'] = left_eye_points
             eye_landmarks['right_eye'] = right_eye_points
             
+            # Iris ratios are scale invariant, so the crop-relative landmarks are fine
+            eye_landmarks['iris_gaze'] = self.gaze_estimator.estimate_from_landmarks(landmarks)
+            
             return eye_landmarks
         
         return None
     
+    def face_landmark_points(self, frame, face_bbox):
+        """FaceMesh on the face crop, re-projected to (N, 3) landmarks normalized to the full frame"""
+        x1, y1, x2, y2 = align_roi(face_bbox, frame.shape)
+        face_rgb = self.buffer_pool.cvt_color(frame[y1:y2, x1:x2], cv2.COLOR_BGR2RGB)
+        results = self.mp_face_mesh.process(face_rgb)
+        if not results.multi_face_landmarks:
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        points = landmarks_to_array(results.multi_face_landmarks[0])
+        points[:, 0] = (points[:, 0] * (x2 - x1) + x1) / frame_w
+        points[:, 1] = (points[:, 1] * (y2 - y1) + y1) / frame_h
+        points[:, 2] *= (x2 - x1) / frame_w  # z shares the x scale in FaceMesh
+        return points
+
     def calculate_eye_aspect_ratio(self, eye_points):
         """Calculate Eye Aspect Ratio (EAR) for blink detection"""
         # Vertical eye landmarks
-        A = euclidean(eye_points[1], eye_points[5])
-        B = euclidean(eye_points[2], eye_points[4])
+        A = math.dist(eye_points[1], eye_points[5])
+        B = math.dist(eye_points[2], eye_points[4])
         
         # Horizontal eye landmark
-        C = euclidean(eye_points[0], eye_points[3])
+        C = math.dist(eye_points[0], eye_points[3])
         
         # Eye aspect ratio
         ear = (A + B) / (2.0 * C)
         return ear
     
     def estimate_gaze_direction(self, eye_landmarks):
-        """Estimate gaze direction using eye landmarks"""
-        if not eye_landmarks:
+        """Estimate gaze direction from the iris position within each eye
+
+        Returns normalized (x, y) in roughly [-1, 1], (0, 0) looking straight ahead.
+        """
+        if not eye_landmarks or not eye_landmarks.get('iris_gaze'):
             return None
         
-        left_eye = eye_landmarks['left_eye']
-        right_eye = eye_landmarks['right_eye']
-        
-        # Calculate eye centers
-        left_center = np.mean(left_eye, axis=0)
-        right_center = np.mean(right_eye, axis=0)
-        
-        # Calculate pupil positions (simplified - would need iris detection for accuracy)
-        # This is a simplified approach - real implementation would use iris detection
-        left_pupil = left_center
-        right_pupil = right_center
-        
-        # Calculate gaze vector (simplified)
-        gaze_x = (left_pupil[0] + right_pupil[0]) / 2
-        gaze_y = (left_pupil[1] + right_pupil[1]) / 2
-        
-        return (gaze_x, gaze_y)
+        iris_gaze = eye_landmarks['iris_gaze']
+        return (iris_gaze['x'], iris_gaze['y'])
     
-    def detect_eye_movements(self, eye_landmarks):
+    def detect_eye_movements(self, eye_landmarks, timestamp=None):
         """Detect various eye movements and interactions"""
         if not eye_landmarks:
             return None
+        if timestamp is None:
+            timestamp = time.time()
         
         movements = {
             'blink': False,
             'saccade': False,
             'fixation': False,
+            'fixation_events': [],
             'gaze_direction': None,
+            'smoothed_gaze': None,
             'interaction_point': None
         }
         
@@ -162,17 +200,16 @@ class YOLOEyeTracker:
         gaze_point = self.estimate_gaze_direction(eye_landmarks)
         movements['gaze_direction'] = gaze_point
         
-        # 3. Saccade Detection (rapid eye movements)
-        if gaze_point and len(self.gaze_history) > 0:
-            last_gaze = self.gaze_history[-1]
-            movement_distance = euclidean(gaze_point, last_gaze)
-            movements['saccade'] = movement_distance > self.SACCADE_THRESHOLD
+        # 3. Fixation / saccade classification (I-DT or I-VT on the gaze stream)
+        if gaze_point:
+            movements['fixation_events'] = self.fixation_detector.update(gaze_point[0], gaze_point[1], timestamp)
+            movements['saccade'] = self.fixation_detector.is_saccade
+            movements['fixation'] = self.fixation_detector.in_fixation
         
-        # 4. Update gaze history for smoothing
+        # 4. Update gaze history for smoothing (window mean is maintained incrementally)
         if gaze_point:
             self.gaze_history.append(gaze_point)
-            if len(self.gaze_history) > self.gaze_smoothing_window:
-                self.gaze_history.pop(0)
+            movements['smoothed_gaze'] = tuple(self.gaze_history.mean())
         
         # 5. Screen Interaction Points (if calibrated)
         if self.is_calibrated and gaze_point:
@@ -187,16 +224,39 @@ class YOLOEyeTracker:
         if not self.is_calibrated:
             return None
         
-        # Simplified mapping - real implementation would use calibration matrix
-        screen_x = gaze_point[0] / 640 * 1920  # Assuming 640x480 -> 1920x1080
-        screen_y = gaze_point[1] / 480 * 1080
+        # Fitted polynomial mapping: one small matrix multiply per frame
+        screen_x, screen_y = self.gaze_mapping.apply(gaze_point)
         
-        return (screen_x, screen_y)
+        return (float(screen_x), float(screen_y))
     
-    def calibrate_gaze(self, calibration_points):
-        """Calibrate gaze tracking for accurate screen mapping"""
+    def calibrate_gaze(self, calibration_points, user_id=None):
+        """Calibrate gaze tracking for accurate screen mapping
+
+        `calibration_points` maps screen (x, y) targets to the gaze samples
+        collected while the user fixated them. With `user_id` the fitted
+        mapping is cached on disk (see load_gaze_calibration).
+        """
         self.calibration_points = calibration_points
+        screen_points = []
+        gaze_points = []
+        for screen_point, samples in calibration_points.items():
+            screen_points.append(screen_point)
+            gaze_points.append(np.median(np.asarray(samples, dtype=np.float64).reshape(-1, 2), axis=0))
+        
+        self.gaze_mapping = GazeMapping.fit(gaze_points, screen_points)
+        if user_id is not None:
+            self.gaze_mapping.save(user_id)
+        self.is_calibrated = True
+        return self.gaze_mapping.error
+    
+    def load_gaze_calibration(self, user_id):
+        """Reuse a user's cached gaze mapping; returns True if one was found"""
+        mapping = GazeMapping.load(user_id)
+        if mapping is None:
+            return False
+        self.gaze_mapping = mapping
         self.is_calibrated = True
+        return True
         
     def process_frame(self, frame):
         """Main processing function"""
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Tests for the relay pub/sub backplane between worker processes.
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from backplane import (InMemoryBackplane, RedisBackplane, UnixSocketBackplane,
+                       _resp_command, _resp_read, create_backplane)
+from ws_server_cloud import WSServer
+
+class FakeClient:
+    def __init__(self):
+        self.received = []
+
+    async def send(self, text):
+        self.received.append(json.loads(text))
+
+async def wait_for(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+def test_relay_workers_share_messages_over_backplane():
+    """A message routed by one worker reaches subscribers connected to another, but is not echoed back"""
+    async def scenario():
+        first, second = WSServer(InMemoryBackplane('test')), WSServer(InMemoryBackplane('test'))
+        await first.start_backplane()
+        await second.start_backplane()
+        sender, local, remote, dashboard = (FakeClient() for _ in range(4))
+        first.router.add(sender)
+        first.router.add(local)
+        second.router.add(remote, ['control'])
+        second.router.add(dashboard, ['metrics'])
+
+        await first.route(sender, json.dumps({"event": "NOSE_MOVE", "payload": {"direction": "UP"}}))
+        await first.backplane.close()
+        await second.backplane.close()
+        return sender, local, remote, dashboard
+
+    sender, local, remote, dashboard = asyncio.run(scenario())
+    assert sender.received == []
+    assert [m["event"] for m in local.received] == ["NOSE_MOVE"]
+    assert [m["event"] for m in remote.received] == ["NOSE_MOVE"]
+    assert dashboard.received == []
+
+def test_unix_socket_backplane_hub_and_worker():
+    """The first process becomes the hub; lines flow both ways; bytes survive the envelope"""
+    async def scenario(path):
+        hub, worker = create_backplane(f"unix://{path}"), UnixSocketBackplane(path)
+        got_hub, got_worker = [], []
+
+        async def on_hub(topic, message):
+            got_hub.append((topic, message))
+
+        async def on_worker(topic, message):
+            got_worker.append((topic, message))
+
+        await hub.start(on_hub)
+        await worker.start(on_worker)
+        assert hub.is_hub and not worker.is_hub
+        await wait_for(lambda: hub._peers)
+
+        await worker.publish('control', '{"event":"NOSE_MOVE"}')
+        await hub.publish('video', b'\x00\xffjpeg')
+        await wait_for(lambda: got_hub and got_worker)
+        await worker.close()
+        await hub.close()
+        return got_hub, got_worker
+
+    with tempfile.TemporaryDirectory() as tmp:
+        got_hub, got_worker = asyncio.run(scenario(os.path.join(tmp, 'bus.sock')))
+    assert got_hub == [('control', '{"event":"NOSE_MOVE"}')]
+    assert got_worker == [('video', b'\x00\xffjpeg')]
+
+def test_unix_socket_backplane_large_and_oversized_messages():
+    """Relayed frames above the 64 KiB StreamReader default pass; lines over max_line are dropped, not fatal"""
+    async def scenario(path):
+        hub, worker = UnixSocketBackplane(path, max_line=256 * 1024), UnixSocketBackplane(path, max_line=256 * 1024)
+        got_hub, got_worker = [], []
+
+        async def on_hub(topic, message):
+            got_hub.append(message)
+
+        async def on_worker(topic, message):
+            got_worker.append(message)
+
+        await hub.start(on_hub)
+        await worker.start(on_worker)
+        await wait_for(lambda: hub._peers)
+
+        frame = '{"type":"camera_frame","image":"' + 'A' * 100_000 + '"}'
+        await worker.publish('video', frame)
+        await hub.publish('video', frame)
+        await wait_for(lambda: got_hub and got_worker)
+        # Oversized in both directions, then normal traffic still flows
+        huge = 'B' * 300_000
+        await worker.publish('video', huge)
+        await hub.publish('video', huge)
+        await worker.publish('control', 'after')
+        await hub.publish('control', 'after')
+        await wait_for(lambda: len(got_hub) == 2 and len(got_worker) == 2)
+        await worker.close()
+        await hub.close()
+        return got_hub, got_worker, frame
+
+    with tempfile.TemporaryDirectory() as tmp:
+        got_hub, got_worker, frame = asyncio.run(scenario(os.path.join(tmp, 'bus.sock')))
+    assert got_hub == [frame, 'after']
+    assert got_worker == [frame, 'after']
+
+def test_relay_survives_backplane_publish_errors():
+    """A failing backplane is logged; the sender's local delivery still happens"""
+    class BrokenBackplane(InMemoryBackplane):
+        async def publish(self, topic, message):
+            raise ConnectionResetError("backplane down")
+
+    async def scenario():
+        server = WSServer(BrokenBackplane('broken'))
+        sender, local = FakeClient(), FakeClient()
+        server.router.add(sender)
+        server.router.add(local)
+        await server.route(sender, json.dumps({"event": "NOSE_MOVE"}))
+        return local
+
+    assert [m["event"] for m in asyncio.run(scenario()).received] == ["NOSE_MOVE"]
+
+def test_redis_backplane_against_resp_server():
+    """The built-in RESP client subscribes and publishes through a Redis-compatible server"""
+    async def scenario():
+        subscribers = []
+
+        async def serve(reader, writer):
+            while True:
+                try:
+                    command = await _resp_read(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    return
+                if command[0] == b'SUBSCRIBE':
+                    subscribers.append(writer)
+                    writer.write(b"*3\r\n$9\r\nsubscribe\r\n" + _resp_command(command[1])[4:] + b":1\r\n")
+                elif command[0] == b'PUBLISH':
+                    for sub in subscribers:
+                        sub.write(_resp_command('message', command[1], command[2]))
+                    writer.write(f":{len(subscribers)}\r\n".encode())
+                await writer.drain()
+
+        server = await asyncio.start_server(serve, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        a, b = RedisBackplane('127.0.0.1', port), create_backplane(f"redis://127.0.0.1:{port}/0")
+        received = []
+
+        async def on_message(topic, message):
+            received.append((topic, message))
+
+        await a.start(on_message)
+        await b.start(on_message)
+        await a.publish('metrics', '{"event":"METRICS"}')
+        await wait_for(lambda: received)
+        await asyncio.sleep(0.05)
+        await a.close()
+        await b.close()
+        server.close()
+        return received, a.received, b.received
+
+    received, own, other = asyncio.run(scenario())
+    assert received == [('metrics', '{"event":"METRICS"}')]
+    assert (own, other) == (0, 1)
+
+def test_redis_backplane_resubscribes_after_connection_loss():
+    """Dropped Redis connections are re-established: subscription and publishing resume"""
+    async def scenario():
+        subscribers = []
+        connections = []
+
+        async def serve(reader, writer):
+            connections.append(writer)
+            while True:
+                try:
+                    command = await _resp_read(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    return
+                if command[0] == b'SUBSCRIBE':
+                    subscribers.append(writer)
+                    writer.write(b"*3\r\n$9\r\nsubscribe\r\n" + _resp_command(command[1])[4:] + b":1\r\n")
+                elif command[0] == b'PUBLISH':
+                    for sub in subscribers:
+                        if not sub.is_closing():
+                            sub.write(_resp_command('message', command[1], command[2]))
+                    writer.write(f":{len(subscribers)}\r\n".encode())
+                await writer.drain()
+
+        server = await asyncio.start_server(serve, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        a = RedisBackplane('127.0.0.1', port, reconnect_delay=0.01)
+        b = RedisBackplane('127.0.0.1', port, reconnect_delay=0.01)
+        received = []
+
+        async def on_message(topic, message):
+            received.append(message)
+
+        await a.start(on_message)
+        await b.start(on_message)
+        # Simulate a Redis restart: every connection is dropped
+        for writer in connections:
+            writer.close()
+        subscribers.clear()
+        await wait_for(lambda: a._pub is None and len(subscribers) == 2)
+        await a.publish('control', 'after restart')
+        await wait_for(lambda: received)
+        await a.close()
+        await b.close()
+        server.close()
+        return received
+
+    assert asyncio.run(scenario()) == ['after restart']
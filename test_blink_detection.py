@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for debounced eye-closure detection.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from eye_closure import EyeClosureStateMachine
+
+def run(machine, ears, fps=30.0, start=100.0):
+    """Feed EAR samples at a fixed capture rate and collect transitions"""
+    events = []
+    for i, ear in enumerate(ears):
+        event = machine.update(ear, start + i / fps)
+        if event:
+            events.append(event)
+    return events
+
+def test_noisy_blink_produces_one_close_and_one_open():
+    """EAR flicker around the thresholds during one blink is debounced"""
+    machine = EyeClosureStateMachine(enter_threshold=0.21, exit_threshold=0.25, min_open_frames=2)
+    ears = [0.30] * 5 + [0.20, 0.22, 0.15, 0.26, 0.23, 0.12, 0.24] + [0.30] * 5
+
+    events = run(machine, ears)
+
+    assert [e["transition"] for e in events] == ["closed", "opened"]
+    closed, opened = events
+    assert closed["timestamp"] == 100.0 + 5 / 30.0
+    assert opened["timestamp"] == 100.0 + 12 / 30.0
+    assert abs(opened["duration"] - 7 / 30.0) < 1e-9
+
+def test_short_dips_and_refractory_are_ignored():
+    """Dips shorter than the close dwell, or right after reopening, do not close"""
+    machine = EyeClosureStateMachine(min_close_frames=2, min_open_frames=1, refractory=0.1)
+    ears = [0.30, 0.18, 0.30, 0.30]           # one-frame dip: ignored
+    ears += [0.10, 0.10, 0.30]                # real blink
+    ears += [0.10, 0.10]                      # within 100 ms of reopening: ignored
+    ears += [0.30] * 5
+
+    events = run(machine, ears)
+
+    assert [e["transition"] for e in events] == ["closed", "opened"]
+    assert not machine.is_closed
+
+def blink_sequence(blinks, fps=5.0, total=None, open_ear=0.30, closed_ear=0.08):
+    """(ear, capture_time) samples for blinks given as (start, duration) in seconds"""
+    end = total or max(start + duration for start, duration in blinks) + 1.0
+    samples = []
+    for i in range(int(end * fps)):
+        t = 1000.0 + i / fps
+        closed = any(start <= t - 1000.0 < start + duration for start, duration in blinks)
+        samples.append((closed_ear if closed else open_ear, t))
+    return samples
+
+def replay(samples, mode='STOP'):
+    """Replay samples as fast as possible, timing comes only from capture stamps"""
+    from movements import BlinkDetector
+
+    detector = BlinkDetector()
+    return [r["type"] for r in (detector.process_ear(ear, t, mode) for ear, t in samples) if r]
+
+def test_blink_classification_uses_capture_time():
+    """Replay far faster than realtime still classifies single / double / long blinks"""
+    assert replay(blink_sequence([(1.0, 0.4)], total=7.0)) == ["single"]
+    assert replay(blink_sequence([(1.0, 0.4), (2.4, 0.4)])) == ["double"]
+    assert replay(blink_sequence([(1.0, 2.4)])) == ["long"]
+
+def test_place_mode_single_blink_timeout():
+    """In PLACE mode a lone blink resolves after ~1 s of capture time"""
+    samples = blink_sequence([(1.0, 0.4)], total=4.0)
+    assert replay(samples, mode='PLACE') == ["single"]
+    assert replay(samples, mode='STOP') == []
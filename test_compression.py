@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the WebSocket compression policy.
+"""
+
+import sys
+import os
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from websockets.extensions.permessage_deflate import PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from compression import CompressionPolicy, PolicyDeflateFactory, PolicyPerMessageDeflate
+from json_codec import event_message
+from ws_server_cloud import WSServer, create_app
+
+STATUS = event_message("METRICS", {f"stage_{i}_ms": i * 1.5 for i in range(40)})
+MEDIA = event_message("VIDEO_FRAME", {"image": "data:image/jpeg;base64," + "QUJD" * 300})
+
+def test_policy_skips_small_binary_and_media_messages():
+    """Only text messages above the threshold that are not images are compressed"""
+    policy = CompressionPolicy(threshold=256)
+    assert policy.should_compress(STATUS)
+    assert not policy.should_compress('{"event":"FACE_STATUS"}')
+    assert not policy.should_compress(MEDIA)
+    assert not policy.should_compress(MEDIA.encode())
+    assert not policy.should_compress(STATUS.encode(), binary=True)
+    assert CompressionPolicy(threshold=256, compress_media=True).should_compress(MEDIA)
+    assert not CompressionPolicy(enabled=False).should_compress(STATUS)
+
+def test_websockets_extension_leaves_skipped_frames_uncompressed():
+    """Compressed and skipped messages interleave and still decode on a standard client"""
+    factory = PolicyDeflateFactory(CompressionPolicy(threshold=256))
+    _, server = factory.process_request_params([], [])
+    assert type(server) is PolicyPerMessageDeflate
+    client = PerMessageDeflate(False, False, 15, 15)
+
+    sent = [STATUS, '{"event":"FACE_STATUS"}', MEDIA, STATUS]
+    frames = [server.encode(Frame(Opcode.TEXT, text.encode())) for text in sent]
+    assert [f.rsv1 for f in frames] == [True, False, False, True]
+    assert len(frames[3].data) < len(frames[0].data) < len(STATUS)  # context takeover kept
+    assert [bytes(client.decode(f).data).decode() for f in frames] == sent
+
+def test_aiohttp_relay_negotiates_deflate_with_shared_compressor():
+    """ws_server_cloud negotiates deflate (aiohttp's per-connection compressor) and relays messages intact"""
+    async def scenario():
+        server = WSServer()
+        runner = web.AppRunner(create_app(server))
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                sender = await session.ws_connect(f"http://127.0.0.1:{port}/", compress=15)
+                listener = await session.ws_connect(f"http://127.0.0.1:{port}/", compress=15)
+                await asyncio.sleep(0.05)
+                wbits = next(iter(server.clients)).compress
+                await sender.send_str(STATUS)
+                await sender.send_str(MEDIA)
+                await sender.send_str(STATUS)
+                received = [(await listener.receive(timeout=2)).data for _ in range(3)]
+                await sender.close()
+                await listener.close()
+        finally:
+            await runner.cleanup()
+        return wbits, received
+
+    wbits, received = asyncio.run(scenario())
+    assert wbits == 15
+    assert received == [STATUS, MEDIA, STATUS]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the detection backend registry and the shared frame decoding.
+"""
+
+import sys
+import os
+import asyncio
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import detection_backends
+from detection_backends import (BackgroundBackend, DetectionBackend, available_backends,
+                                create_backend, decode_frame, register_backend, warmup_frames)
+from model_cache import cached_model
+from face_landmarks import ArrayLandmarks, landmarks_to_array, HEAD_POSE_LANDMARKS
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Test backends register on a copy of the registry, dropped after the test"""
+    monkeypatch.setattr(detection_backends, '_BACKENDS', dict(detection_backends._BACKENDS))
+
+def test_registry_and_shared_decode(registry):
+    """Custom backends plug in by name and receive decoded BGR frames"""
+    @register_backend('test_center')
+    class CenterBackend(DetectionBackend):
+        def detect(self, frame):
+            points = np.zeros((478, 3))
+            points[:, :2] = 0.5
+            return self._result(frame, np.array([0.4, 0.4, 0.6, 0.6]), points,
+                                [ArrayLandmarks(points)], confidence=0.9)
+
+    assert {'facemesh', 'face_detection', 'yolo', 'test_center'} <= set(available_backends())
+    with pytest.raises(ValueError):
+        create_backend('does_not_exist')
+
+    frame = np.full((48, 64, 3), 127, dtype=np.uint8)
+    ok, png = cv2.imencode('.png', frame)
+    data_url = "data:image/png;base64," + base64.b64encode(png.tobytes()).decode('ascii')
+    assert np.array_equal(decode_frame(data_url), frame)
+
+    result = create_backend('test_center').detect_faces(data_url)
+    assert result["faces_detected"] and result["image_size"] == (64, 48)
+    assert result["faces"][0]["bbox"]["width"] == pytest.approx(0.2)
+
+    # Array landmarks feed the same estimators as native FaceMesh output
+    landmarks = result["landmarks"][0]
+    assert landmarks.landmark[1].x == 0.5 and len(landmarks.landmark) == 478
+    assert landmarks_to_array(landmarks, HEAD_POSE_LANDMARKS).shape == (6, 3)
+
+    assert create_backend('test_center').detect_faces("not an image")["faces_detected"] is False
+
+def test_background_backend_reports_readiness(registry):
+    """Frames are answered with status 'loading' until the backend is built and warmed up"""
+    @register_backend('test_slow')
+    class SlowBackend(DetectionBackend):
+        def __init__(self):
+            import time
+            time.sleep(0.05)
+            self.calls = 0
+
+        def detect(self, frame):
+            self.calls += 1
+            return self._result(frame)
+
+    async def scenario():
+        detector = BackgroundBackend('test_slow')
+        task = asyncio.create_task(detector.load())
+        await asyncio.sleep(0)
+        assert not detector.ready
+        assert detector.detect(np.zeros((4, 4, 3), np.uint8))["status"] == "loading"
+        await task
+        assert detector.ready and detector.status()["ready"]
+        assert detector.backend.calls == 3  # warm-up frames ran before readiness
+        assert detector.detect(np.zeros((4, 4, 3), np.uint8))["status"] == "success"
+
+        broken = BackgroundBackend('does_not_exist')
+        await broken.load()
+        assert not broken.ready and broken.status()["error"]
+
+    asyncio.run(scenario())
+
+def test_warmup_runs_the_landmark_model_on_a_face():
+    """Warm-up frames show a face, so FaceMesh's landmark/iris stage has run before readiness"""
+    frames = list(warmup_frames(2))
+    assert len(frames) == 2 and frames[0].shape == (480, 640, 3)
+    assert frames[0].std() > 30, "Warm-up frame is a photo, not flat noise"
+
+    pytest.importorskip('mediapipe')
+    backend = create_backend('facemesh')
+    result = backend.warmup(2)
+    backend.close()
+    assert result["faces_detected"]
+    assert landmarks_to_array(result["landmarks"][0]).shape == (478, 3)
+
+def test_async_detection_runs_off_the_event_loop(registry):
+    """Inference runs on the detection thread while the loop keeps handling other work"""
+    import threading
+    import time
+
+    @register_backend('test_blocking')
+    class BlockingBackend(DetectionBackend):
+        def warmup(self, frames=0):
+            pass
+
+        def detect_faces(self, image_data):
+            time.sleep(0.1)
+            return {"faces_detected": False, "face_count": 0, "landmarks": [],
+                    "status": threading.current_thread().name}
+
+    async def scenario():
+        detector = BackgroundBackend('test_blocking')
+        await detector.load()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await detector.detect_faces_async("frame")
+        task.cancel()
+        detector.close()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result["status"].startswith("detect")
+    assert ticks >= 5, "The event loop was blocked during inference"
+
+def test_test_backends_do_not_leak_into_the_registry():
+    """Backends registered by the tests above are gone afterwards"""
+    assert not {'test_center', 'test_slow', 'test_blocking'} & set(available_backends())
+
+def test_model_export_is_cached_across_boots(tmp_path):
+    """.pt weights are exported once; later boots reuse the cached graph"""
+    weights = tmp_path / "face.pt"
+    weights.write_bytes(b"weights")
+    exports = []
+
+    def fake_export(path, export_format, imgsz):
+        exports.append(path)
+        out = tmp_path / "face.onnx"
+        out.write_bytes(b"graph")
+        return str(out)
+
+    cache = tmp_path / "cache"
+    first = cached_model(str(weights), 'onnx', cache_dir=str(cache), exporter=fake_export)
+    second = cached_model(str(weights), 'onnx', cache_dir=str(cache), exporter=fake_export)
+    assert first == second and first.startswith(str(cache)) and first.endswith('.onnx')
+    assert len(exports) == 1
+
+    # No export configured, or weights that are already an exported graph, pass through
+    assert cached_model(str(weights), None, cache_dir=str(cache)) == str(weights)
+    assert cached_model(first, 'onnx', cache_dir=str(cache)) == first
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the online per-session EAR threshold calibration.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from ear_calibration import EARCalibrator
+
+def ear_stream(rng, open_level, frames, blink_every=40):
+    """Open-eye EAR with noise and a 3-frame blink every `blink_every` frames"""
+    for i in range(frames):
+        if i % blink_every < 3:
+            yield open_level * 0.35 + rng.normal(0, 0.01)
+        else:
+            yield open_level + rng.normal(0, 0.01)
+
+def test_low_resting_ear_gets_lower_thresholds():
+    """A user resting near the old 0.21 threshold no longer triggers phantom closures"""
+    rng = np.random.default_rng(0)
+    calibrator = EARCalibrator()
+    assert calibrator.thresholds() == (0.21, 0.25)
+
+    for ear in ear_stream(rng, 0.22, 600):
+        calibrator.update(ear)
+
+    close_threshold, open_threshold = calibrator.thresholds()
+    assert calibrator.is_calibrated
+    assert close_threshold < open_threshold < 0.22 - 0.03
+    assert close_threshold > 0.22 * 0.35
+
+def test_reconverges_after_lighting_change():
+    """A level shift in the open-eye EAR re-seats the thresholds"""
+    rng = np.random.default_rng(1)
+    calibrator = EARCalibrator()
+    for ear in ear_stream(rng, 0.30, 400):
+        calibrator.update(ear)
+    before = calibrator.reconverge_count
+
+    for ear in ear_stream(rng, 0.15, 200):
+        calibrator.update(ear)
+
+    close_threshold, open_threshold = calibrator.thresholds()
+    assert calibrator.reconverge_count > before
+    assert abs(calibrator.open_mean - 0.15) < 0.01
+    assert 0.15 * 0.35 < close_threshold < open_threshold < 0.15
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for camera frame flow control (latest-frame-wins mailbox and FLOW_CONTROL advice).
+"""
+
+import sys
+import os
+import asyncio
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from flow_control import CAPTURE_LADDER, FlowController, FrameMailbox
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_mailbox_keeps_only_the_latest_frame():
+    """Frames that arrive while the worker is busy replace each other"""
+    async def scenario():
+        mailbox = FrameMailbox()
+        for i in range(4):
+            mailbox.put({"seq": i})
+        frame, waited = await mailbox.get()
+        mailbox.put({"seq": 4})
+        return frame, waited, (await mailbox.get())[0], mailbox.dropped
+
+    frame, waited, following, dropped = asyncio.run(scenario())
+    assert frame == {"seq": 3} and waited >= 0
+    assert following == {"seq": 4}
+    assert dropped == 3
+
+def test_advice_follows_measured_capacity():
+    """Slow frames lower fps and resolution; fast frames raise them again within the limits"""
+    clock = FakeClock()
+    flow = FlowController(min_fps=2, max_fps=15, target_latency=0.25, level_cooldown=3.0, clock=clock)
+    client = object()
+    assert flow.should_send(client) and flow.advice(client)["fps"] == 5.0
+
+    # 600 ms per frame on a struggling Pi, with frames being dropped
+    for i in range(10):
+        clock.now += 1.0
+        flow.record(client, 0.6, 0.8, dropped=i)
+    slow = flow.advice(client)
+    assert slow["fps"] == 2.0
+    assert (slow["width"], slow["quality"]) == CAPTURE_LADDER[-1][::2]
+    assert flow.should_send(client) and not flow.should_send(client)
+
+    # 20 ms per frame once the load is gone
+    for _ in range(20):
+        clock.now += 1.0
+        flow.record(client, 0.02, 0.02, dropped=9)
+    fast = flow.advice(client)
+    assert fast["fps"] == 15.0
+    assert (fast["width"], fast["height"]) == CAPTURE_LADDER[0][:2]
+    assert flow.should_send(client)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the reusable frame buffer pool.
+"""
+
+import sys
+import os
+import threading
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from frame_buffers import FrameBufferPool, align_roi
+
+def frame(seed, height=480, width=640):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+def test_pooled_conversion_reuses_buffers_and_matches_cvtcolor():
+    """Same-shape conversions write into one buffer and give cv2.cvtColor's output, ROI views included"""
+    pool = FrameBufferPool()
+    first = pool.cvt_color(frame(0), cv2.COLOR_BGR2RGB)
+    assert np.array_equal(first, cv2.cvtColor(frame(0), cv2.COLOR_BGR2RGB))
+    second = pool.cvt_color(frame(1), cv2.COLOR_BGR2RGB)
+    assert second is first, "Same shape reuses the buffer"
+    assert np.array_equal(second, cv2.cvtColor(frame(1), cv2.COLOR_BGR2RGB))
+
+    source = frame(2)
+    x1, y1, x2, y2 = align_roi((101, 83, 250, 260), source.shape)
+    assert (x2 - x1) % 32 == 0 and (y2 - y1) % 32 == 0
+    roi = source[y1:y2, x1:x2]
+    assert np.array_equal(pool.cvt_color(roi, cv2.COLOR_BGR2RGB), cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
+    assert pool.stats() == {"buffers": 2, "hits": 1, "misses": 2}
+
+def test_pooled_conversion_allocates_no_frame_per_call():
+    """Steady-state pooled conversions allocate (almost) nothing; plain cvtColor allocates a frame each"""
+    pool = FrameBufferPool()
+    frames = [frame(i) for i in range(10)]
+    pool.cvt_color(frames[0], cv2.COLOR_BGR2RGB)
+    frame_bytes = frames[0].nbytes
+
+    def allocated(convert):
+        tracemalloc.start()
+        for f in frames:
+            convert(f)
+        _, peak = tracemalloc.get_traced_memory()
+        total = sum(stat.size for stat in tracemalloc.take_snapshot().statistics('filename'))
+        tracemalloc.stop()
+        return peak, total
+
+    kept = []
+    pooled_peak, _ = allocated(lambda f: pool.cvt_color(f, cv2.COLOR_BGR2RGB))
+    plain_peak, plain_total = allocated(lambda f: kept.append(cv2.cvtColor(f, cv2.COLOR_BGR2RGB)))
+    assert pooled_peak < frame_bytes / 10
+    assert plain_total >= 10 * frame_bytes
+
+def test_threads_get_their_own_buffers():
+    """A buffer handed to one thread is never overwritten by a conversion on another"""
+    pool = FrameBufferPool()
+    main = pool.cvt_color(frame(0), cv2.COLOR_BGR2RGB)
+    expected = main.copy()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.cvt_color(frame(1), cv2.COLOR_BGR2RGB)))
+    thread.start()
+    thread.join()
+    assert other[0] is not main
+    assert np.array_equal(main, expected)
+    pool.clear()
+    assert pool.get(main.shape) is not main
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for iris-based gaze estimation.
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from gaze import GAZE_LANDMARKS, IrisGazeEstimator
+from gaze_calibration import GazeCalibrationSession, GazeMapping
+from eye_movements import FixationDetector
+
+def eye_points(iris_x, iris_y):
+    """(2, 5, 2) gaze landmarks for two 40x16 px eyes with the iris at a relative offset"""
+    eyes = []
+    for left, top in [(200, 200), (320, 204)]:
+        corner_a = (left, top + 8)
+        corner_b = (left + 40, top + 8)
+        lid_top = (left + 20, top)
+        lid_bottom = (left + 20, top + 16)
+        iris = (left + 20 + iris_x * 20, top + 8 + iris_y * 8)
+        eyes.append([iris, corner_a, corner_b, lid_top, lid_bottom])
+    return np.array(eyes, dtype=np.float64)
+
+def test_iris_position_maps_to_normalized_gaze():
+    """Centred irises give (0, 0); offsets map linearly to [-1, 1]"""
+    estimator = IrisGazeEstimator()
+
+    centre = estimator.estimate(eye_points(0.0, 0.0))
+    assert abs(centre["x"]) < 1e-9 and abs(centre["y"]) < 1e-9
+
+    gaze = estimator.estimate(eye_points(0.5, -0.25))
+    assert abs(gaze["x"] - 0.5) < 1e-9
+    assert abs(gaze["y"] + 0.25) < 1e-9
+    assert np.allclose(gaze["left_eye"], gaze["right_eye"])
+
+def test_calibration_fits_nonlinear_mapping_and_caches_it(tmp_path):
+    """A 9-point calibration recovers a quadratic gaze→screen map; the cached matrix reloads"""
+    def true_screen(g):
+        return (960 + 800 * g[0] + 120 * g[0] * g[0], 540 + 450 * g[1] + 60 * g[0] * g[1])
+
+    session = GazeCalibrationSession(settle_time=0.3, min_samples=3)
+    session.start('alice', (1920, 1080))
+    t = 0.0
+    rng = np.random.default_rng(0)
+    for gx in (-0.8, 0.0, 0.8):
+        for gy in (-0.6, 0.0, 0.6):
+            sx, sy = true_screen((gx, gy))
+            session.set_target(sx, sy, t)
+            # Saccade towards the target during the settle time, then a noisy fixation
+            session.add_gaze(0.0, 0.0, t + 0.1)
+            for k in range(10):
+                noise = rng.normal(0, 0.002, 2)
+                session.add_gaze(gx + noise[0], gy + noise[1], t + 0.35 + k * 0.05)
+            t += 1.0
+
+    mapping = session.finish(save=False)
+    assert mapping.degree == 2
+    assert mapping.error < 5.0
+    assert np.allclose(mapping.apply((0.4, -0.3)), true_screen((0.4, -0.3)), atol=5.0)
+
+    mapping.save('alice', str(tmp_path))
+    cached = GazeMapping.load('alice', str(tmp_path))
+    assert cached.screen == (1920, 1080)
+    assert np.allclose(cached.apply([(0.4, -0.3), (0.1, 0.2)]), mapping.apply([(0.4, -0.3), (0.1, 0.2)]))
+    assert GazeMapping.load('bob', str(tmp_path)) is None
+
+def test_fixation_detector_reports_fixations_dwell_and_saccades():
+    """Two noisy fixations separated by a saccade, for both I-DT and I-VT"""
+    rng = np.random.default_rng(1)
+    samples = []
+    t = 0.0
+    for target, frames in (((-0.5, 0.1), 30), ((0.5, -0.2), 10)):
+        for _ in range(frames):
+            noise = rng.normal(0, 0.005, 2)
+            samples.append((target[0] + noise[0], target[1] + noise[1], t))
+            t += 1 / 30
+
+    for method in ('idt', 'ivt'):
+        detector = FixationDetector(method=method, min_duration=0.1, dwell_time=0.8)
+        events = []
+        saccade_seen = False
+        for x, y, ts in samples:
+            events.extend(detector.update(x, y, ts))
+            saccade_seen = saccade_seen or detector.is_saccade
+
+        kinds = [e["type"] for e in events]
+        assert kinds == ["fixation_start", "dwell", "fixation_end", "fixation_start"], (method, kinds)
+        assert saccade_seen
+        dwell = events[1]
+        assert abs(dwell["x"] + 0.5) < 0.01 and abs(dwell["y"] - 0.1) < 0.01
+        assert dwell["duration"] >= 0.8
+        assert abs(events[3]["x"] - 0.5) < 0.01
+
+def test_fixation_detector_breaks_on_sample_gap():
+    """Gaze resumed after a long gap starts a new fixation instead of completing a dwell"""
+    for method in ('idt', 'ivt'):
+        detector = FixationDetector(method=method, min_duration=0.1, dwell_time=0.8)
+        events = []
+        for k in range(10):
+            events.extend(detector.update(0.2, 0.1, k / 30))
+        assert [e["type"] for e in events] == ["fixation_start"]
+
+        resumed = detector.update(0.2, 0.1, 60.3)
+        assert [e["type"] for e in resumed] == ["fixation_end"], (method, resumed)
+        assert resumed[0]["duration"] < 0.5
+        assert not any(e["type"] == "dwell" for e in detector.update(0.2, 0.1, 60.35))
+
+def test_calibration_reports_held_out_error_and_anchors_on_frame_time():
+    """6 targets: the error is leave-one-out, not the ~0 in-sample residual; untimed targets start at the next frame"""
+    session = GazeCalibrationSession(settle_time=0.3, min_samples=3)
+    session.start('carol', (1920, 1080))
+    rng = np.random.default_rng(2)
+    t = 1_700_000_000.0  # client clock, far from anything the server would use
+    for gx, gy in ((-0.8, -0.6), (0.8, -0.6), (0.0, 0.0), (-0.8, 0.6), (0.8, 0.6), (0.0, 0.6)):
+        session.set_target(960 + 800 * gx + 150 * gx * gx, 540 + 450 * gy)  # no client timestamp
+        session.add_gaze(0.0, 0.0, t)  # first frame after the target: anchors it, still settling
+        for k in range(6):
+            noise = rng.normal(0, 0.01, 2)
+            session.add_gaze(gx + noise[0], gy + noise[1], t + 0.35 + k * 0.05)
+        t += 1.0
+
+    mapping = session.finish(save=False)
+    assert len(session.fixations) == 6, "Every target kept its samples despite no POINT timestamp"
+    assert mapping.degree == 2
+    residual = polynomial_residual(mapping, session.fixations)
+    assert residual < 1e-6, "A quadratic interpolates 6 targets exactly"
+    assert mapping.error > 5.0, "Reported error must come from held-out targets"
+
+def test_gaze_stream_is_opt_in():
+    """PLACE mode sends per-frame GAZE only to clients subscribed to the 'gaze' topic"""
+    import movements
+    from face_landmarks import ArrayLandmarks
+
+    points = np.zeros((478, 3))
+    points[GAZE_LANDMARKS, :2] = eye_points(0.2, 0.1) / 640.0
+    result = {'faces_detected': True, 'face_count': 1, 'landmarks': [ArrayLandmarks(points)]}
+
+    class FakeWS:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, text):
+            self.sent.append(json.loads(text).get('event'))
+
+    async def frame(ws, t):
+        emitted = []
+        await movements.process_face_result(ws, {'timestamp': t * 1000}, result, emitted)
+        return emitted
+
+    async def scenario():
+        ws = FakeWS()
+        movements.topic_router.add(ws)
+        try:
+            default = await frame(ws, 1.0)
+            movements.topic_router.subscribe(ws, ['control', 'status', 'gaze'])
+            subscribed = await frame(ws, 1.1)
+        finally:
+            movements.topic_router.remove(ws)
+            movements.face_status_diff.forget(ws)
+        return default, subscribed
+
+    previous_mode = movements.system_state.current_mode
+    movements.system_state.current_mode = 'PLACE'
+    try:
+        default, subscribed = asyncio.run(scenario())
+    finally:
+        movements.system_state.current_mode = previous_mode
+        movements.fixation_detector.reset()
+    assert "GAZE" not in default
+    assert "GAZE" in subscribed
+
+def polynomial_residual(mapping, fixations):
+    gaze = np.array([g for g, _ in fixations])
+    screen = np.array([s for _, s in fixations])
+    return float(np.max(np.abs(mapping.apply(gaze) - screen)))
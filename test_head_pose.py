@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for solvePnP head pose estimation on FaceMesh landmarks.
+"""
+
+import sys
+import os
+import math
+
+import cv2
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from head_pose import HeadPoseEstimator, FACE_MODEL_POINTS
+
+def project_face(estimator, yaw, pitch, roll, distance=2000.0, shift=(0.0, 0.0), size=(640, 480)):
+    """Pixel positions of the model landmarks for a known head pose"""
+    y, p, r = (math.radians(a) for a in (-yaw, pitch, roll))
+    rx = np.array([[1, 0, 0], [0, math.cos(p), -math.sin(p)], [0, math.sin(p), math.cos(p)]])
+    ry = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+    rz = np.array([[math.cos(r), -math.sin(r), 0], [math.sin(r), math.cos(r), 0], [0, 0, 1]])
+    rvec, _ = cv2.Rodrigues(rz @ ry @ rx)
+    tvec = np.array([shift[0], shift[1], distance])
+    points, _ = cv2.projectPoints(FACE_MODEL_POINTS, rvec, tvec, estimator._camera(*size), None)
+    return points.reshape(-1, 2)
+
+def test_recovers_known_angles_with_warm_start():
+    """Yaw/pitch/roll are recovered frame after frame, including sign conventions"""
+    estimator = HeadPoseEstimator()
+    for yaw, pitch, roll in [(0, 0, 0), (15, 0, 0), (15, -10, 0), (20, -10, 3), (-12, 8, -4)]:
+        pose = estimator.estimate(project_face(estimator, yaw, pitch, roll), 640, 480)
+        assert abs(pose["yaw"] - yaw) < 0.1
+        assert abs(pose["pitch"] - pitch) < 0.1
+        assert abs(pose["roll"] - roll) < 0.1
+
+    # Turning towards image +x moves the nose to +x relative to the eyes
+    points = project_face(estimator, 15, 0, 0)
+    assert points[0, 0] - (points[2, 0] + points[3, 0]) / 2 > 0
+
+def test_translation_does_not_change_angles():
+    """Leaning sideways or towards the camera leaves yaw/pitch unchanged"""
+    estimator = HeadPoseEstimator()
+    for shift, distance in [((0, 0), 2000.0), ((300, 0), 2000.0), ((0, 0), 1200.0), ((-200, 150), 1500.0)]:
+        pose = estimator.estimate(project_face(estimator, 5, 5, 0, distance, shift), 640, 480)
+        assert abs(pose["yaw"] - 5) < 0.1 and abs(pose["pitch"] - 5) < 0.1
+        assert abs(pose["distance"] - distance) < 1.0
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for the WebSocket JSON codec and prebuilt event messages.
+"""
+
+import sys
+import os
+import json
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from json_codec import PONG_MESSAGE, dumps, event_message, face_status_message, loads
+
+def test_templated_messages_match_plain_json():
+    """Prefix-templated and prebuilt messages decode to the same objects as json.dumps output"""
+    payload = {"direction": "LEFT", "motor_speed": 0.42, "displacement": {"x": np.float64(0.03), "y": -0.01},
+               "velocity": np.array([0.5, -0.25])}
+    message = loads(event_message("NOSE_MOVE", payload))
+    assert message == {"event": "NOSE_MOVE", "payload": {
+        "direction": "LEFT", "motor_speed": 0.42, "displacement": {"x": 0.03, "y": -0.01}, "velocity": [0.5, -0.25]}}
+
+    assert json.loads(face_status_message(True, 1)) == {
+        "type": "face_detection_result", "event": "FACE_STATUS", "payload": {"active": True, "faces": 1}}
+    assert face_status_message(True, 1) is face_status_message(True, 1)
+    assert json.loads(PONG_MESSAGE) == {"type": "pong", "payload": {"status": "ok"}}
+    assert loads(dumps({"a": [1, 2.5, None, "é"]})) == {"a": [1, 2.5, None, "é"]}
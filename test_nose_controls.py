@@ -13,6 +13,9 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 from movements import HeadMovementDetector, FaceDetector
+from steering import DifferentialSteering
+from types import SimpleNamespace
+import random
 import logging
 
 # Setup logging
@@ -43,6 +46,120 @@ def test_nose_movement_detector():
     print("🎉 All nose movement detector tests passed!")
     return True
 
+def fake_landmarks(nose_x, nose_y):
+    """Minimal FaceMesh-like landmark list with only the nose tip populated"""
+    points = [SimpleNamespace(x=0.5, y=0.5, z=0.0) for _ in range(468)]
+    points[1] = SimpleNamespace(x=nose_x, y=nose_y, z=0.0)
+    return [SimpleNamespace(landmark=points)]
+
+def test_filtered_nose_movement_does_not_flap():
+    """Jitter around the threshold gives one direction change, not flapping"""
+    print("🧪 Testing filtered nose movement...")
+    
+    rng = random.Random(0)
+    detector = HeadMovementDetector()
+    fps = 30.0
+    events = []
+    
+    for i in range(240):
+        t = i / fps
+        # 2 s at center, then hold a head turn just past the threshold
+        offset = 0.0 if t < 2.0 else 0.03
+        x = 0.5 + offset + rng.gauss(0, 0.004)
+        y = 0.5 + rng.gauss(0, 0.004)
+        result = detector.detect_nose_movement(fake_landmarks(x, y), t)
+        if result:
+            events.append((t, result['direction']))
+    
+    assert [d for _, d in events] == ['LEFT'], f"Expected a single LEFT, got {events}"
+    assert events[0][0] - 2.0 < 0.3, "Filtered detection should react within 300 ms"
+    assert 'velocity' in detector.detect_nose_movement(fake_landmarks(0.5, 0.5), 8.5)
+    
+    print("✅ Filtered nose movement test passed")
+    return True
+
+def test_background_recalibration_follows_posture_drift():
+    """Slow posture drift re-centers the nose without false directions"""
+    print("🧪 Testing background nose recalibration...")
+    
+    rng = random.Random(1)
+    detector = HeadMovementDetector()
+    fps = 15.0
+    directions = []
+    
+    for i in range(int(60 * fps)):
+        t = i / fps
+        # Resting pose slides 0.02 to the side over a minute (just below the threshold)
+        drift = 0.02 * t / 60.0
+        result = detector.detect_nose_movement(
+            fake_landmarks(0.5 + drift + rng.gauss(0, 0.002), 0.5 + rng.gauss(0, 0.002)), t)
+        if result:
+            directions.append(result['direction'])
+    
+    state = detector.calibration_state()
+    assert directions == [], f"Drift should not produce directions, got {directions}"
+    assert state['recenters'] >= 1, "Drift should have triggered a background re-center"
+    assert abs(detector.nose_center_x - 0.52) < 0.01, "Center should follow the resting pose"
+    assert detector.pop_calibration_event() is not None
+    
+    print("✅ Background recalibration test passed")
+    return True
+
+def test_continuous_steering_arcs_and_streams_deltas():
+    """Proportional steering mixes turn and forward and only sends changes"""
+    print("🧪 Testing continuous steering...")
+    
+    steering = DifferentialSteering(rate_hz=10.0)
+    
+    # Inside the deadzone: no motion
+    assert steering.mix(0.01, -0.01) == (0.0, 0.0)
+    # Head up + slightly left: both wheels forward, right faster -> arc left
+    left, right = steering.mix(0.04, -0.06)
+    assert 0 < left < right <= steering.max_speed
+    
+    first = steering.update(0.04, -0.06, 0.0)
+    assert first == {'l': left, 'r': right}
+    assert steering.update(0.0, 0.0, 0.05) is None, "Updates are rate limited"
+    assert steering.update(0.041, -0.06, 0.2) is None, "Tiny changes are not sent"
+    assert steering.update(0.0, -0.06, 0.3) == {'l': 0.4, 'r': 0.4}, "Straight ahead: equal wheel speeds"
+    assert steering.stop() == {'l': 0.0, 'r': 0.0}
+    assert steering.stop() is None
+    
+    print("✅ Continuous steering test passed")
+    return True
+
+def test_steering_watchdog_and_face_lost_stop():
+    """Held wheel speeds stop when frames stall or the face is lost"""
+    print("🧪 Testing steering watchdog...")
+    
+    now = [0.0]
+    steering = DifferentialSteering(frame_interval=0.2, clock=lambda: now[0])
+    assert steering.update(0.0, -0.06, 0.0)
+    for i in range(1, 5):
+        now[0] = i * 0.2
+        steering.update(0.0, -0.06, now[0])
+    now[0] += 0.3
+    assert not steering.expired(), "One late frame is tolerated"
+    now[0] += 0.2
+    assert steering.expired(), "No update for 2x the frame interval"
+    assert steering.stop() == {'l': 0.0, 'r': 0.0}
+    assert not steering.expired()
+    
+    import movements
+    sent = []
+    class FakeWS:
+        async def send(self, text):
+            sent.append(json.loads(text))
+    movements.steering.left = movements.steering.right = 0.3
+    result = {'faces_detected': False, 'face_count': 0, 'landmarks': []}
+    emitted = []
+    asyncio.run(movements.process_face_result(FakeWS(), {}, result, emitted))
+    assert "DRIVE" in emitted and not movements.steering.moving
+    assert {'event': 'DRIVE', 'payload': {'l': 0.0, 'r': 0.0}} in sent
+    
+    print("✅ Steering watchdog test passed")
+    return True
+
 def test_face_detector():
     """Test the face detector functionality"""
     print("🧪 Testing Face Detector...")
@@ -99,6 +216,10 @@ async def main():
     # Run tests
     try:
         test_nose_movement_detector()
+        test_filtered_nose_movement_does_not_flap()
+        test_background_recalibration_follows_posture_drift()
+        test_continuous_steering_arcs_and_streams_deltas()
+        test_steering_watchdog_and_face_lost_stop()
         test_face_detector()
         print()
         print("✅ ALL TESTS PASSED!")
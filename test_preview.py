@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the annotated preview stream.
+"""
+
+import sys
+import os
+import asyncio
+import base64
+import json
+
+import cv2
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from face_landmarks import ArrayLandmarks
+from preview import PreviewRenderer
+from pubsub import TopicRouter, parse_topics, topic_for
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeClient:
+    def __init__(self):
+        self.received = []
+
+    async def send(self, text):
+        self.received.append(json.loads(text))
+
+def camera_frame(width=640, height=480):
+    frame = np.full((height, width, 3), 100, np.uint8)
+    ok, jpeg = cv2.imencode('.jpg', frame)
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode('ascii')
+
+def test_preview_is_downscaled_annotated_and_rate_limited():
+    """A 640x480 frame becomes a small annotated JPEG; previews are spaced by the frame interval"""
+    clock = FakeClock()
+    renderer = PreviewRenderer(fps=2, width=320, quality=40, clock=clock)
+    points = np.tile([0.5, 0.5, 0.0], (468, 1))
+    points[1] = (0.55, 0.5, 0.0)  # nose tip right of the neutral position
+    result = {"landmarks": [ArrayLandmarks(points)], "image_size": (640, 480)}
+    overlay = {"mode": "WHEELCHAIR", "ear": 0.15, "ear_threshold": 0.21,
+               "nose_center": (0.5, 0.5), "direction": "RIGHT"}
+
+    image_data = camera_frame()
+    assert renderer.due()
+    url = asyncio.run(renderer.render(image_data, result, overlay))
+    assert not renderer.due()
+    clock.now += 0.5
+    assert renderer.due()
+    renderer.close()
+
+    jpeg = base64.b64decode(url.split(',')[1])
+    preview = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert preview.shape == (240, 320, 3)
+    assert len(jpeg) < len(image_data) / 2
+    # The nose arrow and EAR text changed pixels away from the flat background
+    assert np.abs(preview.astype(int) - 100).max() > 50
+
+def test_preview_topic_is_opt_in():
+    """PREVIEW_FRAME only reaches clients that explicitly subscribed to 'preview'"""
+    router = TopicRouter()
+    default, debugger = FakeClient(), FakeClient()
+    router.add(default)
+    router.add(debugger, parse_topics({"type": "SUBSCRIBE", "topics": ["status", "preview"]}))
+    assert topic_for({"event": "PREVIEW_FRAME"}) == 'preview'
+    asyncio.run(router.publish('preview', '{"event":"PREVIEW_FRAME"}'))
+    assert default.received == []
+    assert [m["event"] for m in debugger.received] == ["PREVIEW_FRAME"]
+
+def test_nose_arrow_skipped_for_head_angle_control():
+    """With control_source 'angles' the neutral center is yaw/pitch, so no arrow is drawn"""
+    renderer = PreviewRenderer(fps=2, width=320, quality=90)
+    points = np.tile([0.5, 0.5, 0.0], (468, 1))
+    points[1] = (0.55, 0.5, 0.0)
+    result = {"landmarks": [ArrayLandmarks(points)], "image_size": (640, 480)}
+    image_data = camera_frame()
+
+    def render(overlay):
+        jpeg = base64.b64decode(renderer.render_sync(image_data, result, overlay).split(',')[1])
+        return cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+
+    plain = render({"nose_center": None})
+    angles = render({"nose_center": (0.012, -0.004), "control_source": "angles"})
+    nose = render({"nose_center": (0.5, 0.5), "control_source": "nose"})
+    renderer.close()
+    assert np.array_equal(angles, plain)
+    assert not np.array_equal(nose, plain)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for topic-based routing in the WebSocket servers.
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from pubsub import TopicRouter, parse_topics, topic_for
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.received = []
+        self.fail = fail
+
+    async def send(self, text):
+        if self.fail:
+            raise ConnectionError("closed")
+        self.received.append(json.loads(text))
+
+def test_messages_reach_only_subscribed_clients():
+    """Control, status and metrics streams are fanned out by topic; dead clients are dropped"""
+    router = TopicRouter()
+    wheelchair, dashboard, everything, sender = (FakeClient() for _ in range(4))
+    dead = FakeClient(fail=True)
+    router.add(wheelchair, ['control'])
+    router.add(dashboard, parse_topics({"type": "SUBSCRIBE", "payload": {"topics": ["metrics", "bogus"]}}))
+    router.add(everything)
+    router.add(sender)
+    router.add(dead, ['status'])
+
+    async def scenario():
+        await router.publish_raw(json.dumps({"event": "NOSE_MOVE", "payload": {"direction": "LEFT"}}), exclude=sender)
+        await router.publish(topic_for({"event": "METRICS"}), {"event": "METRICS", "payload": {"fps": 12}})
+        return await router.publish(topic_for({"event": "FACE_STATUS"}), '{"event":"FACE_STATUS"}')
+
+    dropped = asyncio.run(scenario())
+    assert [m["event"] for m in wheelchair.received] == ["NOSE_MOVE"]
+    assert [m["event"] for m in dashboard.received] == ["METRICS"]
+    assert [m["event"] for m in everything.received] == ["NOSE_MOVE", "METRICS", "FACE_STATUS"]
+    assert [m["event"] for m in sender.received] == ["METRICS", "FACE_STATUS"]
+    assert dropped == [dead] and dead not in router.subscribers_for('status')
+    assert topic_for({"type": "camera_frame"}) == 'video'
+    assert topic_for({"event": "CUSTOM", "topic": "metrics"}) == 'metrics'
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the INT8 face detector regression check and calibration reader.
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import quantize_face_detector as qfd
+
+def test_bbox_iou():
+    """Identical, disjoint, partial and degenerate boxes"""
+    assert qfd.bbox_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert qfd.bbox_iou((0, 0, 10, 10), (20, 20, 30, 30)) == 0.0
+    assert qfd.bbox_iou((0, 0, 10, 10), (10, 0, 20, 10)) == 0.0  # touching edges
+    assert abs(qfd.bbox_iou((0, 0, 10, 10), (5, 0, 15, 10)) - 50 / 150) < 1e-9
+    assert abs(qfd.bbox_iou((0, 0, 10, 10), (2, 2, 8, 8)) - 36 / 100) < 1e-9
+    assert qfd.bbox_iou((0, 0, 0, 0), (0, 0, 0, 0)) == 0.0
+
+def test_report_thresholds():
+    """Each acceptance threshold fails the report on its own"""
+    passing = qfd.build_report(100, [0.95] * 90, 99, 50, 50)
+    assert passing['passed'] and passing['mean_iou'] == pytest.approx(0.95)
+
+    assert not qfd.build_report(100, [0.85] * 90, 99, 50, 50)['passed'], "mean IoU below 0.90"
+    assert not qfd.build_report(100, [0.95] * 90, 97, 50, 50)['passed'], "detection agreement below 98%"
+    assert not qfd.build_report(100, [0.95] * 90, 99, 48, 50)['passed'], "blink agreement below 98%"
+    assert qfd.build_report(100, [0.95] * 90, 98, 49, 50)['passed'], "thresholds are inclusive"
+    assert not qfd.build_report(10, [], 10, 0, 0)['passed'], "no matched faces means no IoU evidence"
+
+def _write_frames(directory, count):
+    for i in range(count):
+        cv2.imwrite(os.path.join(directory, f"{i:03d}.png"), np.full((48, 64, 3), i, np.uint8))
+
+def test_regression_check_against_fake_trackers(tmp_path, monkeypatch):
+    """The INT8 model fails once its boxes drift or it misses faces the fp32 model finds"""
+    _write_frames(tmp_path, 10)
+
+    class FakeTracker:
+        def __init__(self, model_path):
+            self.model_path = model_path
+
+        def detect_faces_yolo(self, frame):
+            index = int(frame[0, 0, 0])
+            if self.model_path == 'miss.onnx' and index < 3:
+                return []
+            shift = 4 if self.model_path == 'drift.onnx' else 0
+            return [{'bbox': (10 + shift, 10, 30 + shift, 30), 'confidence': 0.9}]
+
+        def extract_eye_landmarks(self, frame, bbox):
+            return {'frame': int(frame[0, 0, 0])}
+
+        def detect_eye_movements(self, eye_landmarks):
+            return {'blink': eye_landmarks['frame'] % 4 == 0}
+
+    monkeypatch.setitem(sys.modules, 'yolov8_eye_tracker',
+                        SimpleNamespace(YOLOEyeTracker=FakeTracker, DEFAULT_FACE_MODEL='fp32.pt'))
+
+    same = qfd.regression_check(str(tmp_path), 'same.onnx')
+    assert same['frames'] == 10 and same['mean_iou'] == 1.0 and same['passed']
+    assert not qfd.regression_check(str(tmp_path), 'drift.onnx')['passed']
+    missed = qfd.regression_check(str(tmp_path), 'miss.onnx')
+    assert missed['detection_agreement'] == 0.7 and not missed['passed']
+
+def test_calibration_reader_rewinds_and_empty_input_fails_first(tmp_path):
+    """rewind() replays the frames; an empty source fails before any model is written"""
+    _write_frames(tmp_path, 3)
+    reader = qfd.RecordedFrameReader('images', str(tmp_path), imgsz=32)
+    first = [reader.get_next() for _ in range(4)]
+    assert first[-1] is None and reader.count == 3
+    assert first[0]['images'].shape == (1, 3, 32, 32)
+    reader.rewind()
+    assert reader.get_next() is not None and reader.count == 1
+
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    output = tmp_path / 'model-int8.onnx'
+    assert qfd.main(['calibrate', '--frames', str(empty), '--output', str(output)]) == 1
+    with pytest.raises(RuntimeError, match="No calibration frames"):
+        qfd.quantize('missing.onnx', str(output), str(empty))
+    assert not output.exists()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped session recorder.
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from face_landmarks import ArrayLandmarks
+from session_recorder import LANDMARK_SUBSET, SessionRecorder, load_session, mask_events
+
+def test_recording_roundtrip_with_rotation():
+    """Frames written across rotated files load back as one structured array"""
+    points = np.random.default_rng(0).random((478, 3))
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = SessionRecorder(tmp, max_frames=40, fsync_interval=0.0)
+        for i in range(100):
+            face = ArrayLandmarks(points) if i % 10 else None
+            recorder.record(i * 0.2, face, ear=0.3 if face else None, nose=(0.01 * i, -0.02),
+                            mode='WHEELCHAIR', direction='LEFT', events=['NOSE_MOVE', 'DRIVE'] if i == 5 else [],
+                            process_seconds=0.012, latency_seconds=0.02)
+        recorder.close()
+
+        files = sorted(os.listdir(tmp))
+        last_part = np.load(os.path.join(tmp, files[-1]))
+        records = load_session(tmp)
+
+    assert len(files) == 3 and last_part.shape == (20,)
+    assert records['frame'].tolist() == list(range(1, 101))
+    assert np.allclose(records['time'][:3], [0.0, 0.2, 0.4])
+    assert records['face'].sum() == 90 and np.isnan(records['ear'][0]) and np.isclose(records['ear'][1], 0.3)
+    assert np.allclose(records['landmarks'][1], points[list(LANDMARK_SUBSET), :2])
+    assert mask_events(records['events'][5]) == ['NOSE_MOVE', 'DRIVE']
+    assert np.isclose(records['process_ms'][0], 12.0)
+
+def test_unclosed_file_loads_written_frames_only():
+    """After a crash the preallocated file still loads, without its unwritten rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = SessionRecorder(tmp, max_frames=50, fsync_interval=0.0)
+        for i in range(7):
+            recorder.record(float(i))
+        recorder._map.flush()
+        records = load_session(recorder.path)
+        del recorder
+    assert len(records) == 7
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the fixed-capacity ring buffer used for EAR and gaze history.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from signal_buffers import RingBuffer
+
+def test_ring_buffer_window_statistics():
+    """Running statistics match a rescan of the last `capacity` samples"""
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0.3, 0.05, 200)
+    buf = RingBuffer(10)
+
+    for i, value in enumerate(samples):
+        buf.append(value)
+        window = samples[max(0, i - 9):i + 1]
+        assert len(buf) == len(window)
+        assert np.isclose(buf.mean(), window.mean())
+        assert np.isclose(buf.var(), window.var())
+        assert buf.min() == window.min()
+        assert buf.max() == window.max()
+        assert buf.last() == value
+
+    assert buf.full
+    assert np.array_equal(buf.values(), samples[-10:])
+
+def test_ring_buffer_vectors_and_popleft():
+    """Multi-column buffers report per-column stats and support popleft"""
+    buf = RingBuffer(3, dims=2)
+    for point in [(1, 10), (2, 30), (3, 20), (4, 0)]:
+        buf.append(point)
+
+    assert np.allclose(buf.mean(), [3, 50 / 3])
+    assert np.array_equal(buf.min(), [2, 0])
+    assert np.array_equal(buf.max(), [4, 30])
+
+    assert np.array_equal(buf.popleft(), [2, 30])
+    assert np.array_equal(buf.max(), [4, 20])
+    assert len(buf) == 2
+
+    buf.clear()
+    assert len(buf) == 0
+    assert buf.mean() is None and buf.last() is None
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Tests for change-only FACE_STATUS delivery.
+"""
+
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from status_diff import StatusDiff
+
+def test_status_sent_on_change_heartbeat_and_full_rate():
+    """Unchanged statuses are suppressed until the heartbeat; debug clients get every frame"""
+    now = [0.0]
+    diff = StatusDiff(heartbeat=2.0, clock=lambda: now[0])
+    sent = []
+    debug_sent = []
+    diff.set_full_rate('debug')
+
+    # 10 fps for 5 s: face found at 0.0 s, lost at 3.0 s
+    for frame in range(50):
+        now[0] = frame * 0.1
+        status = (True, 1) if now[0] < 3.0 else (False, 0)
+        if diff.should_send('client', status):
+            sent.append((round(now[0], 1), status))
+        if diff.should_send('debug', status):
+            debug_sent.append(status)
+
+    assert sent == [(0.0, (True, 1)), (2.0, (True, 1)), (3.0, (False, 0))]
+    assert len(debug_sent) == 50
+
+    diff.forget('client')
+    assert diff.should_send('client', (False, 0))
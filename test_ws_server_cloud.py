@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-port cloud relay server.
+"""
+
+import sys
+import os
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from ws_server_cloud import WSServer, create_app
+
+def test_health_and_websocket_share_one_listener():
+    """/health, the banner and the WebSocket relay are all served by the same aiohttp site"""
+    async def scenario():
+        server = WSServer()
+        runner = web.AppRunner(create_app(server))
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(base + '/') as response:
+                    banner = await response.text()
+                sender = await session.ws_connect(base + '/')
+                listener = await session.ws_connect(base + '/ws')
+                await listener.send_json({"type": "SUBSCRIBE", "topics": ["control"]})
+                subscribed = await listener.receive_json(timeout=2)
+                async with session.get(base + '/health') as response:
+                    health = await response.json()
+                await sender.send_json({"event": "NOSE_MOVE", "payload": {"direction": "LEFT"}})
+                relayed = await listener.receive_json(timeout=2)
+                await sender.close()
+                await listener.close()
+                await asyncio.sleep(0.05)
+                remaining = len(server.clients)
+        finally:
+            await runner.cleanup()
+        return banner, subscribed, health, relayed, remaining
+
+    banner, subscribed, health, relayed, remaining = asyncio.run(scenario())
+    assert banner == "Gesture Control WebSocket Server"
+    assert subscribed == {"event": "SUBSCRIBED", "payload": {"topics": ["control"]}}
+    assert health["clients"] == 2
+    assert relayed["event"] == "NOSE_MOVE"
+    assert remaining == 0